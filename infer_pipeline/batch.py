@@ -0,0 +1,255 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+import torch
+
+from utils import id_generator
+from common import INFERENCES_DIR, STAGE_CONCURRENCY
+from data_types.inference import Inference
+from data_types.inference_catalog import InferenceCatalog
+from data_types.mmpose_model import MMPoseModel
+from data_types.mmdetection_model import MMDetectionModel
+from manager.dataset_manager import DatasetManager, Datasets
+from manager.data_manager import fetch_all_data, filter_data, find_existing_dataset
+from manager.mmdetection_model_manager import get_mmdetection_models, DEFAULT_MMDETECTION_MODEL
+from engine.progress import ProgressChannel, format_progress
+from engine.stage_scheduler import InferenceStage, run_inferences
+from engine.stage_checkpoint import find_interrupted_jobs
+
+# a job spec is a dict with the keys
+# name, description (optional)
+# pose_config, pose_checkpoint, pose_multi_frame_mmpose029 (optional, for the mmpose 0.29 posewarper models)
+# detector (optional, name of a detector of the gui, VarifocalNet by default) or detector_config and
+# detector_checkpoint
+# data (optional, list of data ids), preset and spotlight (optional, the presets of the gui data filter)
+
+
+class JobSpecError(Exception):
+    pass
+
+
+def load_specs(path):
+    # a json list of specs, a single json spec or one spec per line
+    with open(path, 'r', encoding='utf8') as specs_file:
+        content = specs_file.read()
+    try:
+        specs = json.loads(content)
+    except json.JSONDecodeError:
+        specs = [json.loads(line) for line in content.splitlines() if line.strip()]
+    return specs if isinstance(specs, list) else [specs]
+
+
+def create_pose_model(spec):
+    config = spec['pose_config']
+    input_size = re.search(r'\d+x\d+', os.path.basename(config))
+    return MMPoseModel(
+        section=spec.get('pose_section', 'Batch'),
+        arch=os.path.splitext(os.path.basename(config))[0],
+        dataset=spec.get('pose_dataset', 'coco'),
+        input_size=input_size.group() if input_size is not None else '',
+        key_metric_value=0.0,
+        key_metric_name='',
+        checkpoint=spec['pose_checkpoint'],
+        config=config,
+        multi_frame_mmpose029=spec.get('pose_multi_frame_mmpose029', False)
+    )
+
+
+def create_detection_model(spec, detection_models):
+    if 'detector_config' in spec or 'detector_checkpoint' in spec:
+        return MMDetectionModel(
+            name=spec.get('detector', os.path.splitext(os.path.basename(spec['detector_config']))[0]),
+            key_metric_value=0.0,
+            key_metric_name='',
+            checkpoint=spec['detector_checkpoint'],
+            config=spec['detector_config']
+        )
+    name = spec.get('detector', DEFAULT_MMDETECTION_MODEL)
+    detection_model = next((model for model in detection_models if model.name == name), None)
+    if detection_model is None:
+        raise JobSpecError(f'Unknown detector {name}, available: '
+                           f'{", ".join(model.name for model in detection_models)}.')
+    return detection_model
+
+
+def select_data(spec, data_all):
+    if 'data' not in spec and 'preset' not in spec and 'spotlight' not in spec:
+        raise JobSpecError('No data ids or preset given.')
+    data = filter_data(data_all, spec.get('preset', 'No Preset'), spec.get('spotlight', 'All Spotlight'))
+    if 'data' in spec:
+        data_ids = [int(data_id) for data_id in spec['data']]
+        missing = [data_id for data_id in data_ids if data_id not in {d.id for d in data}]
+        if missing:
+            raise JobSpecError(f'Data {missing} not found or not in the preset.')
+        data = [d for d in data if d.id in data_ids]
+    if not data:
+        raise JobSpecError('The preset matches no data.')
+    return data
+
+
+def create_inferences(specs, taken_names):
+    # the same checks as when adding inferences to the queue of the gui
+    data_all = fetch_all_data()
+    detection_models = get_mmdetection_models()
+    inferences = []
+    existing_datasets = []
+    for i, spec in enumerate(specs):
+        try:
+            if 'pose_config' not in spec or 'pose_checkpoint' not in spec:
+                raise JobSpecError('pose_config and pose_checkpoint are required.')
+            data = select_data(spec, data_all)
+
+            inference_id = id_generator()
+            while os.path.exists(os.path.join(INFERENCES_DIR, inference_id)):
+                inference_id = id_generator()
+
+            name = spec.get('name') or inference_id
+            if name in taken_names:
+                raise JobSpecError(f'Inference name {name} already used.')
+            taken_names.add(name)
+
+            inferences.append(Inference(metadata={
+                'id': inference_id,
+                'name': name,
+                'mmpose_model': create_pose_model(spec),
+                'mmdetection_model': create_detection_model(spec, detection_models),
+                'data': data,
+                'description': spec.get('description') or 'No description provided.'
+            }))
+            existing_datasets.append(find_existing_dataset([d.id for d in data]))
+        except (JobSpecError, KeyError, ValueError) as e:
+            raise JobSpecError(f'Job spec {i} ({spec.get("name", "unnamed")}): {e}') from e
+    return inferences, existing_datasets
+
+
+def parse_concurrency(items):
+    concurrency = dict(STAGE_CONCURRENCY)
+    for item in items or []:
+        stage, _, limit = item.partition('=')
+        try:
+            concurrency[InferenceStage(stage).value] = int(limit)
+        except ValueError as e:
+            raise JobSpecError(f'Invalid concurrency {item}, expected <stage>=<n> with a stage of '
+                               f'{", ".join(stage.value for stage in InferenceStage)}.') from e
+    return concurrency
+
+
+class BatchLog():
+    # progress of all inferences to stdout and optionally every event as a json line
+    def __init__(self, inferences, log_path=None):
+        self.names = {inference.id: inference.name for inference in inferences}
+        self.states = {inference.id: None for inference in inferences}
+        self.log_file = open(log_path, 'a', encoding='utf8') if log_path is not None else None
+
+    def on_event(self, event):
+        if self.log_file is not None:
+            self.log_file.write(json.dumps({'time': time.time(), **event}) + '\n')
+            self.log_file.flush()
+
+        match event['type']:
+            case 'progress':
+                print(f"[{self.names[event['inference_id']]}] {event['stage']}: {format_progress(event)}", flush=True)
+            case 'state':
+                self.states[event['inference_id']] = event['state']
+                print(f"[{self.names[event['inference_id']]}] {event['state']}", flush=True)
+
+    def close(self):
+        if self.log_file is not None:
+            self.log_file.close()
+
+
+def run_batch(inferences, existing_datasets, concurrency=None, log_path=None):
+    # inferences run in a spawned process as from the gui, returns {inference id: DONE, FAILED or None if the
+    # process died before the inference finished}
+    dataset_manager = DatasetManager()
+    dataset_manager.create_datasets()
+    dataset_type = dataset_manager.datasets[Datasets.COCO.value]
+
+    torch.multiprocessing.set_start_method('spawn', force=True)
+    progress_channel = ProgressChannel()
+    batch_log = BatchLog(inferences, log_path)
+    progress_channel.subscribe(batch_log.on_event)
+
+    inference_process = torch.multiprocessing.Process(
+        target=run_inferences,
+        args=(inferences, existing_datasets, dataset_type, progress_channel.events, concurrency))
+    inference_process.start()
+    try:
+        while inference_process.is_alive():
+            progress_channel.listen(timeout=0.5)
+        inference_process.join()
+        progress_channel.poll()
+    finally:
+        batch_log.close()
+    return batch_log.states
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs inferences without the gui.')
+    parser.add_argument('--specs', type=str, default=None, required=False,
+                        help='json or json lines file of job specs')
+    parser.add_argument('--name', type=str, default=None, required=False)
+    parser.add_argument('--description', type=str, default=None, required=False)
+    parser.add_argument('--pose-config', type=str, default=None, required=False)
+    parser.add_argument('--pose-checkpoint', type=str, default=None, required=False)
+    parser.add_argument('--detector', type=str, default=None, required=False)
+    parser.add_argument('--detector-config', type=str, default=None, required=False)
+    parser.add_argument('--detector-checkpoint', type=str, default=None, required=False)
+    parser.add_argument('--data', type=int, nargs='+', default=None, required=False)
+    parser.add_argument('--preset', type=str, default=None, required=False)
+    parser.add_argument('--spotlight', type=str, default=None, required=False)
+    parser.add_argument('--concurrency', type=str, nargs='+', default=None, required=False,
+                        help='stage concurrency overrides, e.g. detection=2 pose_estimation=2')
+    parser.add_argument('--log', type=str, default=None, required=False, help='json lines file of all events')
+    parser.add_argument('--resume', action='store_true', help='also resume interrupted inferences')
+    args = parser.parse_args()
+
+    specs = load_specs(args.specs) if args.specs is not None else []
+    if args.pose_config is not None:
+        spec = {
+            'name': args.name,
+            'description': args.description,
+            'pose_config': args.pose_config,
+            'pose_checkpoint': args.pose_checkpoint,
+            'detector': args.detector,
+            'detector_config': args.detector_config,
+            'detector_checkpoint': args.detector_checkpoint,
+            'data': args.data,
+            'preset': args.preset,
+            'spotlight': args.spotlight
+        }
+        specs.append({key: value for key, value in spec.items() if value is not None})
+
+    catalog = InferenceCatalog()
+    catalog.refresh()
+    taken_names = {catalog.get_metadata(id_)['name'] for id_ in catalog.ids()}
+
+    inferences = []
+    existing_datasets = []
+    if args.resume:
+        for inference, existing_dataset in find_interrupted_jobs():
+            inferences.append(inference)
+            existing_datasets.append(existing_dataset)
+            taken_names.add(inference.name)
+
+    try:
+        new_inferences, new_existing_datasets = create_inferences(specs, taken_names)
+        concurrency = parse_concurrency(args.concurrency)
+    except JobSpecError as e:
+        parser.error(str(e))
+    inferences += new_inferences
+    existing_datasets += new_existing_datasets
+
+    if not inferences:
+        parser.error('No inferences given, use --specs, --pose-config or --resume.')
+
+    states = run_batch(inferences, existing_datasets, concurrency, args.log)
+
+    print()
+    for inference in inferences:
+        print(f'{inference.name} | {inference.id} | {states[inference.id] or "INTERRUPTED"}')
+    sys.exit(0 if all(state == 'DONE' for state in states.values()) else 1)
@@ -9,6 +9,19 @@ INFER_PIPELINE_DIR = os.path.join(THESIS_DIR, 'infer_pipeline')
 INFER_PIPELINE_MMDETECTION_CONFIGS_DIR = os.path.join(INFER_PIPELINE_DIR, 'configs', 'mmdet')
 INFER_PIPELINE_MMDPOSE_CONFIGS_DIR = os.path.join(INFER_PIPELINE_DIR, 'configs', 'mmpose')
 INFERENCES_DIR = os.path.join(INFER_PIPELINE_DIR, 'inferences')
+DETECTION_CACHE_DIR = os.path.join(INFERENCES_DIR, 'detection_cache')
+RUN_CACHE_MAX_BYTES = int(os.environ.get('RUN_CACHE_MAX_BYTES', 4 * 1024 ** 3))
+STAGE_CONCURRENCY = {
+    'data_staging': 2,
+    'detection': 1,
+    'pose_estimation': 1,
+    'result_assembly': 2,
+    'metrics': 1
+}
+INFERENCE_ENGINE_MODE = os.environ.get('INFERENCE_ENGINE_MODE', 'subprocess')
+MODEL_WORKER_DIR = os.path.join(INFER_PIPELINE_DIR, 'model_worker')
+MODEL_WORKER_SOCKET = os.environ.get('MODEL_WORKER_SOCKET', os.path.join(MODEL_WORKER_DIR, 'worker.sock'))
+MODEL_WORKER_MAX_MODELS = int(os.environ.get('MODEL_WORKER_MAX_MODELS', 4))
 
 TRAIN_PIPELINE_DIR = os.path.join(THESIS_DIR, 'train_pipeline')
 TRAIN_PIPELINE_MMDETECTION_DIR = os.path.join(TRAIN_PIPELINE_DIR, 'mmdet')
@@ -19,6 +32,13 @@ MMPOSE_DIR = os.environ['MMPOSE_DIR']
 MMPOSE_DATA_DIR = os.path.join(MMPOSE_DIR, 'data', 'sc')
 MMPOSE_RUNS_DIR = os.path.join(MMPOSE_DATA_DIR, 'runs')
 MMPOSE_DATASET_DIR = os.path.join(MMPOSE_DATA_DIR, 'dataset')
+FRAME_STORE_DIR = os.path.join(MMPOSE_DATA_DIR, 'frame_store')
+FRAME_DIGEST_INDEX = os.path.join(FRAME_STORE_DIR, 'index.json')
+DATASET_STAGING_MODE = os.environ.get('DATASET_STAGING_MODE', 'hardlink')
+RESULT_FORMAT = os.environ.get('RESULT_FORMAT', 'npy')
+FEATURE_INTERPOLATION_METHOD = os.environ.get('FEATURE_INTERPOLATION_METHOD', 'linear')
+FEATURE_INTERPOLATION_MAX_GAP = int(os.environ['FEATURE_INTERPOLATION_MAX_GAP']) \
+    if 'FEATURE_INTERPOLATION_MAX_GAP' in os.environ else None
 MMPOSE_CHECKPOINTS_DIR = os.path.join(MMPOSE_DIR, 'checkpoints')
 MMPOSE_TEST_SCRIPT = os.path.join(MMPOSE_DIR, 'tools', 'test.py')
 MMPOSE_DATA_EXPORT_DIR = os.path.join(THESIS_DIR, 'dataset', 'pos_dataset', 'raw')
@@ -0,0 +1,332 @@
+import os
+import glob
+import json
+import shutil
+import tempfile
+import argparse
+
+import numpy as np
+
+from common import INFERENCES_DIR
+from engine.atomic_file import temp_path, replace_json
+from data_types.run import Run
+from data_types.data import Data
+from data_types.feature import Feature, COLUMN_DTYPES
+from manager.metric_manager import RunMetrics
+from metrics.all_metrics import AllMetrics
+
+FORMAT_VERSION = 2
+METADATA_FILENAME = 'run.json'
+COLUMNS = [
+    'keypoints',
+    'keypoints_interp',
+    'bboxes',
+    'bboxes_bottomup',
+    'ious',
+    'detection_scores',
+    'pose_estimation_scores'
+]
+# metrics stored with a run as (metric features, steps) arrays, so they are not filtered again on every load.
+# missing pose estimations are only a comparison of the keypoints and are calculated on load
+METRIC_COLUMNS = {
+    AllMetrics.DELTAS.value: 'metric_deltas',
+    AllMetrics.HIGHPASS.value: 'metric_highpass',
+    AllMetrics.LOWPASS.value: 'metric_lowpass',
+    AllMetrics.FFT.value: 'metric_fft'
+}
+
+
+class FeatureView(Feature):
+    # reads its columns from the mmap of the run until it is changed, from then on it works on its own copy of them.
+    # read-only columns are materialized as lists on first access only
+    def __init__(self, name, fps, columns, keypoint, axis, on_materialize=None):
+        self.name = name
+        self.fps = fps
+        self._columns = columns
+        self._keypoint = keypoint
+        self._axis = axis
+        self._lists = {}
+        self._arrays = None
+        self._length = len(columns['keypoints'])
+        self._on_materialize = on_materialize
+
+    def __reduce__(self):
+        # a pickled view is restored as a feature with its own arrays
+        return Feature, (self.name, self.fps), Feature.__getstate__(self)
+
+    def add(self, step, value, score):
+        self._copy_columns()
+        Feature.add(self, step, value, score)
+
+    def set_array(self, column, values):
+        self._copy_columns()
+        Feature.set_array(self, column, values)
+
+    def array(self, attribute):
+        if self._arrays is not None:
+            return Feature.array(self, attribute)
+        match attribute:
+            case 'steps':
+                return np.arange(len(self._columns['keypoints']))
+            case 'values':
+                return self._columns['keypoints'][:, self._keypoint, self._axis]
+            case 'scores':
+                return self._columns['keypoints'][:, self._keypoint, 2]
+            case 'values_interp':
+                return self._columns['keypoints_interp'][:, self._keypoint, self._axis]
+
+    def _copy_columns(self):
+        if self._arrays is None:
+            self._arrays = {column: np.array(self.array(column), dtype=dtype) for column, dtype in COLUMN_DTYPES.items()}
+            self._materialized(self._arrays)
+
+    def _materialized(self, obj):
+        if self._on_materialize is not None:
+            self._on_materialize(obj)
+
+
+class ColumnarRun(Run):
+    def __init__(self, path, mmap_mode='r'):
+        with open(os.path.join(path, METADATA_FILENAME), 'r', encoding='utf8') as metadata_file:
+            metadata = json.load(metadata_file)
+
+        self.id = metadata['id']
+        self.path = path
+        self.data = Data(metadata['data_path'])
+        self.bottomup = metadata['bottomup']
+        self.highpass_zeroing_threshold = metadata['highpass_zeroing_threshold']
+        self.columns = {}
+        for column in COLUMNS:
+            self.columns[column] = np.load(os.path.join(path, column + '.npy'), mmap_mode=mmap_mode)
+
+        # runs saved without metrics calculate them on first access
+        self.metric_columns = {}
+        for metric_name in metadata.get('metrics', []):
+            self.metric_columns[metric_name] = np.load(os.path.join(path, METRIC_COLUMNS[metric_name] + '.npy'),
+                                                       mmap_mode=mmap_mode)
+
+        self.features = []
+        for i, name in enumerate(metadata['features']):
+            self.features.append(FeatureView(name, metadata['fps'], self.columns, keypoint=i // 2, axis=i % 2,
+                                             on_materialize=self._materialized))
+        self.index_features()
+
+        self._bboxes = None
+        self._bboxes_bottomup = None
+        self._ious = None
+        self._detection_scores = None
+        self._pose_estimation_scores = None
+        self._metrics = None
+        self.on_materialize = None
+
+    @property
+    def bboxes(self):
+        if self._bboxes is None:
+            self._bboxes = self.columns['bboxes'].tolist()
+            self._materialized(self._bboxes)
+        return self._bboxes
+
+    @property
+    def bboxes_bottomup(self):
+        if self._bboxes_bottomup is None:
+            if self.bottomup:
+                self._bboxes_bottomup = [-1 if bbox == [-1, -1, -1, -1] else bbox
+                                         for bbox in self.columns['bboxes_bottomup'].tolist()]
+            else:
+                self._bboxes_bottomup = []
+            self._materialized(self._bboxes_bottomup)
+        return self._bboxes_bottomup
+
+    @property
+    def ious(self):
+        if self._ious is None:
+            self._ious = self.columns['ious'].tolist() if self.bottomup else []
+            self._materialized(self._ious)
+        return self._ious
+
+    @property
+    def detection_scores(self):
+        if self._detection_scores is None:
+            self._detection_scores = self.columns['detection_scores'].tolist()
+            self._materialized(self._detection_scores)
+        return self._detection_scores
+
+    @property
+    def pose_estimation_scores(self):
+        if self._pose_estimation_scores is None:
+            self._pose_estimation_scores = self.columns['pose_estimation_scores'].tolist()
+            self._materialized(self._pose_estimation_scores)
+        return self._pose_estimation_scores
+
+    @property
+    def metrics(self):
+        if self._metrics is None:
+            self._metrics = RunMetrics(self.features, self.highpass_zeroing_threshold).calculate(
+                self.metric_columns).copy()
+            self._materialized(self._metrics)
+        return self._metrics
+
+    def save(self, filename):
+        save_run(self, filename, self.highpass_zeroing_threshold)
+
+
+def save_run(run, path, highpass_zeroing_threshold=None):
+    # the run is written into a new hidden directory that is swapped in when complete. a loaded run keeps reading the
+    # files it has memory-mapped, since they are only unlinked, never truncated
+    path = path.rstrip('/')
+    tmp_path = tempfile.mkdtemp(dir=os.path.dirname(path) or '.', prefix='.' + os.path.basename(path) + '.',
+                                suffix='.tmp')
+    try:
+        _write_run(run, tmp_path, highpass_zeroing_threshold)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    if os.path.isdir(path):
+        old_path = tempfile.mkdtemp(dir=os.path.dirname(path) or '.', prefix='.' + os.path.basename(path) + '.',
+                                    suffix='.old')
+        os.replace(path, os.path.join(old_path, 'run'))
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+def _write_run(run, path, highpass_zeroing_threshold):
+
+    n_steps = len(run.features[0].array('steps'))
+    n_keypoints = len(run.features) // 2
+    keypoints = np.empty((n_steps, n_keypoints, 3), dtype=np.float32)
+    keypoints_interp = np.empty((n_steps, n_keypoints, 2), dtype=np.float32)
+    for i in range(n_keypoints):
+        feature_x = run.features[i * 2]
+        feature_y = run.features[i * 2 + 1]
+        keypoints[:, i, 0] = feature_x.array('values')
+        keypoints[:, i, 1] = feature_y.array('values')
+        keypoints[:, i, 2] = feature_x.array('scores')
+        for axis, feature in enumerate((feature_x, feature_y)):
+            values_interp = feature.array('values_interp')
+            keypoints_interp[:, i, axis] = values_interp if len(values_interp) else feature.array('values')
+
+    bboxes_bottomup = [[-1, -1, -1, -1] if bbox == -1 else bbox for bbox in run.bboxes_bottomup]
+
+    columns = {
+        'keypoints': keypoints,
+        'keypoints_interp': keypoints_interp,
+        'bboxes': np.array(run.bboxes, dtype=np.float32).reshape(-1, 4),
+        'bboxes_bottomup': np.array(bboxes_bottomup, dtype=np.int32).reshape(-1, 4),
+        'ious': np.array(run.ious, dtype=np.float32),
+        'detection_scores': np.array(run.detection_scores, dtype=np.float32),
+        'pose_estimation_scores': np.array(run.pose_estimation_scores, dtype=np.float32)
+    }
+    metric_columns = _get_metric_columns(run.features, run.metrics, n_steps)
+    for metric_name, array in metric_columns.items():
+        columns[METRIC_COLUMNS[metric_name]] = array
+    for column, array in columns.items():
+        np.save(os.path.join(path, column + '.npy'), array)
+
+    metadata = {
+        'format': FORMAT_VERSION,
+        'id': run.id,
+        'data_path': run.data.path,
+        'fps': run.features[0].fps,
+        'features': [feature.name for feature in run.features],
+        'bottomup': len(run.bboxes_bottomup) > 0,
+        'highpass_zeroing_threshold': highpass_zeroing_threshold,
+        'metrics': list(metric_columns)
+    }
+    # the metadata file is written last and marks the run as complete
+    with open(os.path.join(path, METADATA_FILENAME), 'w', encoding='utf8') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+
+def save_metrics(path, features, metrics, highpass_zeroing_threshold=None):
+    # adds the metrics to a saved run without writing its other columns again. each column replaces its file, so a
+    # loaded run keeps reading the files it has memory-mapped, and the metadata is replaced last
+    with open(os.path.join(path, METADATA_FILENAME), 'r', encoding='utf8') as metadata_file:
+        metadata = json.load(metadata_file)
+
+    metric_columns = _get_metric_columns(features, metrics, len(features[0].array('steps')))
+    for metric_name, array in metric_columns.items():
+        column_path = os.path.join(path, METRIC_COLUMNS[metric_name] + '.npy')
+        tmp_column_path = temp_path(column_path)
+        with open(tmp_column_path, 'wb') as column_file:
+            np.save(column_file, array)
+        os.replace(tmp_column_path, column_path)
+
+    metadata['highpass_zeroing_threshold'] = highpass_zeroing_threshold
+    metadata['metrics'] = list(metric_columns)
+    replace_json(os.path.join(path, METADATA_FILENAME), metadata)
+
+
+def _get_metric_columns(features, metrics, n_steps):
+    # values of the calculated metrics of a run, one row per feature with metrics. metrics of runs that have none or
+    # of pickled runs in another layout are left out and calculated on load
+    metric_columns = {}
+    if not metrics:
+        return metric_columns
+    n_metric_features = len(RunMetrics(features).features)
+    for metric_name in METRIC_COLUMNS:
+        feature_metrics = metrics.get(metric_name)
+        if not feature_metrics or len(feature_metrics) != n_metric_features:
+            continue
+        if any(metric is None or len(metric.values) != n_steps for metric in feature_metrics):
+            continue
+        metric_columns[metric_name] = np.array([metric.values for metric in feature_metrics], dtype=np.float32)
+    return metric_columns
+
+
+def is_columnar_run(path):
+    return os.path.exists(os.path.join(path, METADATA_FILENAME))
+
+
+def load_run(path):
+    if is_columnar_run(path):
+        return ColumnarRun(path)
+    return Run.load(path)
+
+
+def find_runs(inference_dir):
+    # one path per run, a columnar run takes precedence over its pickled original
+    runs = {}
+    for path in sorted(glob.glob(os.path.join(inference_dir, 'run_*'))):
+        name, extension = os.path.splitext(os.path.basename(path))
+        if extension == '.pkl':
+            runs.setdefault(name, path)
+        elif is_columnar_run(path):
+            runs[name] = path
+    return [runs[name] for name in sorted(runs)]
+
+
+def migrate_runs(inference_dir, delete_pickles=False):
+    migrated = 0
+    for pickle_path in sorted(glob.glob(os.path.join(inference_dir, 'run_*.pkl'))):
+        run_path = pickle_path[:-len('.pkl')]
+        if not is_columnar_run(run_path):
+            run = Run.load(pickle_path)
+            save_run(run, run_path, _get_highpass_zeroing_threshold(run))
+            migrated += 1
+        if delete_pickles:
+            os.remove(pickle_path)
+    return migrated
+
+
+def _get_highpass_zeroing_threshold(run):
+    highpass_metrics = run.metrics.get(AllMetrics.HIGHPASS.value) if run.metrics else None
+    if not highpass_metrics or highpass_metrics[0].parameters is None:
+        return None
+    zeroing_threshold = highpass_metrics[0].parameters.get('Zeroing Thr.')
+    return float(zeroing_threshold) if zeroing_threshold else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inferences-dir', type=str, default=INFERENCES_DIR, required=False)
+    parser.add_argument('--delete-pickles', action='store_true')
+    args = parser.parse_args()
+
+    for inference_dir in sorted(glob.glob(os.path.join(args.inferences_dir, '*'))):
+        if os.path.isdir(inference_dir):
+            n_migrated = migrate_runs(inference_dir, delete_pickles=args.delete_pickles)
+            if n_migrated:
+                print(f'{os.path.basename(inference_dir)}: migrated {n_migrated} runs')
@@ -3,31 +3,117 @@ import numpy as np
 from data_types.plottable import Plottable, PlottableTypes
 
 
+COLUMN_DTYPES = {
+    'steps': np.int32,
+    'values': np.float32,
+    'scores': np.float32,
+    'values_interp': np.float32
+}
+
+
+class ColumnList(list):
+    # read-only list view of a column. in-place changes would not reach the array, so they raise instead, the
+    # column is changed by assigning the attribute or with set_array. copies are plain lists
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Feature columns are read-only lists, assign the attribute or use set_array.')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _list_property(column):
+    # list view of a column for callers that work with lists, materialized on first access only
+    def getter(self):
+        if column not in self._lists:
+            self._lists[column] = ColumnList(self.array(column).tolist())
+            self._materialized(self._lists[column])
+        return self._lists[column]
+
+    def setter(self, value):
+        self.set_array(column, value)
+
+    return property(getter, setter)
+
+
 class Feature():
-    def __init__(self, name, fps=25, steps=None, scores=None, values=None):
+    # the columns are numpy buffers that grow while steps are added, array returns read-only views of them
+    __slots__ = ('name', 'fps', '_arrays', '_length', '_lists')
+
+    def __init__(self, name, fps=25, steps=None, scores=None, values=None, capacity=0):
         self.name = name
         self.fps = fps
-        self.steps = steps or []
-        self.values = values or []
-        self.scores = scores or []
-        self.values_interp = []
+        self._lists = {}
+        self._arrays = {column: np.empty(capacity, dtype=dtype) for column, dtype in COLUMN_DTYPES.items()}
+        self._arrays['values_interp'] = np.empty(0, dtype=np.float32)
+        self._length = 0
+        for column, column_values in (('steps', steps), ('values', values), ('scores', scores)):
+            if column_values is not None:
+                self.set_array(column, column_values)
+
+    steps = _list_property('steps')
+    values = _list_property('values')
+    scores = _list_property('scores')
+    values_interp = _list_property('values_interp')
 
     def add(self, step, value, score):
-        self.steps.append(step)
-        self.values.append(value)
-        self.scores.append(score)
+        if self._length == min(len(self._arrays[column]) for column in ('steps', 'values', 'scores')):
+            self._grow()
+        self._arrays['steps'][self._length] = step
+        self._arrays['values'][self._length] = value
+        self._arrays['scores'][self._length] = score
+        self._length += 1
+        self._lists.clear()
+
+    def array(self, column):
+        if column == 'values_interp':
+            array = self._arrays[column][:]
+        else:
+            array = self._arrays[column][:self._length]
+        array.flags.writeable = False
+        return array
 
-    def interpolate_values(self):
-        self.values_interp = self.values.copy()
-        steps_without_pose_estimations = [i for i, v in enumerate(self.values) if v == -1]
-        if steps_without_pose_estimations:
-            interpolation_steps = [i for j, i in enumerate(self.steps) if j not in steps_without_pose_estimations]
-            interpolation_values = [i for j, i in enumerate(self.values) if j not in steps_without_pose_estimations]
+    def set_array(self, column, values):
+        self._arrays[column] = np.array(values, dtype=COLUMN_DTYPES[column])
+        if column != 'values_interp':
+            self._length = len(self._arrays[column])
+        self._lists.pop(column, None)
 
-            interpolated_values = np.interp(steps_without_pose_estimations, interpolation_steps, interpolation_values)
+    def interpolate_values(self, method='linear', max_gap=None):
+        self.set_array('values_interp', interpolate_gaps(self.array('values')[np.newaxis].astype(np.float64),
+                                                         self.array('steps')[np.newaxis].astype(np.float64),
+                                                         method, max_gap)[0])
 
-            for i, step in enumerate(steps_without_pose_estimations):
-                self.values_interp[step] = interpolated_values[i]
+    def _materialized(self, obj):
+        # called with the objects built from the columns on access, see FeatureView
+        pass
+
+    def _grow(self):
+        capacity = max(16, self._length * 2)
+        for column in ('steps', 'values', 'scores'):
+            if len(self._arrays[column]) < capacity:
+                buffer = np.empty(capacity, dtype=COLUMN_DTYPES[column])
+                buffer[:self._length] = self._arrays[column][:self._length]
+                self._arrays[column] = buffer
+
+    def __getstate__(self):
+        state = {'name': self.name, 'fps': self.fps}
+        for column in COLUMN_DTYPES:
+            state[column] = np.array(self.array(column))
+        return state
+
+    def __setstate__(self, state):
+        # also restores features pickled as lists before the columns were arrays
+        self.name = state['name']
+        self.fps = state['fps']
+        self._lists = {}
+        self._arrays = {}
+        self._length = 0
+        for column in ('steps', 'values', 'scores', 'values_interp'):
+            self.set_array(column, state.get(column, []))
+        self._length = len(self._arrays['steps'])
 
     def plottables(self, name=None, legend=None):
         name = name or self.name
@@ -55,3 +141,91 @@ class Feature():
 
     def __str__(self):
         return self.name
+
+
+def group_by_length(features):
+    # {length: indices of the features of this length}, for calculations on features stacked into one array
+    indices_by_length = {}
+    for i, feature in enumerate(features):
+        indices_by_length.setdefault(len(feature.array('values')), []).append(i)
+    return indices_by_length
+
+
+def interpolate_features(features, method='linear', max_gap=None):
+    # interpolates the features of a run together, features of different lengths are interpolated per length
+    for indices in group_by_length(features).values():
+        same_length_features = [features[i] for i in indices]
+        values = np.array([feature.array('values') for feature in same_length_features], dtype=np.float64)
+        steps = np.array([feature.array('steps') for feature in same_length_features], dtype=np.float64)
+        for feature, values_interp in zip(same_length_features, interpolate_gaps(values, steps, method, max_gap)):
+            feature.set_array('values_interp', values_interp)
+
+
+def values_of(calculate_on):
+    # the interpolated values of a feature, or the values of a metric, as a float64 array for the calculation of
+    # a metric
+    if isinstance(calculate_on, Feature):
+        values_interp = calculate_on.array('values_interp')
+        return np.asarray(values_interp if len(values_interp) else calculate_on.array('values'), dtype=np.float64)
+    values_interp = getattr(calculate_on, 'values_interp', None)
+    return np.asarray(values_interp if values_interp is not None and len(values_interp) else calculate_on.values,
+                      dtype=np.float64)
+
+
+def stack_values(calculate_ons):
+    # (features, steps) float64 array of features or metrics of the same length
+    return np.array([values_of(calculate_on) for calculate_on in calculate_ons], dtype=np.float64)
+
+
+def interpolate_gaps(values, steps, method='linear', max_gap=None):
+    # fills the -1 gaps of each row of values over its steps. method is linear, cubic or hold (the last value before
+    # the gap), gaps at the start or the end hold the nearest value as in np.interp. steps of gaps longer than max_gap
+    # are nan, rows without any values are kept as they are
+    n_rows, n_steps = values.shape
+    valid = values != -1
+    if valid.all() or n_steps == 0:
+        return values.copy()
+
+    index = np.broadcast_to(np.arange(n_steps), values.shape)
+    previous = np.maximum.accumulate(np.where(valid, index, -1), axis=1)
+    following = np.minimum.accumulate(np.where(valid, index, n_steps)[:, ::-1], axis=1)[:, ::-1]
+    has_previous = previous >= 0
+    has_following = following < n_steps
+
+    previous_values = np.take_along_axis(values, np.clip(previous, 0, n_steps - 1), axis=1)
+    following_values = np.take_along_axis(values, np.clip(following, 0, n_steps - 1), axis=1)
+    previous_steps = np.take_along_axis(steps, np.clip(previous, 0, n_steps - 1), axis=1)
+    following_steps = np.take_along_axis(steps, np.clip(following, 0, n_steps - 1), axis=1)
+
+    match method:
+        case 'linear' | 'cubic':
+            inner = has_previous & has_following
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weight = np.where(inner, (steps - previous_steps) / (following_steps - previous_steps), 0)
+            filled = np.where(inner, previous_values + (following_values - previous_values) * weight,
+                              np.where(has_previous, previous_values, following_values))
+        case 'hold':
+            filled = np.where(has_previous, previous_values, following_values)
+        case _:
+            raise ValueError(f'Unknown interpolation method {method}.')
+
+    values_interp = np.where(valid, values, filled)
+
+    if method == 'cubic':
+        from scipy.interpolate import CubicSpline
+
+        # only gaps between values are filled with the spline, the edges keep the nearest value
+        for row in np.flatnonzero((~valid & has_previous & has_following).any(axis=1)):
+            if valid[row].sum() < 4:
+                continue
+            inner = ~valid[row] & has_previous[row] & has_following[row]
+            spline = CubicSpline(steps[row][valid[row]], values[row][valid[row]])
+            values_interp[row, inner] = spline(steps[row][inner])
+
+    if max_gap is not None:
+        gap_length = following - previous - 1
+        values_interp[~valid & (gap_length > max_gap)] = np.nan
+
+    # rows without any values stay missing
+    values_interp[~valid.any(axis=1)] = -1
+    return values_interp
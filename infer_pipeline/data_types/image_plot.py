@@ -120,8 +120,7 @@ class ImagePlot():
         for keypoint_name, keypoint in self.dataset_type.keypoints.items():
             keypoint_name = keypoint_name[:-2]
             if KeyPointsFeatureList.has_value(keypoint_name) and not keypoint_name in processed_keypoints:
-                feature_x = next(f for f in self.run.features if f.name == keypoint_name + '_x')
-                feature_y = next(f for f in self.run.features if f.name == keypoint_name + '_y')
+                feature_x, feature_y = self.run.keypoint_features[keypoint_name]
                 x = feature_x.values[self.slider_value]
                 y = feature_y.values[self.slider_value]
                 v = 2
@@ -243,14 +242,13 @@ class ImagePlot():
             self.set_dataset_information()
 
     def _draw_keypoints_and_scores(self, image):
+        coordinates = self.run.keypoint_coordinates(self.slider_value)
         drawn_keypoints = []
         for keypoint_name, keypoint in self.dataset_type.keypoints.items():
             keypoint_name = keypoint_name[:-2]
             if KeyPointsImagePlot.has_value(keypoint_name) and not keypoint_name in drawn_keypoints:
-                feature_x = next(f for f in self.run.features if f.name == keypoint_name + '_x')
-                feature_y = next(f for f in self.run.features if f.name == keypoint_name + '_y')
-                x = int(feature_x.values[self.slider_value])
-                y = int(feature_y.values[self.slider_value])
+                feature_x, feature_y = self.run.keypoint_features[keypoint_name]
+                x, y = (int(c) for c in coordinates[self.run.keypoint_indices[keypoint_name]])
                 assert feature_x.scores[self.slider_value] == feature_y.scores[self.slider_value]
                 score = feature_x.scores[self.slider_value]
                 color = [c / 255 for c in keypoint['color']]
@@ -276,6 +274,7 @@ class ImagePlot():
                         metrics[0].tracker_plot(image, self.slider_value, metric_x, metric_y)
 
     def _draw_skeleton(self, image):
+        coordinates = self.run.keypoint_coordinates(self.slider_value)
         for key, limb in self.dataset_type.skeleton.items():
             keypoint_1_name = limb['keypoint_1'][0]['name']
             keypoint_2_name = limb['keypoint_2'][0]['name']
@@ -283,10 +282,8 @@ class ImagePlot():
             if False in (KeyPointsImagePlot.has_value(keypoint_1_name), KeyPointsImagePlot.has_value(keypoint_2_name)):
                 continue
 
-            x1 = int(next(f for f in self.run.features if f.name == keypoint_1_name + '_x').values[self.slider_value])
-            y1 = int(next(f for f in self.run.features if f.name == keypoint_1_name + '_y').values[self.slider_value])
-            x2 = int(next(f for f in self.run.features if f.name == keypoint_2_name + '_x').values[self.slider_value])
-            y2 = int(next(f for f in self.run.features if f.name == keypoint_2_name + '_y').values[self.slider_value])
+            x1, y1 = (int(c) for c in coordinates[self.run.keypoint_indices[keypoint_1_name]])
+            x2, y2 = (int(c) for c in coordinates[self.run.keypoint_indices[keypoint_2_name]])
             color = [c / 255 for c in limb['color']]
             image = cv.line(image, pt1=(x1, y1), pt2=(x2, y2), color=color, thickness=2)
 
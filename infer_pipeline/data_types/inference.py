@@ -8,21 +8,54 @@ import subprocess
 from statistics import mean
 from datetime import datetime
 
-import torch
-from torchvision.ops import box_iou
-
 from data_types.run import Run
-from data_types.feature import Feature
-from utils import collect_image_infos, cvt_to_coco_json
-from manager.dataset_manager import KeypointsInterpolation
-from manager.metric_manager import InferenceMetrics, RunMetrics
-from common import MMPOSE_DIR, MMPOSE_TEST_SCRIPT, MMPOSE_DATASET_DIR
+from data_types.feature import interpolate_features
+from data_types.run_cache import RunCache
+from data_types.columnar_run import FORMAT_VERSION, save_run, save_metrics, load_run, find_runs
+from engine.bbox_reducer import BBoxReducer
+from engine.dataset_staging import DatasetStager
+from engine.derived_keypoints import derive_keypoints
+from engine.detection_cache import DetectionCache
+from engine.file_digest import FileDigestIndex
+from engine.image_scanner import scan_image_sizes
+from engine.json_stream import iter_json_array
+from engine.model_worker import run_test
+from engine.result_assembler import ResultAssembler
+from engine.result_sidecar import sidecar_path, copy_sidecar, save_bboxes, load_bboxes, save_keypoints, iter_keypoints
+from engine.result_sidecar import load_image_ids
+from engine.streaming_pipeline import StreamingPipeline
+from engine.stage_scheduler import InferenceStage
+from engine.stage_checkpoint import StageCheckpoint, remove_job
+from engine.profiling import Profiler
+from utils import cvt_to_coco_json
+from manager.metric_manager import InferenceMetrics, RunMetrics, StandardMetrics
+from common import MMPOSE_DIR, MMPOSE_TEST_SCRIPT, MMPOSE_DATASET_DIR, DATASET_STAGING_MODE, FRAME_DIGEST_INDEX
+from common import RESULT_FORMAT, FEATURE_INTERPOLATION_METHOD, FEATURE_INTERPOLATION_MAX_GAP
 from common import MMPOSE029_DIR, MMPOSE029_VENV_DIR, MMPOSE029_INFERENCE_SCRIPT
 from common import MMDETECTION_DIR, MMDETECTION_TEST_SCRIPT
-from common import INFERENCES_DIR
+from common import INFERENCES_DIR, RUN_CACHE_MAX_BYTES, INFERENCE_ENGINE_MODE
+
+STAGE_OUTPUTS = {
+    InferenceStage.DATA_STAGING: ['ann_file'],
+    InferenceStage.DETECTION: ['detection_file_path', 'detection_sidecar_path', 'streaming_results_file_path'],
+    InferenceStage.POSE_ESTIMATION: ['bbox_file_path', 'results_file_path'],
+    InferenceStage.RESULT_ASSEMBLY: ['run_paths']
+}
+IN_MEMORY_STATE = ['annotations', 'pred_bboxes', 'results', 'runs']
+CHECKPOINTED_ATTRIBUTES = [
+    'path',
+    'start_datetime_timestamp',
+    'detection_duration',
+    'pose_estimation_duration',
+    'score_detection',
+    'score_pose_estimation',
+    'profile'
+]
 
 
 class Inference:
+    run_cache = RunCache(RUN_CACHE_MAX_BYTES)
+
     def __init__(self, metadata):
         self.id = metadata['id']
         self.name = metadata['name']
@@ -45,9 +78,10 @@ class Inference:
         self.score_pose_estimation = metadata['score_pose_estimation'] if 'score_pose_estimation' in metadata else None
         self.description = metadata['description']
         self.path = metadata['path'] if 'path' in metadata else None
-        self.runs = []
-
-        self.load_runs()
+        self.n_images = metadata['n_images'] if 'n_images' in metadata else None
+        self.profile = metadata['profile'] if 'profile' in metadata else None
+        self.run_paths = None
+        self.state = None
 
     def __str__(self):
         print_str = f'{self.name}'
@@ -58,47 +92,138 @@ class Inference:
         return print_str
 
     def infer(self, inference_progress, existing_dataset, dataset_type):
+        for _, stage in self.stages(inference_progress, existing_dataset, dataset_type):
+            stage()
+
+    def stages(self, inference_progress, existing_dataset, dataset_type):
+        # the stages of an inference in order, each stage continues from the state left by the previous one.
+        # completed stages are skipped if the inference is resumed with unchanged inputs
+        checkpoint = StageCheckpoint(os.path.join(INFERENCES_DIR, self.id), InferenceStage)
+        stage_inputs = self.get_stage_inputs(existing_dataset, dataset_type)
+
+        def checkpointed(stage, function):
+            def run():
+                inference_progress.set_stage(stage)
+                marker = checkpoint.get(stage, stage_inputs[stage])
+                if marker is not None:
+                    self.restore_stage(marker)
+                    return
+                function()
+                self.complete_stage(checkpoint, stage, stage_inputs[stage])
+            return run
+
+        def calculate_metrics():
+            inference_progress.set_stage(InferenceStage.METRICS)
+            self.calculate_metrics(inference_progress)
+
+        return [
+            (InferenceStage.DATA_STAGING, checkpointed(
+                InferenceStage.DATA_STAGING, lambda: self.stage_data(inference_progress, existing_dataset))),
+            (InferenceStage.DETECTION, checkpointed(
+                InferenceStage.DETECTION, lambda: self.detect(inference_progress, existing_dataset))),
+            (InferenceStage.POSE_ESTIMATION, checkpointed(
+                InferenceStage.POSE_ESTIMATION, lambda: self.estimate_poses(inference_progress))),
+            (InferenceStage.RESULT_ASSEMBLY, checkpointed(
+                InferenceStage.RESULT_ASSEMBLY, lambda: self.assemble_results(inference_progress, dataset_type))),
+            (InferenceStage.METRICS, calculate_metrics)
+        ]
+
+    def shared_stages(self, inference_progress, inference, existing_dataset, dataset_type):
+        # replaces data staging and detection by the results of another inference, see share_detection
+        checkpoint = StageCheckpoint(os.path.join(INFERENCES_DIR, self.id), InferenceStage)
+        stage_inputs = self.get_stage_inputs(existing_dataset, dataset_type)
+
+        def run():
+            inference_progress.set_stage(InferenceStage.DATA_STAGING)
+            marker = checkpoint.get(InferenceStage.DATA_STAGING, stage_inputs[InferenceStage.DATA_STAGING])
+            if marker is not None:
+                marker = checkpoint.get(InferenceStage.DETECTION, stage_inputs[InferenceStage.DETECTION])
+            if marker is not None:
+                self.restore_stage(marker)
+                return
+            self.share_detection(inference_progress, inference)
+            for stage in (InferenceStage.DATA_STAGING, InferenceStage.DETECTION):
+                self.complete_stage(checkpoint, stage, stage_inputs[stage])
+
+        return [(InferenceStage.DATA_STAGING, run)]
+
+    def get_stage_inputs(self, existing_dataset, dataset_type):
+        return {
+            InferenceStage.DATA_STAGING: {
+                'data': [int(data.id) for data in self.data],
+                'existing_dataset': existing_dataset,
+                'mmpose_config': self.mmpose_model.config
+            },
+            InferenceStage.DETECTION: {
+                'config': self.mmdetection_model.config,
+                'checkpoint': self.mmdetection_model.checkpoint,
+                'engine_mode': INFERENCE_ENGINE_MODE
+            },
+            InferenceStage.POSE_ESTIMATION: {
+                'config': self.mmpose_model.config,
+                'checkpoint': self.mmpose_model.checkpoint
+            },
+            InferenceStage.RESULT_ASSEMBLY: {
+                'dataset_type': str(dataset_type),
+                'interpolation_method': FEATURE_INTERPOLATION_METHOD,
+                'interpolation_max_gap': FEATURE_INTERPOLATION_MAX_GAP,
+                'run_format': FORMAT_VERSION
+            }
+        }
+
+    def complete_stage(self, checkpoint, stage, inputs):
+        outputs = []
+        for key in STAGE_OUTPUTS[stage]:
+            value = self.state.get(key)
+            if value is not None:
+                outputs += value if isinstance(value, list) else [value]
+        state = {key: value for key, value in self.state.items() if key not in IN_MEMORY_STATE}
+        attributes = {attribute: getattr(self, attribute) for attribute in CHECKPOINTED_ATTRIBUTES}
+        checkpoint.complete(stage, inputs, outputs, state, attributes)
+
+    def restore_stage(self, marker):
+        self.state = marker['state']
+        for attribute, value in marker['attributes'].items():
+            setattr(self, attribute, value)
+
+    def stage_data(self, inference_progress, existing_dataset):
         self.start_datetime_timestamp = datetime.timestamp(datetime.now())
 
         out_dir = os.path.join(INFERENCES_DIR, self.id)
-        os.mkdir(out_dir)
+        os.makedirs(out_dir, exist_ok=True)
         self.path = out_dir
 
-        mmdetection_result_dir = os.path.join(out_dir, 'mmdetection_result_dir')
-        os.mkdir(mmdetection_result_dir)
-
-        mmdetection_work_dir = os.path.join(out_dir, 'mmdetection_work_dir')
-        os.mkdir(mmdetection_work_dir)
-
-        mmdetection_config = self.mmdetection_model.config
-        mmdetection_checkpoint = self.mmdetection_model.checkpoint
-
-        mmpose_config = self.mmpose_model.config
-        mmpose_checkpoint = self.mmpose_model.checkpoint
-        multi_frame_mmpose029 = self.mmpose_model.multi_frame_mmpose029
-
-        if multi_frame_mmpose029:
-            data_mode = 'topdown'
-        else:
-            config_name = mmpose_config.split('/')[-1].split('.')[0]
-            config = imp.load_source(config_name, mmpose_config)
+        data_mode = self.get_data_mode()
 
-            data_mode = config.data_mode
-            assert data_mode == 'topdown' or data_mode == 'bottomup'
+        self.profile = {}
+        profiler = Profiler(self.profile)
+        profiler.start('data_prep')
 
+        staged_images = []
         if existing_dataset is None:
             dataset_dir = MMPOSE_DATASET_DIR + f'_{self.id}'
+            # leftovers of an interrupted run of this stage are staged again
+            if os.path.exists(dataset_dir):
+                shutil.rmtree(dataset_dir)
             os.mkdir(dataset_dir)
+            dataset_stager = DatasetStager(DATASET_STAGING_MODE)
             for i, data in enumerate(self.data):
-                inference_progress.value = f'DATA PREP. {i}/{len(self.data)}'
+                inference_progress.update('DATA PREP.', i, len(self.data))
                 images = data.get_images()
                 for image in images:
                     src = image
                     dst = os.path.join(dataset_dir, f"{data.id}_{image.split('/')[-1]}")
-                    shutil.copyfile(src, dst)
-
-            inference_progress.value = 'ANN. FILE CREATION'
-            image_infos = collect_image_infos(dataset_dir)
+                    dataset_stager.stage(src, dst)
+                    staged_images.append((src, dst))
+            dataset_stager.close()
+
+            profiler.start('annotation_creation')
+            inference_progress.update('ANN. FILE CREATION')
+            image_sizes = scan_image_sizes([src for src, _ in staged_images])
+            image_infos = []
+            for src, dst in staged_images:
+                width, height = image_sizes[src]
+                image_infos.append({'filename': dst, 'width': width, 'height': height})
             image_list_coco_format = cvt_to_coco_json(image_infos)
             ann_file = os.path.join(dataset_dir, 'ann_file.json')
 
@@ -107,11 +232,84 @@ class Inference:
         else:
             dataset_dir = existing_dataset
             ann_file = os.path.join(dataset_dir, 'ann_file.json')
+        profiler.stop()
+
+        self.state = {
+            'data_mode': data_mode,
+            'dataset_dir': dataset_dir,
+            'ann_file': ann_file,
+            'staged_images': staged_images,
+            'n_runs': len(self.data),
+            'n_images': len(glob.glob(os.path.join(dataset_dir, '*.png')))
+        }
+
+    def share_detection(self, inference_progress, inference):
+        # continues from the data staging and detection of another inference on the same data and detector
+        self.start_datetime_timestamp = datetime.timestamp(datetime.now())
+
+        out_dir = os.path.join(INFERENCES_DIR, self.id)
+        os.makedirs(out_dir, exist_ok=True)
+        self.path = out_dir
+
+        inference_progress.update(f'SHARING DETECTION {inference.id}')
+
+        mmdetection_result_dir = os.path.join(out_dir, 'mmdetection_result_dir')
+        os.makedirs(mmdetection_result_dir, exist_ok=True)
+        os.makedirs(os.path.join(out_dir, 'mmdetection_work_dir'), exist_ok=True)
+
+        results_json_file_path = os.path.join(mmdetection_result_dir, str(self.id) + '.bbox.json')
+        shutil.copyfile(inference.state['detection_file_path'], results_json_file_path)
+        detection_sidecar_path = None
+        if inference.state.get('detection_sidecar_path') is not None:
+            detection_sidecar_path = sidecar_path(results_json_file_path)
+            copy_sidecar(inference.state['detection_sidecar_path'], detection_sidecar_path)
+        self.detection_duration = (0, 0, 0)
+        self.profile = {}
+
+        self.state = {
+            'data_mode': self.get_data_mode(),
+            'dataset_dir': inference.state['dataset_dir'],
+            'ann_file': inference.state['ann_file'],
+            'staged_images': inference.state['staged_images'],
+            'n_runs': inference.state['n_runs'],
+            'n_images': inference.state['n_images'],
+            'streaming': False,
+            'detection_file_path': results_json_file_path,
+            'detection_sidecar_path': detection_sidecar_path
+        }
 
-        n_runs = len(self.data)
-        n_images = len(glob.glob(os.path.join(dataset_dir, '*.png')))
+    def get_data_mode(self):
+        if self.mmpose_model.multi_frame_mmpose029:
+            return 'topdown'
+
+        mmpose_config = self.mmpose_model.config
+        config_name = mmpose_config.split('/')[-1].split('.')[0]
+        config = imp.load_source(config_name, mmpose_config)
+
+        data_mode = config.data_mode
+        assert data_mode == 'topdown' or data_mode == 'bottomup'
+        return data_mode
+
+    def detect(self, inference_progress, existing_dataset):
+        out_dir = self.path
+        data_mode = self.state['data_mode']
+        ann_file = self.state['ann_file']
+        n_runs = self.state['n_runs']
+        n_images = self.state['n_images']
+
+        mmdetection_result_dir = os.path.join(out_dir, 'mmdetection_result_dir')
+        os.makedirs(mmdetection_result_dir, exist_ok=True)
+
+        mmdetection_work_dir = os.path.join(out_dir, 'mmdetection_work_dir')
+        os.makedirs(mmdetection_work_dir, exist_ok=True)
+
+        mmdetection_config = self.mmdetection_model.config
+        mmdetection_checkpoint = self.mmdetection_model.checkpoint
+
+        profiler = Profiler(self.profile)
 
         persistent_detection_found = False
+        detection_sidecar_path = None
         if existing_dataset is not None:
             dataset_properties = existing_dataset.split('/')[-1]
             dataset_properties = dataset_properties.replace('dataset_', '')
@@ -131,101 +329,196 @@ class Inference:
                 ann_file = os.path.join(existing_dataset, 'ann_file.json')
                 self.detection_duration = (0, 0, 0)
 
+                if RESULT_FORMAT == 'npy':
+                    profiler.start('json_postprocessing')
+                    detection_sidecar_path = sidecar_path(results_json_file_path)
+                    save_bboxes(detection_sidecar_path, load_bboxes(results_json_file_path))
+                    profiler.stop()
+
+        # in streaming mode detection and top-down pose estimation run in this process without result files in between
+        streaming = INFERENCE_ENGINE_MODE == 'streaming' and data_mode == 'topdown' and \
+            not self.mmpose_model.multi_frame_mmpose029 and not persistent_detection_found
+
         if not persistent_detection_found:
             mmdetection_outfile_prefix = os.path.join(mmdetection_result_dir, str(self.id))
             mmdetection_result_dump_file = os.path.join(mmdetection_result_dir,  str(self.id) + '.results.pkl')
-
-            inference_progress.value = 'BB. DETECTION STARTUP'
-
-            mmdetection_args = [
-                'python',
-                MMDETECTION_TEST_SCRIPT,
-                mmdetection_config,
-                mmdetection_checkpoint,
-                '--work-dir',
-                mmdetection_work_dir,
-                '--out',
-                mmdetection_result_dump_file,
-                '--cfg-options',
-                f'test_dataloader.dataset.ann_file={ann_file}',
-                f'test_evaluator.ann_file={ann_file}',
-                f'test_evaluator.outfile_prefix={mmdetection_outfile_prefix}'
-            ]
-
-            start = time.time()
-
-            detection = subprocess.Popen(
-                mmdetection_args,
-                cwd=MMDETECTION_DIR,
-                stdout=subprocess.PIPE,
-                bufsize=1,
-                universal_newlines=True
-            )
-
-            while True:
-                line = detection.stdout.readline()
-                if not line:
-                    print()
-                    break
-                line = line.rstrip()
-                if 'mmengine - INFO - Epoch(test)' in line:
-                    tracker = line[line.find('[') + 1: line.find(']')].split('/')
-                    progress_percentage = int(int(tracker[0])/int(tracker[1]) * 100)
-                    inference_progress.value = 'BB. DETECTION ' + f'{progress_percentage}%'
-
-            end = time.time()
-            duration = end - start
-            self.detection_duration = (duration / 60, duration / n_runs, duration / n_images)
             results_pickle_file_path = mmdetection_result_dump_file
             results_json_file_path = mmdetection_outfile_prefix + '.bbox.json'
 
-            inference_progress.value = 'REMOVING LOW SCORES'
-
-            with open(results_json_file_path, 'r', encoding='utf8') as results_file:
-                results = json.load(results_file)
-
-                image_ids = []
-                for result in results:
-                    image_ids.append(result['image_id'])
-
-                ids = set()
-                duplicate_ids = []
-                for id_ in image_ids:
-                    if id_ in ids:
-                        duplicate_ids.append(id_)
-                    else:
-                        ids.add(id_)
-
-                for id_ in duplicate_ids:
-                    duplicates = []
-                    for result in results:
-                        if result['image_id'] == id_:
-                            duplicates.append(result)
-                    duplicates = sorted(duplicates, key=lambda d: d['score'], reverse=True)
-                    for duplicate in duplicates[1:]:
-                        results.remove(duplicate)
-
-            with open(results_json_file_path, 'w', encoding='utf8') as results_file:
-                json.dump(results, results_file)
+            profiler.start('detection_cache')
+            inference_progress.update('BB. DETECTION CACHE')
+
+            with open(ann_file, 'r', encoding='utf8') as annotations_file:
+                annotations = json.load(annotations_file)
+            image_ids = [image['id'] for image in annotations['images']]
+
+            # frames of a new dataset are digested through their sources, whose digests are kept across inferences
+            sources = {dst: src for src, dst in self.state['staged_images']}
+            frame_digests = FileDigestIndex(FRAME_DIGEST_INDEX)
+            image_digests = {}
+            for image in annotations['images']:
+                image_digests[image['id']] = frame_digests.get(sources.get(image['file_name'], image['file_name']))
+            frame_digests.save()
+
+            detection_cache = DetectionCache(mmdetection_config, mmdetection_checkpoint)
+            bbox_reducer = BBoxReducer()
+            missing_images = []
+            for image in annotations['images']:
+                detection = detection_cache.get(image_digests[image['id']])
+                if detection is None:
+                    missing_images.append(image)
+                else:
+                    bbox_reducer.add({'image_id': image['id'], **detection})
+            n_cached = len(bbox_reducer)
+            self.state['detection_counts'] = {'cached': n_cached, 'images': n_images}
+            inference_progress.update('CACHED BB.', processed=n_cached, total=n_images)
+
+            if streaming:
+                profiler.start('detector_startup')
+                inference_progress.update('STREAMING STARTUP')
+
+                category_ids = [category['id'] for category in annotations['categories']]
+                streaming_pipeline = StreamingPipeline(mmdetection_config, mmdetection_checkpoint,
+                                                       self.mmpose_model.config, self.mmpose_model.checkpoint,
+                                                       category_ids)
+
+                profiler.stop()
+
+                cached_bboxes = dict(bbox_reducer.bboxes)
+                results = []
+                for i, (image_id, bbox, pose_estimation) in enumerate(
+                        streaming_pipeline.run(annotations['images'], cached_bboxes)):
+                    inference_progress.update('STREAMING', i + 1, n_images)
+                    if bbox is None:
+                        continue
+                    if image_id not in cached_bboxes:
+                        detection_cache.add(image_digests[image_id], bbox)
+                        bbox_reducer.add(bbox)
+                    results.append(pose_estimation)
+                detection_cache.save()
+
+                n_detected = len(missing_images)
+                detection_time = streaming_pipeline.detection_time
+                self.detection_duration = (detection_time / 60, detection_time / n_runs,
+                                           detection_time / n_detected if n_detected else 0)
+                pose_estimation_time = streaming_pipeline.pose_estimation_time
+                self.pose_estimation_duration = (pose_estimation_time / 60, pose_estimation_time / n_runs,
+                                                 pose_estimation_time / n_images)
+                profiler.add('detector_compute', detection_time)
+                profiler.add('pose_compute', pose_estimation_time)
+                mmpose_result_dir = os.path.join(out_dir, 'mmpose_result_dir')
+                os.makedirs(mmpose_result_dir, exist_ok=True)
+                streaming_results_file_path = os.path.join(mmpose_result_dir, str(self.id) + '.keypoints.json')
+                if RESULT_FORMAT == 'npy':
+                    streaming_results_file_path = sidecar_path(streaming_results_file_path)
+                    save_keypoints(streaming_results_file_path, results)
+                else:
+                    with open(streaming_results_file_path, 'w', encoding='utf8') as results_file:
+                        json.dump(results, results_file)
+
+                self.state['streaming_results_file_path'] = streaming_results_file_path
+                self.state['annotations'] = annotations
+                self.state['pred_bboxes'] = list(bbox_reducer.bboxes.values())
+                self.state['results'] = results
+            elif missing_images:
+                if n_cached:
+                    detection_ann_file = os.path.join(mmdetection_work_dir, 'ann_file.json')
+                    with open(detection_ann_file, 'w', encoding='utf8') as file:
+                        json.dump({**annotations, 'images': missing_images}, file)
+                else:
+                    detection_ann_file = ann_file
+
+                profiler.start('detector_startup')
+                inference_progress.update('BB. DETECTION STARTUP')
+
+                def on_detection_progress(i, n):
+                    if profiler.is_running('detector_startup'):
+                        profiler.start('detector_compute')
+                    inference_progress.update('BB. DETECTION', round(i / n * len(missing_images)), len(missing_images))
+
+                start = time.time()
+
+                run_test(
+                    MMDETECTION_TEST_SCRIPT,
+                    MMDETECTION_DIR,
+                    mmdetection_config,
+                    mmdetection_checkpoint,
+                    mmdetection_work_dir,
+                    {
+                        'test_dataloader.dataset.ann_file': detection_ann_file,
+                        'test_evaluator.ann_file': detection_ann_file,
+                        'test_evaluator.outfile_prefix': mmdetection_outfile_prefix
+                    },
+                    on_detection_progress,
+                    out=mmdetection_result_dump_file
+                )
+
+                end = time.time()
+                duration = end - start
+                self.detection_duration = (duration / 60, duration / n_runs, duration / len(missing_images))
+
+                profiler.start('json_postprocessing')
+                inference_progress.update('REMOVING LOW SCORES')
+
+                bbox_reducer.read(results_json_file_path)
+                for image in missing_images:
+                    bbox = bbox_reducer.bboxes.get(image['id'])
+                    if bbox is not None:
+                        detection_cache.add(image_digests[image['id']], bbox)
+                detection_cache.save()
+            else:
+                self.detection_duration = (0, 0, 0)
 
-            inference_progress.value = 'CALC. AVG. CONFIDENCE'
+            profiler.start('json_postprocessing')
+            bbox_reducer.write(results_json_file_path)
+            if RESULT_FORMAT == 'npy':
+                detection_sidecar_path = sidecar_path(results_json_file_path)
+                save_bboxes(detection_sidecar_path, list(bbox_reducer.bboxes.values()))
+
+            inference_progress.update('CALC. AVG. CONFIDENCE')
+
+            n_results = len(bbox_reducer)
+            missing_image_ids = bbox_reducer.missing(image_ids)
+            self.state['detection_counts'].update(
+                {'read': bbox_reducer.n_read, 'kept': n_results, 'without_detection': len(missing_image_ids)})
+            inference_progress.update('KEPT BB.', processed=n_results, total=bbox_reducer.n_read)
+            assert n_results == n_images, \
+                f'Missing detection for {n_images - n_results} images (image ids: {missing_image_ids}).'
+            profiler.stop()
+
+        self.state['ann_file'] = ann_file
+        self.state['streaming'] = streaming
+        self.state['detection_file_path'] = results_json_file_path
+        self.state['detection_sidecar_path'] = detection_sidecar_path
+
+    def estimate_poses(self, inference_progress):
+        out_dir = self.path
+        data_mode = self.state['data_mode']
+        dataset_dir = self.state['dataset_dir']
+        ann_file = self.state['ann_file']
+        n_runs = self.state['n_runs']
+        n_images = self.state['n_images']
+        results_json_file_path = self.state['detection_file_path']
 
-            with open(results_json_file_path, 'r', encoding='utf8') as results_file:
-                results = json.load(results_file)
-                n_results = len(results)
-                assert n_results == n_images, f'Missing detection for {n_images - n_results} images.'
+        mmpose_config = self.mmpose_model.config
+        mmpose_checkpoint = self.mmpose_model.checkpoint
 
         mmpose_result_dir = os.path.join(out_dir, 'mmpose_result_dir')
-        os.mkdir(mmpose_result_dir)
+        os.makedirs(mmpose_result_dir, exist_ok=True)
 
         mmpose_work_dir = os.path.join(out_dir, 'mmpose_work_dir')
-        os.mkdir(mmpose_work_dir)
+        os.makedirs(mmpose_work_dir, exist_ok=True)
 
         mmpose_outfile_prefix = os.path.join(mmpose_result_dir, str(self.id))
 
-        inference_progress.value = 'POSE EST. STARTUP'
+        profiler = Profiler(self.profile)
+        profiler.start('pose_startup')
+        inference_progress.update('POSE EST. STARTUP')
 
-        if multi_frame_mmpose029:
+        if self.state['streaming']:
+            bbox_file_path = results_json_file_path
+            results_json_file_path = self.state['streaming_results_file_path']
+        elif self.mmpose_model.multi_frame_mmpose029:
             mmpose_args = [
                 os.path.join(MMPOSE029_VENV_DIR, 'bin', 'python'),
                 MMPOSE029_INFERENCE_SCRIPT,
@@ -247,6 +540,7 @@ class Inference:
             shutil.copyfile(results_json_file_path, bbox_file_path)
             shutil.copyfile(mmpose_config, os.path.join(mmpose_work_dir, os.path.basename(mmpose_config)))
 
+            profiler.start('pose_compute')
             start = time.time()
 
             pose_estimation = subprocess.Popen(
@@ -257,7 +551,7 @@ class Inference:
                 universal_newlines=True
             )
 
-            inference_progress.value = 'POSE EST. v029'
+            inference_progress.update('POSE EST. v029')
             while True:
                 line = pose_estimation.stdout.readline()
                 if not line:
@@ -269,170 +563,85 @@ class Inference:
             self.pose_estimation_duration = (duration / 60, duration / n_runs, duration / n_images)
             results_json_file_path = mmpose_outfile_prefix + '.keypoints.json'
         else:
-            mmpose_args = [
-                'python',
-                MMPOSE_TEST_SCRIPT,
-                mmpose_config,
-                mmpose_checkpoint,
-                '--work-dir',
-                mmpose_work_dir,
-                '--cfg-options',
-                f'test_dataloader.dataset.ann_file={ann_file}',
-                f'test_evaluator.ann_file={ann_file}',
-                f'test_evaluator.outfile_prefix={mmpose_outfile_prefix}'
-            ]
+            cfg_options = {
+                'test_dataloader.dataset.ann_file': ann_file,
+                'test_evaluator.ann_file': ann_file,
+                'test_evaluator.outfile_prefix': mmpose_outfile_prefix
+            }
 
             bbox_file_path = os.path.join(mmpose_work_dir, 'bbox_file.json')
             shutil.copyfile(results_json_file_path, bbox_file_path)
 
             if data_mode == 'topdown':
-                mmpose_args.append(f'test_dataloader.dataset.bbox_file={bbox_file_path}')
+                cfg_options['test_dataloader.dataset.bbox_file'] = bbox_file_path
+
+            def on_pose_estimation_progress(i, n):
+                if profiler.is_running('pose_startup'):
+                    profiler.start('pose_compute')
+                inference_progress.update('POSE EST.', round(i / n * n_images), n_images)
 
             start = time.time()
 
-            pose_estimation = subprocess.Popen(
-                mmpose_args,
-                cwd=MMPOSE_DIR,
-                stdout=subprocess.PIPE,
-                bufsize=1,
-                universal_newlines=True
+            run_test(
+                MMPOSE_TEST_SCRIPT,
+                MMPOSE_DIR,
+                mmpose_config,
+                mmpose_checkpoint,
+                mmpose_work_dir,
+                cfg_options,
+                on_pose_estimation_progress
             )
 
-            while True:
-                line = pose_estimation.stdout.readline()
-                if not line:
-                    print()
-                    break
-                line = line.rstrip()
-                if 'mmengine - INFO - Epoch(test)' in line:
-                    tracker = line[line.find('[') + 1: line.find(']')].split('/')
-                    progress_percentage = int(int(tracker[0])/int(tracker[1]) * 100)
-                    inference_progress.value = 'POSE EST. ' + f'{progress_percentage}%'
-
             end = time.time()
             duration = end - start
             self.pose_estimation_duration = (duration / 60, duration / n_runs, duration / n_images)
             results_json_file_path = mmpose_outfile_prefix + '.keypoints.json'
 
-        with open(ann_file, 'r') as annotations_file:
-            annotations = json.load(annotations_file)
+        results_file_path = results_json_file_path
+        if RESULT_FORMAT == 'npy' and not self.state['streaming']:
+            # the results are parsed once here and read from the sidecar afterwards
+            profiler.start('json_postprocessing')
+            inference_progress.update('CONVERTING POSE EST.')
+            results_file_path = sidecar_path(results_json_file_path)
+            save_keypoints(results_file_path, iter_json_array(results_json_file_path))
+
+        profiler.stop()
+
+        self.state['bbox_file_path'] = bbox_file_path
+        self.state['results_file_path'] = results_file_path
+
+    def assemble_results(self, inference_progress, dataset_type):
+        profiler = Profiler(self.profile)
+        profiler.start('json_postprocessing')
+
+        # results held in memory are assembled from a buffer, results files are streamed if they are grouped by data
+        result_image_ids = None
+        if 'results' in self.state:
+            annotations = self.state.pop('annotations')
+            pred_bboxes = self.state.pop('pred_bboxes')
+            results = self.state.pop('results')
+        else:
+            with open(self.state['ann_file'], 'r') as annotations_file:
+                annotations = json.load(annotations_file)
 
-        with open(bbox_file_path, 'r') as bbox_file:
-            pred_bboxes = json.load(bbox_file)
+            pred_bboxes = load_bboxes(self.state.get('detection_sidecar_path') or self.state['bbox_file_path'])
+            results = iter_keypoints(self.state['results_file_path'])
+            result_image_ids = load_image_ids(self.state['results_file_path'])
 
-        with open(results_json_file_path, 'r') as results_file:
-            results = json.load(results_file)
+        profiler.start('result_assembly')
+        assembler = ResultAssembler(annotations, pred_bboxes, results, dataset_type, self.state['data_mode'],
+                                    result_image_ids=result_image_ids)
 
         n_data = len(self.data)
         runs = []
         for i, data in enumerate(self.data):
 
-            progress_percentage = int(((i + 1)/n_data) * 100)
-            inference_progress.value = 'PREP. INFER RES. ' + f'{progress_percentage}%'
-
-            images = data.get_images()
-            bboxes = []
-            bboxes_bottomup = []
-            ious = []
-            detection_scores = []
-            pose_estimation_scores = []
-            features = []
-            dataset_keypoints = dataset_type.keypoints
-            n_keypoints = len(dataset_keypoints)
-            for keypoint in dataset_keypoints:
-                features.append(Feature(name=keypoint, fps=data.fps))
-            for step, image in enumerate(images):
-                image_filename = str(data.id) + '_' + image.split('/')[-1]
-                for dataset_image in annotations['images']:
-                    if dataset_image['file_name'].split('/')[-1] == image_filename:
-                        image_id = dataset_image['id']
-
-                pred_bbox = None
-                for bbox in pred_bboxes:
-                    if bbox['image_id'] == image_id:
-                        pred_bbox = bbox
-
-                if data_mode == 'topdown':
-                    result = next(result for result in results if result['image_id'] == image_id)
-                    keypoints = result['keypoints']
-                    x_coord = keypoints[0:: 3]
-                    y_coord = keypoints[1:: 3]
-                    keypoint_scores = keypoints[2::3]
-
-                    keypoint_scores_for_image_mean = keypoints[17::3]
-                    score = mean(keypoint_scores_for_image_mean)
-                    result['score'] = score
-
-                    for i, (x, y, s) in enumerate(zip(x_coord, y_coord, keypoint_scores)):
-                        features[i * 2].add(step, x, s)
-                        features[i * 2 + 1].add(step, y, s)
-
-                if data_mode == 'bottomup':
-                    x = int(pred_bbox['bbox'][0])
-                    y = int(pred_bbox['bbox'][1])
-                    w = int(pred_bbox['bbox'][2])
-                    h = int(pred_bbox['bbox'][3])
-                    pred_bbox_xyxy = [x, y, x + w, y + h]
-                    pred_bbox_tensor = torch.FloatTensor(pred_bbox_xyxy)
-                    pred_bbox_tensor = pred_bbox_tensor.unsqueeze(0)
-
-                    poses = []
-                    for result in results:
-                        if result['image_id'] == image_id:
-                            poses.append(result)
-
-                    preds = []
-                    for pose in poses:
-                        keypoints = pose['keypoints']
-                        x_coord = keypoints[0::3]
-                        y_coord = keypoints[1::3]
-                        keypoint_scores = keypoints[2::3]
-
-                        keypoint_scores_for_image_mean = keypoints[17::3]
-                        score = mean(keypoint_scores_for_image_mean)
-
-                        bbox = [int(min(x_coord)), int(min(y_coord)), int(max(x_coord)), int(max(y_coord))]
-                        bbox_tensor = torch.FloatTensor(bbox)
-                        bbox_tensor = bbox_tensor.unsqueeze(0)
-
-                        iou = box_iou(pred_bbox_tensor, bbox_tensor)
-                        if iou > 0.3:
-                            preds.append({
-                                'iou': iou.item(),
-                                'bbox': bbox,
-                                'x_coord': x_coord,
-                                'y_coord': y_coord,
-                                'keypoint_scores': keypoint_scores,
-                                'score': score
-                            })
-
-                    preds = sorted(preds, key=lambda d: d['score'], reverse=True)
-
-                    if not preds:
-                        preds.append({
-                            'iou': -1,
-                            'bbox': -1,
-                            'x_coord': [-1 for i in range(int((n_keypoints - 4) / 2))],
-                            'y_coord': [-1 for i in range(int((n_keypoints - 4) / 2))],
-                            'keypoint_scores': [-1 for i in range(int((n_keypoints - 4) / 2))],
-                            'score': -1
-                        })
-
-                    result = preds[0]
-                    x_coord = result['x_coord']
-                    y_coord = result['y_coord']
-                    keypoint_scores = result['keypoint_scores']
-                    for i, (x, y, s) in enumerate(zip(x_coord, y_coord, keypoint_scores)):
-                        features[i * 2].add(step, x, s)
-                        features[i * 2 + 1].add(step, y, s)
-
-                bboxes.append(pred_bbox['bbox'])
-                detection_scores.append(pred_bbox['score'])
-                pose_estimation_scores.append(result['score'])
-
-                if data_mode == 'bottomup':
-                    bboxes_bottomup.append(result['bbox'])
-                    ious.append(result['iou'])
+            inference_progress.update('PREP. INFER RES.', i + 1, n_data)
+
+            run = assembler.assemble(data)
+            features = run['features']
+            detection_scores = run['detection_scores']
+            pose_estimation_scores = run['pose_estimation_scores']
 
             detection_scores_for_inference_mean = [score for score in detection_scores if score != -1]
             self.score_detection = mean(detection_scores_for_inference_mean)
@@ -440,82 +649,62 @@ class Inference:
             pose_estimation_scores_for_inference_mean = [score for score in pose_estimation_scores if score != -1]
             self.score_pose_estimation = mean(pose_estimation_scores_for_inference_mean)
 
-            self.interpolate_keypoint(features,
-                                      KeypointsInterpolation.NECK,
-                                      KeypointsInterpolation.LEFT_SHOULDER,
-                                      KeypointsInterpolation.RIGHT_SHOULDER)
-            self.interpolate_keypoint(features,
-                                      KeypointsInterpolation.HEAD,
-                                      KeypointsInterpolation.LEFT_EAR,
-                                      KeypointsInterpolation.RIGHT_EAR)
-
-            for feature in features:
-                feature.interpolate_values()
-
-            run_id = data.id
-            run_path = os.path.join(self.path, f'run_{str(run_id).zfill(3)}.pkl')
-            runs.append({
-                'id': run_id,
-                'path': run_path,
-                'data': data,
-                'features': features,
-                'bboxes': bboxes,
-                'bboxes_bottomup': bboxes_bottomup,
-                'ious': ious,
-                'detection_scores': detection_scores,
-                'pose_estimation_scores': pose_estimation_scores
-            })
-
-        inference_progress.value = 'CALC. METRICS'
+            derive_keypoints(features)
 
-        inference_metrics = InferenceMetrics()
-        for run in runs:
-            for feature in run['features']:
-                inference_metrics.add_feature(feature)
-        inference_metrics.calculate()
-
-        for run in runs:
-            run['metrics'] = RunMetrics(run['features']).calculate().copy()
+            interpolate_features(features, FEATURE_INTERPOLATION_METHOD, FEATURE_INTERPOLATION_MAX_GAP)
 
-        inference_progress.value = 'SAVING INFER RES. '
-        for run in runs:
+            # the assembled runs are saved without metrics, which are added once they are calculated
             new_run = Run(
                 run['id'],
-                run['path'],
+                os.path.join(self.path, f'run_{str(run["id"]).zfill(3)}'),
                 run['data'],
-                run['features'],
+                features,
                 run['bboxes'],
                 run['bboxes_bottomup'],
                 run['ious'],
-                run['detection_scores'],
-                run['pose_estimation_scores'],
-                run['metrics'])
-            new_run.save(run['path'])
+                detection_scores,
+                pose_estimation_scores,
+                None)
+            save_run(new_run, new_run.path)
+            runs.append(new_run)
+        profiler.stop()
+
+        self.state['runs'] = runs
+        self.state['run_paths'] = [run.path for run in runs]
+
+    def calculate_metrics(self, inference_progress):
+        if 'runs' in self.state:
+            runs = self.state.pop('runs')
+        else:
+            runs = [load_run(run_path) for run_path in self.state['run_paths']]
 
+        profiler = Profiler(self.profile)
+        profiler.start('metrics')
+        inference_progress.update('CALC. METRICS')
+
+        inference_metrics = InferenceMetrics()
+        for run in runs:
+            for feature in run.features:
+                inference_metrics.add_feature(feature)
+        inference_metrics.calculate()
+
+        run_metrics = [RunMetrics(run.features).calculate().copy() for run in runs]
+
+        profiler.start('saving')
+        inference_progress.update('SAVING INFER RES.')
+        for run, metrics in zip(runs, run_metrics):
+            save_metrics(run.path, run.features, metrics, StandardMetrics.highpass_zeroing_threshold)
+
+        profiler.stop()
+
+        self.n_images = self.state['n_images']
         self.end_datetime_timestamp = datetime.timestamp(datetime.now())
-        self.store_metadata(out_dir)
+        self.store_metadata(self.path)
         self.load_runs()
 
-        inference_progress.value = 'DONE'
-
-    def interpolate_keypoint(self, features, target, source_1, source_2):
-        s1_x_f = next(f for f in features if f.name == source_1.value + '_x')
-        s1_y_f = next(f for f in features if f.name == source_1.value + '_y')
-        s2_x_f = next(f for f in features if f.name == source_2.value + '_x')
-        s2_y_f = next(f for f in features if f.name == source_2.value + '_y')
-        t_x_f = next(f for f in features if f.name == target.value + '_x')
-        t_y_f = next(f for f in features if f.name == target.value + '_y')
-        for s, (s1_x, s1_y, s2_x, s2_y) in enumerate(zip(s1_x_f.values, s1_y_f.values, s2_x_f.values, s2_y_f.values)):
-            if -1 in (s1_x, s1_y, s2_x, s2_y):
-                t_x_f.add(s, -1, -1)
-                t_y_f.add(s, -1, -1)
-                continue
-            x1 = min(s1_x, s2_x)
-            y1 = min(s1_y, s2_y)
-            x2 = max(s1_x, s2_x)
-            y2 = max(s1_y, s2_y)
-            t_x_f.add(s, x1 + (x2 - x1) / 2, -1)
-            t_y_f.add(s, y1 + (y2 - y1) / 2, -1)
+        remove_job(self.path)
+
+        inference_progress.set_state('DONE')
 
     def store_metadata(self, out_dir):
         metadata_file = open(os.path.join(out_dir, 'metadata.json'), 'w', encoding='utf8')
@@ -533,6 +722,8 @@ class Inference:
             'data': [int(d.id) for d in self.data],
             'detection_duration': self.detection_duration,
             'pose_estimation_duration': self.pose_estimation_duration,
+            'n_images': self.n_images,
+            'profile': self.profile,
             'score_detection': self.score_detection,
             'score_pose_estimation': self.score_pose_estimation,
             'description': self.description,
@@ -541,16 +732,23 @@ class Inference:
         json.dump(metadata, metadata_file)
 
     def load_runs(self):
-        runs = sorted(glob.glob(os.path.join(INFERENCES_DIR, self.id, '*.pkl')))
-        if not runs:
-            self.runs = []
-        else:
-            self.runs.clear()
-            for run in runs:
-                self.runs.append(Run.load(run))
+        # runs are only listed here, their data is loaded on first access through the run cache
+        inference_dir = os.path.join(INFERENCES_DIR, self.id)
+        Inference.run_cache.discard(inference_dir)
+        self.run_paths = {}
+        for run_path in find_runs(inference_dir):
+            run_id = int(os.path.splitext(os.path.basename(run_path))[0].split('_')[-1])
+            self.run_paths[run_id] = run_path
+
+    @property
+    def runs(self):
+        if self.run_paths is None:
+            self.load_runs()
+        return [Inference.run_cache.get(run_path) for run_path in self.run_paths.values()]
 
     def get_run(self, id_):
-        for run in self.runs:
-            if run.id == id_:
-                return run
-        return None
+        if self.run_paths is None:
+            self.load_runs()
+        if id_ not in self.run_paths:
+            return None
+        return Inference.run_cache.get(self.run_paths[id_])
@@ -0,0 +1,99 @@
+import os
+import json
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from common import INFERENCES_DIR
+from engine.atomic_file import replace_json
+
+
+class InferenceCatalog():
+    # persistent index of all inference metadata, keyed by inference id and the mtime of its metadata.json
+    def __init__(self, inferences_dir=INFERENCES_DIR, max_workers=8):
+        self.inferences_dir = inferences_dir
+        self.index_path = os.path.join(inferences_dir, 'catalog.json')
+        self.max_workers = max_workers
+        self.entries = {}
+        self.lock = Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf8') as index_file:
+                self.entries = json.load(index_file)
+        except (OSError, json.JSONDecodeError):
+            self.entries = {}
+
+    def save(self):
+        # the gui and the batch and sweep processes all refresh the catalog, each writes through its own temp file
+        os.makedirs(self.inferences_dir, exist_ok=True)
+        replace_json(self.index_path, self.entries)
+
+    def refresh(self):
+        # a fresh checkout has no inferences directory yet, which is an empty catalog
+        mtimes = {}
+        if not os.path.isdir(self.inferences_dir):
+            with self.lock:
+                removed = list(self.entries)
+                self.entries = {}
+            return [], removed
+
+        for entry in os.scandir(self.inferences_dir):
+            if entry.is_dir():
+                mtime = self._get_mtime(entry.name)
+                if mtime is not None:
+                    mtimes[entry.name] = mtime
+
+        with self.lock:
+            removed = [id_ for id_ in self.entries if id_ not in mtimes]
+            changed = [id_ for id_, mtime in mtimes.items()
+                       if id_ not in self.entries or self.entries[id_]['mtime'] != mtime]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            metadata = list(executor.map(self._read_metadata, changed))
+
+        with self.lock:
+            for id_ in removed:
+                del self.entries[id_]
+            for id_, metadata_ in zip(changed, metadata):
+                if metadata_ is not None:
+                    self.entries[id_] = {'mtime': mtimes[id_], 'metadata': metadata_}
+            if removed or changed:
+                self.save()
+
+        return [id_ for id_ in changed if id_ in self.entries], removed
+
+    def update(self, id_):
+        mtime = self._get_mtime(id_)
+        metadata = self._read_metadata(id_) if mtime is not None else None
+        with self.lock:
+            if metadata is None:
+                self.entries.pop(id_, None)
+            else:
+                self.entries[id_] = {'mtime': mtime, 'metadata': metadata}
+            self.save()
+        return metadata
+
+    def get_metadata(self, id_):
+        with self.lock:
+            entry = self.entries.get(id_)
+        return entry['metadata'] if entry is not None else None
+
+    def ids(self):
+        with self.lock:
+            return list(self.entries)
+
+    def _get_mtime(self, id_):
+        try:
+            return os.stat(os.path.join(self.inferences_dir, id_, 'metadata.json')).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _read_metadata(self, id_):
+        try:
+            with open(os.path.join(self.inferences_dir, id_, 'metadata.json'), 'r', encoding='utf8') as metadata_file:
+                return json.load(metadata_file)
+        except (OSError, json.JSONDecodeError):
+            return None
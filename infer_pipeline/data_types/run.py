@@ -1,5 +1,7 @@
 import pickle
 
+import numpy as np
+
 
 class Run:
     def __init__(
@@ -24,6 +26,46 @@ class Run:
         self.detection_scores = detection_scores
         self.pose_estimation_scores = pose_estimation_scores
         self.metrics = metrics
+        # called with the lists, copies and metrics built from the columns on access, e.g. by the run cache
+        self.on_materialize = None
+        self.index_features()
+
+    def index_features(self):
+        # name -> feature and keypoint -> (feature x, feature y), has to be called again if features are replaced
+        self.features_by_name = {feature.name: feature for feature in self.features}
+        self.keypoint_features = {}
+        for feature in self.features:
+            keypoint_name = feature.name[:-2]
+            if feature.name.endswith('_x') and keypoint_name + '_y' in self.features_by_name:
+                self.keypoint_features[keypoint_name] = (feature, self.features_by_name[keypoint_name + '_y'])
+        self.keypoint_indices = {keypoint_name: i for i, keypoint_name in enumerate(self.keypoint_features)}
+        self._keypoint_coordinates = None
+
+    def keypoint_coordinates(self, step):
+        # (K, 2) array of the x and y values of the keypoints at a step, in the order of keypoint_indices
+        if self._keypoint_coordinates is None:
+            self._keypoint_coordinates = np.stack(
+                [np.stack([feature_x.array('values'), feature_y.array('values')], axis=1)
+                 for feature_x, feature_y in self.keypoint_features.values()], axis=1)
+            self._materialized(self._keypoint_coordinates)
+        return self._keypoint_coordinates[step]
+
+    def _materialized(self, obj):
+        if self.on_materialize is not None:
+            self.on_materialize(obj)
+
+    def __getstate__(self):
+        # the index is rebuilt on load, so runs pickled before it existed are indexed as well
+        state = self.__dict__.copy()
+        for key in ('features_by_name', 'keypoint_features', 'keypoint_indices', '_keypoint_coordinates',
+                    'on_materialize'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.on_materialize = None
+        self.__dict__.update(state)
+        self.index_features()
 
     @classmethod
     def load(cls, filename):
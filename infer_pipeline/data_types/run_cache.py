@@ -0,0 +1,89 @@
+import sys
+from threading import Lock
+from collections import OrderedDict
+
+import numpy as np
+
+from data_types.columnar_run import load_run
+
+
+class RunCache():
+    # the size of a run is measured when it is loaded. its metrics and the lists of its features are only built once
+    # they are accessed, the run reports them through on_materialize and their size is added then
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.runs = OrderedDict()
+        self.n_bytes = 0
+        self.lock = Lock()
+
+    def get(self, path):
+        with self.lock:
+            if path in self.runs:
+                self.runs.move_to_end(path)
+                return self.runs[path][0]
+
+        run = load_run(path)
+        size = self.get_size(run)
+
+        with self.lock:
+            if path not in self.runs:
+                run.on_materialize = lambda obj: self.add_materialized(path, obj)
+                self.runs[path] = (run, size)
+                self.n_bytes += size
+                self.evict()
+            return self.runs[path][0]
+
+    def add_materialized(self, path, obj):
+        with self.lock:
+            if path not in self.runs:
+                return
+            run, size = self.runs[path]
+            # the features of the run are counted already, e.g. the features referenced by its metrics
+            obj_size = _object_size(obj, {id(feature) for feature in run.features})
+            self.runs[path] = (run, size + obj_size)
+            self.n_bytes += obj_size
+            self.evict()
+
+    def evict(self):
+        # the most recently used run is kept even if it exceeds the budget on its own
+        while self.n_bytes > self.max_bytes and len(self.runs) > 1:
+            _, (run, size) = self.runs.popitem(last=False)
+            run.on_materialize = None
+            self.n_bytes -= size
+
+    def discard(self, prefix):
+        with self.lock:
+            for path in [path for path in self.runs if path.startswith(prefix)]:
+                run, size = self.runs.pop(path)
+                run.on_materialize = None
+                self.n_bytes -= size
+
+    @classmethod
+    def get_size(cls, run):
+        # estimated memory of a loaded run: the bytes of its arrays, including the memory-mapped columns, and the
+        # python objects of its lists and calculated metrics
+        return _object_size(run, set())
+
+
+def _object_size(obj, seen):
+    if id(obj) in seen or obj is None or isinstance(obj, (type, bool, int, float, str, bytes)):
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (list, tuple, set)):
+        size = sys.getsizeof(obj)
+        if obj and isinstance(next(iter(obj)), (int, float)):
+            # lists of numbers are estimated from their first element
+            return size + len(obj) * sys.getsizeof(next(iter(obj)))
+        return size + sum(_object_size(item, seen) for item in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_object_size(value, seen) for value in obj.values())
+
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += _object_size(vars(obj), seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        size += _object_size(getattr(obj, slot, None), seen)
+    return size
@@ -0,0 +1,53 @@
+import os
+import json
+import fcntl
+import tempfile
+from threading import Lock
+from contextlib import contextmanager
+
+_path_locks = {}
+_path_locks_lock = Lock()
+
+
+@contextmanager
+def path_lock(path):
+    # held around read-merge-writes of a shared file. the gui and the batch and sweep clis run in separate processes,
+    # so besides a lock for the threads of this process an flock is taken on <path>.lock
+    with _path_locks_lock:
+        lock = _path_locks.setdefault(os.path.abspath(path), Lock())
+    with lock, open(path + '.lock', 'a', encoding='utf8') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def temp_path(path):
+    # a new empty file next to path with a name unique across processes and threads
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    os.close(fd)
+    return tmp_path
+
+
+def replace_json(path, data):
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, 'w', encoding='utf8') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf8') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return default
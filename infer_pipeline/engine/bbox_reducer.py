@@ -0,0 +1,32 @@
+import json
+
+from engine.json_stream import iter_json_array
+
+
+class BBoxReducer():
+    def __init__(self):
+        self.bboxes = {}
+        self.n_read = 0
+
+    def add(self, bbox):
+        self.n_read += 1
+        image_id = bbox['image_id']
+        best_bbox = self.bboxes.get(image_id)
+        # on equal scores the first detection is kept
+        if best_bbox is None or bbox['score'] > best_bbox['score']:
+            self.bboxes[image_id] = bbox
+
+    def read(self, path):
+        for bbox in iter_json_array(path):
+            self.add(bbox)
+        return self
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf8') as file:
+            json.dump(list(self.bboxes.values()), file)
+
+    def missing(self, image_ids):
+        return [image_id for image_id in image_ids if image_id not in self.bboxes]
+
+    def __len__(self):
+        return len(self.bboxes)
@@ -0,0 +1,73 @@
+import os
+import fcntl
+import shutil
+
+from common import FRAME_STORE_DIR, FRAME_DIGEST_INDEX
+from engine.file_digest import FileDigestIndex
+from engine.atomic_file import temp_path
+
+STAGING_MODES = ('hardlink', 'reflink', 'symlink', 'copy')
+FICLONE = 0x40049409
+
+
+class DatasetStager():
+    # stages frames into a dataset directory without duplicating their data where the filesystem allows it:
+    # hardlink: link the source, or a content-addressed copy of it in the frame store if the source is on another filesystem
+    # reflink: copy-on-write clone of the source, symlink: symbolic link to the source, copy: plain copy
+    def __init__(self, mode='hardlink', store_dir=FRAME_STORE_DIR):
+        assert mode in STAGING_MODES, f'Unknown staging mode {mode}.'
+        self.mode = mode
+        self.store_dir = store_dir
+        self.digests = FileDigestIndex(FRAME_DIGEST_INDEX if store_dir == FRAME_STORE_DIR else os.path.join(store_dir, 'index.json'))
+        self.counts = {mode: 0 for mode in STAGING_MODES}
+
+    def stage(self, src, dst):
+        match self.mode:
+            case 'hardlink':
+                if self._hardlink(src, dst) or self._hardlink(self._store(src), dst):
+                    self.counts['hardlink'] += 1
+                    return
+            case 'reflink':
+                if self._reflink(src, dst):
+                    self.counts['reflink'] += 1
+                    return
+            case 'symlink':
+                os.symlink(os.path.abspath(src), dst)
+                self.counts['symlink'] += 1
+                return
+
+        shutil.copyfile(src, dst)
+        self.counts['copy'] += 1
+
+    def close(self):
+        self.digests.save()
+
+    def _store(self, src):
+        digest = self.digests.get(src)
+        stored = os.path.join(self.store_dir, digest[:2], digest + os.path.splitext(src)[1])
+        if not os.path.exists(stored):
+            os.makedirs(os.path.dirname(stored), exist_ok=True)
+            tmp_stored = temp_path(stored)
+            if not self._reflink(src, tmp_stored):
+                shutil.copyfile(src, tmp_stored)
+            os.replace(tmp_stored, stored)
+        return stored
+
+    @classmethod
+    def _hardlink(cls, src, dst):
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            return False
+
+    @classmethod
+    def _reflink(cls, src, dst):
+        try:
+            with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            return True
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+            return False
@@ -0,0 +1,49 @@
+import numpy as np
+
+from data_types.feature import Feature
+from manager.dataset_manager import KeypointsInterpolation
+
+
+class DerivedKeypoint():
+    # a keypoint at the weighted mean of other keypoints, missing wherever one of its sources is missing
+    def __init__(self, target, sources, weights=None):
+        self.target = target
+        self.sources = sources
+        self.weights = np.asarray(weights if weights is not None else [1] * len(sources), dtype=np.float64)
+        self.weights = self.weights / self.weights.sum()
+
+
+# derived keypoints are calculated in order, so a derived keypoint can be the source of a later one
+DERIVED_KEYPOINTS = [
+    DerivedKeypoint(KeypointsInterpolation.NECK,
+                    [KeypointsInterpolation.LEFT_SHOULDER, KeypointsInterpolation.RIGHT_SHOULDER]),
+    DerivedKeypoint(KeypointsInterpolation.HEAD,
+                    [KeypointsInterpolation.LEFT_EAR, KeypointsInterpolation.RIGHT_EAR])
+]
+
+
+def derive_keypoints(features, derived_keypoints=None):
+    # the target features are replaced, or added if the dataset has no such keypoint. their scores are -1
+    features_by_name = {feature.name: feature for feature in features}
+    for derived_keypoint in derived_keypoints or DERIVED_KEYPOINTS:
+        source_features = [(features_by_name[source.value + '_x'], features_by_name[source.value + '_y'])
+                           for source in derived_keypoint.sources]
+        x = np.array([x_feature.array('values') for x_feature, _ in source_features], dtype=np.float64)
+        y = np.array([y_feature.array('values') for _, y_feature in source_features], dtype=np.float64)
+        missing = np.any((x == -1) | (y == -1), axis=0)
+
+        target_x = np.where(missing, -1, derived_keypoint.weights @ x)
+        target_y = np.where(missing, -1, derived_keypoint.weights @ y)
+
+        steps = source_features[0][0].array('steps')
+        fps = source_features[0][0].fps
+        for suffix, values in (('_x', target_x), ('_y', target_y)):
+            name = derived_keypoint.target.value + suffix
+            target_feature = features_by_name.get(name)
+            if target_feature is None:
+                target_feature = Feature(name=name, fps=fps)
+                features.append(target_feature)
+                features_by_name[name] = target_feature
+            target_feature.set_array('steps', steps)
+            target_feature.set_array('values', values)
+            target_feature.set_array('scores', np.full(len(steps), -1))
@@ -0,0 +1,38 @@
+import os
+import hashlib
+
+from common import DETECTION_CACHE_DIR
+from engine.file_digest import FileDigestIndex
+from engine.atomic_file import path_lock, replace_json, read_json
+
+
+class DetectionCache():
+    # best detection per frame, keyed by the frame's content digest, one store per detector (config and checkpoint)
+    def __init__(self, config, checkpoint, cache_dir=DETECTION_CACHE_DIR):
+        digests = FileDigestIndex(os.path.join(cache_dir, 'file_digests.json'))
+        detector_digest = hashlib.sha1((digests.get(config) + digests.get(checkpoint)).encode()).hexdigest()
+        digests.save()
+
+        self.path = os.path.join(cache_dir, detector_digest + '.json')
+        self.detections = read_json(self.path, {})
+        self.new_detections = {}
+
+    def get(self, image_digest):
+        return self.detections.get(image_digest)
+
+    def add(self, image_digest, bbox):
+        detection = {key: value for key, value in bbox.items() if key != 'image_id'}
+        self.detections[image_digest] = detection
+        self.new_detections[image_digest] = detection
+
+    def save(self):
+        if not self.new_detections:
+            return
+        # detections stored by concurrent inferences in the meantime are kept
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with path_lock(self.path):
+            detections = read_json(self.path, {})
+            detections.update(self.new_detections)
+            replace_json(self.path, detections)
+        self.detections = detections
+        self.new_detections = {}
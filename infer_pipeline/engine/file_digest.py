@@ -0,0 +1,42 @@
+import os
+import hashlib
+
+from engine.atomic_file import path_lock, replace_json, read_json
+
+
+class FileDigestIndex():
+    # sha1 digests of files, cached per path and only recomputed if size or mtime change
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.index = None
+        self.new_entries = {}
+
+    def get(self, path):
+        if self.index is None:
+            self.index = read_json(self.index_path, {})
+
+        stat = os.stat(path)
+        entry = self.index.get(path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            return entry[2]
+
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(2 ** 20), b''):
+                sha1.update(chunk)
+        digest = sha1.hexdigest()
+        self.index[path] = [stat.st_size, stat.st_mtime, digest]
+        self.new_entries[path] = self.index[path]
+        return digest
+
+    def save(self):
+        if not self.new_entries:
+            return
+        # digests stored by concurrent jobs in the meantime are kept
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        with path_lock(self.index_path):
+            index = read_json(self.index_path, {})
+            index.update(self.new_entries)
+            replace_json(self.index_path, index)
+        self.index = index
+        self.new_entries = {}
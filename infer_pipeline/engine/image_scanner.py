@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from engine.atomic_file import path_lock, replace_json, read_json
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def read_image_size(path):
+    # reads width and height from the png IHDR chunk, other formats are opened with PIL
+    with open(path, 'rb') as file:
+        header = file.read(24)
+    if header[:8] == PNG_SIGNATURE and header[12:16] == b'IHDR':
+        return int.from_bytes(header[16:20], 'big'), int.from_bytes(header[20:24], 'big')
+    with Image.open(path) as image:
+        return image.width, image.height
+
+
+class ImageSizeIndex():
+    # sidecar index next to a run folder: filename -> (size, mtime, width, height)
+    def __init__(self, run_dir):
+        run_dir = run_dir.rstrip('/')
+        self.path = os.path.join(os.path.dirname(run_dir), f'.{os.path.basename(run_dir)}.image_sizes.json')
+        self.entries = read_json(self.path, {})
+        self.new_entries = {}
+
+    def get(self, filename, stat):
+        entry = self.entries.get(filename)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2], entry[3]
+        return None
+
+    def set(self, filename, stat, size):
+        self.entries[filename] = [stat.st_size, stat.st_mtime_ns, size[0], size[1]]
+        self.new_entries[filename] = self.entries[filename]
+
+    def save(self):
+        if not self.new_entries:
+            return
+        # entries stored by concurrent jobs in the meantime are kept
+        with path_lock(self.path):
+            entries = read_json(self.path, {})
+            entries.update(self.new_entries)
+            replace_json(self.path, entries)
+        self.entries = entries
+        self.new_entries = {}
+
+
+def scan_image_sizes(image_paths, max_workers=16):
+    # returns {image path: (width, height)}, only images that are not in their run folder's index are read
+    indices = {}
+    sizes = {}
+    missing = []
+    for image_path in image_paths:
+        run_dir, filename = os.path.split(image_path)
+        if run_dir not in indices:
+            indices[run_dir] = ImageSizeIndex(run_dir)
+        stat = os.stat(image_path)
+        size = indices[run_dir].get(filename, stat)
+        if size is None:
+            missing.append((image_path, stat))
+        else:
+            sizes[image_path] = size
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        missing_sizes = executor.map(read_image_size, [image_path for image_path, _ in missing])
+        for (image_path, stat), size in zip(missing, missing_sizes):
+            run_dir, filename = os.path.split(image_path)
+            indices[run_dir].set(filename, stat, size)
+            sizes[image_path] = size
+
+    for index in indices.values():
+        index.save()
+
+    return sizes
@@ -0,0 +1,57 @@
+import json
+
+
+def iter_json_array(path, chunk_size=2 ** 20):
+    # yields the elements of a top-level json array without loading the whole file
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf8') as file:
+        buffer = ''
+        started = False
+        eof = False
+        while not eof:
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            pos = 0
+
+            if not started:
+                pos = _skip(buffer, pos, ' \t\r\n')
+                if pos == len(buffer):
+                    continue
+                if buffer[pos] != '[':
+                    raise ValueError(f'{path} does not contain a json array.')
+                started = True
+                pos += 1
+
+            while True:
+                pos = _skip(buffer, pos, ' \t\r\n,')
+                if pos == len(buffer):
+                    break
+                if buffer[pos] == ']':
+                    return
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    break
+                # an element touching the end of the buffer might be truncated, and a number followed by anything but
+                # a delimiter was cut at the end of a chunk, e.g. 12 | 3.5
+                if end < len(buffer) and buffer[end] not in ' \t\r\n,]':
+                    if eof:
+                        raise ValueError(f'{path} contains invalid json at position {end}.')
+                    break
+                if end == len(buffer) and not eof:
+                    break
+                yield element
+                pos = end
+
+            buffer = buffer[pos:]
+
+        raise ValueError(f'{path} ends before the json array is closed.')
+
+
+def _skip(buffer, pos, characters):
+    while pos < len(buffer) and buffer[pos] in characters:
+        pos += 1
+    return pos
@@ -0,0 +1,167 @@
+import os
+import hashlib
+import argparse
+import traceback
+import subprocess
+from collections import OrderedDict
+from multiprocessing.connection import Client, Listener
+
+from common import MODEL_WORKER_SOCKET, MODEL_WORKER_DIR, MODEL_WORKER_MAX_MODELS
+
+
+class ModelWorker():
+    # keeps mmengine runners with loaded checkpoints alive between jobs, keyed by (config, checkpoint)
+    # started with 'python -m engine.model_worker' from the infer_pipeline directory in the mmdetection/mmpose environment
+    def __init__(self, address=MODEL_WORKER_SOCKET, work_dir=MODEL_WORKER_DIR, max_models=MODEL_WORKER_MAX_MODELS):
+        self.address = address
+        self.work_dir = work_dir
+        self.max_models = max_models
+        self.runners = OrderedDict()
+        self.connection = None
+
+    def serve(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.address)), exist_ok=True)
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        # the socket is only accessible to the user running the worker
+        umask = os.umask(0o077)
+        listener = Listener(self.address, family='AF_UNIX')
+        os.umask(umask)
+        print(f'Model worker listening on {self.address}')
+        try:
+            while True:
+                with listener.accept() as connection:
+                    self.connection = connection
+                    try:
+                        job = connection.recv()
+                        self.run(job)
+                        connection.send(('done', None))
+                    except (EOFError, BrokenPipeError, ConnectionResetError):
+                        pass
+                    except Exception:
+                        traceback.print_exc()
+                        try:
+                            connection.send(('error', traceback.format_exc()))
+                        except (BrokenPipeError, ConnectionResetError):
+                            pass
+                    finally:
+                        self.connection = None
+        finally:
+            listener.close()
+
+    def run(self, job):
+        from mmengine.config import Config
+        from mmengine.registry import DefaultScope
+
+        os.chdir(job['cwd'])
+        cfg = Config.fromfile(job['config'])
+        cfg.merge_from_dict(job['cfg_options'])
+
+        runner = self.get_runner(job['config'], job['checkpoint'], cfg)
+        with DefaultScope.overwrite_default_scope(cfg.get('default_scope')):
+            runner._test_dataloader = cfg.test_dataloader
+            runner._test_evaluator = cfg.test_evaluator
+            runner._test_loop = runner.build_test_loop(cfg.test_cfg)
+            if job['out'] is not None:
+                runner.test_evaluator.metrics.append(self._dump_results(job['out'], cfg.get('default_scope')))
+            runner.test()
+
+    def get_runner(self, config, checkpoint, cfg):
+        from mmengine.runner import Runner
+
+        key = (config, checkpoint)
+        if key in self.runners:
+            self.runners.move_to_end(key)
+            return self.runners[key]
+
+        cfg.load_from = checkpoint
+        cfg.work_dir = os.path.join(self.work_dir, hashlib.sha1('\n'.join(key).encode()).hexdigest())
+        runner = Runner.from_cfg(cfg)
+        runner.register_hook(self._progress_hook(), priority='LOWEST')
+        self.runners[key] = runner
+        while len(self.runners) > self.max_models:
+            self.runners.popitem(last=False)
+        return runner
+
+    def _progress_hook(self):
+        from mmengine.hooks import Hook
+
+        worker = self
+
+        class ProgressHook(Hook):
+            def after_test_iter(self, runner, batch_idx, data_batch=None, outputs=None):
+                if worker.connection is not None:
+                    worker.connection.send(('progress', (batch_idx + 1, len(runner.test_dataloader))))
+
+        return ProgressHook()
+
+    @classmethod
+    def _dump_results(cls, out, default_scope):
+        if default_scope == 'mmdet':
+            from mmdet.evaluation import DumpDetResults
+            return DumpDetResults(out_file_path=out)
+        from mmengine.evaluator import DumpResults
+        return DumpResults(out_file_path=out)
+
+
+def run_test(script, cwd, config, checkpoint, work_dir, cfg_options, on_progress, out=None):
+    # runs a test job on the model worker if one is listening, otherwise tools/test.py is started as a subprocess
+    job = {
+        'cwd': cwd,
+        'config': config,
+        'checkpoint': checkpoint,
+        'cfg_options': cfg_options,
+        'out': out
+    }
+    try:
+        connection = Client(MODEL_WORKER_SOCKET, family='AF_UNIX')
+    except (FileNotFoundError, ConnectionRefusedError):
+        connection = None
+
+    if connection is not None:
+        with connection:
+            try:
+                connection.send(job)
+                while True:
+                    message, value = connection.recv()
+                    if message == 'progress':
+                        on_progress(*value)
+                    elif message == 'done':
+                        return
+                    else:
+                        print(f'Model worker failed, falling back to {script}:\n{value}')
+                        break
+            except (EOFError, BrokenPipeError, ConnectionResetError):
+                print(f'Model worker disconnected, falling back to {script}.')
+
+    args = ['python', script, config, checkpoint, '--work-dir', work_dir]
+    if out is not None:
+        args += ['--out', out]
+    args += ['--cfg-options'] + [f'{key}={value}' for key, value in cfg_options.items()]
+
+    process = subprocess.Popen(
+        args,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        bufsize=1,
+        universal_newlines=True
+    )
+
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            print()
+            break
+        line = line.rstrip()
+        if 'mmengine - INFO - Epoch(test)' in line:
+            tracker = line[line.find('[') + 1: line.find(']')].split('/')
+            on_progress(int(tracker[0]), int(tracker[1]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket', type=str, default=MODEL_WORKER_SOCKET, required=False)
+    parser.add_argument('--max-models', type=int, default=MODEL_WORKER_MAX_MODELS, required=False)
+    args = parser.parse_args()
+
+    ModelWorker(args.socket, max_models=args.max_models).serve()
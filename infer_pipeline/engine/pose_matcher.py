@@ -0,0 +1,69 @@
+from statistics import mean
+
+import numpy as np
+
+
+def pose_bboxes(keypoints):
+    # (poses, keypoints, 3) -> (poses, 4) in xyxy, truncated like int()
+    x_coord = keypoints[:, :, 0]
+    y_coord = keypoints[:, :, 1]
+    return np.trunc(np.stack([x_coord.min(axis=1), y_coord.min(axis=1),
+                              x_coord.max(axis=1), y_coord.max(axis=1)], axis=1))
+
+
+def pairwise_iou(bboxes_1, bboxes_2):
+    # iou of bboxes_1[i] and bboxes_2[i], computed in float32 like torchvision.ops.box_iou
+    bboxes_1 = bboxes_1.astype(np.float32)
+    bboxes_2 = bboxes_2.astype(np.float32)
+    area_1 = (bboxes_1[:, 2] - bboxes_1[:, 0]) * (bboxes_1[:, 3] - bboxes_1[:, 1])
+    area_2 = (bboxes_2[:, 2] - bboxes_2[:, 0]) * (bboxes_2[:, 3] - bboxes_2[:, 1])
+    top_left = np.maximum(bboxes_1[:, :2], bboxes_2[:, :2])
+    bottom_right = np.minimum(bboxes_1[:, 2:], bboxes_2[:, 2:])
+    width_height = np.clip(bottom_right - top_left, 0, None)
+    intersection = width_height[:, 0] * width_height[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return intersection / (area_1 + area_2 - intersection)
+
+
+def match_bottomup(pred_bboxes, frame_poses, iou_threshold=0.3):
+    # pred_bboxes: one xywh detection per frame, frame_poses: list of candidate poses per frame
+    # returns the best scoring pose above the iou threshold per frame, None if there is none
+    n_frames = len(pred_bboxes)
+    matches = [None for _ in range(n_frames)]
+
+    poses = [pose for poses in frame_poses for pose in poses]
+    if not poses:
+        return matches
+
+    frames = np.repeat(np.arange(n_frames), [len(poses) for poses in frame_poses])
+    keypoints = np.array([pose['keypoints'] for pose in poses], dtype=np.float64)
+    keypoints = keypoints.reshape(len(poses), -1, 3)
+    # exact mean per pose as in the per-pose loop, a pairwise float mean would split ties between poses
+    scores = np.array([mean(pose['keypoints'][17::3]) for pose in poses], dtype=np.float64)
+    bboxes = pose_bboxes(keypoints)
+
+    pred_bboxes_xywh = np.trunc(np.array(pred_bboxes, dtype=np.float64))
+    pred_bboxes_xyxy = np.concatenate(
+        [pred_bboxes_xywh[:, :2], pred_bboxes_xywh[:, :2] + pred_bboxes_xywh[:, 2:]], axis=1)
+    ious = pairwise_iou(pred_bboxes_xyxy[frames], bboxes)
+
+    candidates = np.flatnonzero(ious > iou_threshold)
+    if candidates.size == 0:
+        return matches
+
+    # per frame: highest score first, earlier pose first on ties
+    order = np.lexsort((candidates, -scores[candidates], frames[candidates]))
+    candidates = candidates[order]
+    _, first = np.unique(frames[candidates], return_index=True)
+
+    for pose in candidates[first]:
+        matches[frames[pose]] = {
+            'iou': ious[pose].item(),
+            'bbox': bboxes[pose].astype(int).tolist(),
+            'x_coord': keypoints[pose, :, 0].tolist(),
+            'y_coord': keypoints[pose, :, 1].tolist(),
+            'keypoint_scores': keypoints[pose, :, 2].tolist(),
+            'score': mean(poses[pose]['keypoints'][17::3])
+        }
+
+    return matches
@@ -0,0 +1,83 @@
+import csv
+import argparse
+
+from common import INFERENCES_DIR
+from data_types.inference_catalog import InferenceCatalog
+from engine.profiling import PROFILE_SECTIONS
+
+
+def aggregate_profiles(inferences_dir=INFERENCES_DIR, group_by=('mmpose_model', 'mmdetection_model')):
+    # sums the profiles of all inferences per model, inferences without a profile are skipped
+    catalog = InferenceCatalog(inferences_dir)
+    catalog.refresh()
+
+    groups = {}
+    for id_ in catalog.ids():
+        metadata = catalog.get_metadata(id_)
+        profile = metadata.get('profile')
+        if not profile:
+            continue
+        key = ' / '.join(str(metadata[attribute]) for attribute in group_by)
+        group = groups.setdefault(key, {'n_inferences': 0, 'n_images': 0, 'sections': {}})
+        group['n_inferences'] += 1
+        group['n_images'] += metadata.get('n_images') or 0
+        for name, section in profile.items():
+            # profiles stored before the process-wide figures were separated only contribute wall and cpu time
+            aggregated = group['sections'].setdefault(name, {'wall': 0, 'cpu': 0, 'children_cpu_process_wide': 0,
+                                                             'peak_rss_mb_process_wide': 0})
+            aggregated['wall'] += section['wall']
+            aggregated['cpu'] += section['cpu'] or 0
+            aggregated['children_cpu_process_wide'] += section.get('children_cpu_process_wide') or 0
+            aggregated['peak_rss_mb_process_wide'] = max(aggregated['peak_rss_mb_process_wide'],
+                                                         section.get('peak_rss_mb_process_wide') or 0)
+    return groups
+
+
+def report_rows(groups):
+    rows = []
+    for key, group in sorted(groups.items()):
+        total_wall = sum(section['wall'] for section in group['sections'].values())
+        sections = [name for name in PROFILE_SECTIONS if name in group['sections']]
+        sections += [name for name in group['sections'] if name not in PROFILE_SECTIONS]
+        for name in sections:
+            section = group['sections'][name]
+            rows.append({
+                'model': key,
+                'inferences': group['n_inferences'],
+                'section': name,
+                'wall_s': round(section['wall'], 2),
+                'wall_share': round(section['wall'] / total_wall, 3) if total_wall else 0,
+                'wall_ms_per_image': round(section['wall'] / group['n_images'] * 1000, 2) if group['n_images'] else None,
+                'cpu_s': round(section['cpu'], 2),
+                'children_cpu_s_process_wide': round(section['children_cpu_process_wide'], 2),
+                'peak_rss_mb_process_wide': round(section['peak_rss_mb_process_wide'], 1)
+            })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inferences-dir', type=str, default=INFERENCES_DIR, required=False)
+    parser.add_argument('--group-by', type=str, nargs='+', default=['mmpose_model', 'mmdetection_model'],
+                        required=False)
+    parser.add_argument('--csv', type=str, default=None, required=False)
+    args = parser.parse_args()
+
+    rows = report_rows(aggregate_profiles(args.inferences_dir, args.group_by))
+    if args.csv is not None:
+        with open(args.csv, 'w', encoding='utf8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    model = None
+    for row in rows:
+        if row['model'] != model:
+            model = row['model']
+            print(f"\n{model} ({row['inferences']} inferences)")
+            print('children cpu and rss are process-wide and include concurrent inferences')
+            print(f"{'section':<22}{'wall s':>10}{'share':>8}{'ms/img':>10}{'cpu s':>10}{'child cpu s':>13}"
+                  f"{'rss MB':>10}")
+        ms_per_image = row['wall_ms_per_image'] if row['wall_ms_per_image'] is not None else '-'
+        print(f"{row['section']:<22}{row['wall_s']:>10}{row['wall_share']:>8}{ms_per_image:>10}"
+              f"{row['cpu_s']:>10}{row['children_cpu_s_process_wide']:>13}{row['peak_rss_mb_process_wide']:>10}")
@@ -0,0 +1,130 @@
+import os
+import time
+import resource
+from threading import Thread, Event
+
+PROFILE_SECTIONS = [
+    'data_prep',
+    'annotation_creation',
+    'detection_cache',
+    'detector_startup',
+    'detector_compute',
+    'json_postprocessing',
+    'pose_startup',
+    'pose_compute',
+    'result_assembly',
+    'metrics',
+    'saving'
+]
+RSS_SAMPLE_INTERVAL = 0.1
+
+
+def read_rss_kb(pid='self'):
+    # current resident set size of a process from /proc, None if it is not available
+    try:
+        with open(f'/proc/{pid}/status', 'r', encoding='utf8') as status_file:
+            for line in status_file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def child_pids(pid='self'):
+    # all descendants of a process, e.g. the detector and pose estimator subprocesses
+    pids = []
+    try:
+        tids = os.listdir(f'/proc/{pid}/task')
+    except OSError:
+        return pids
+    for tid in tids:
+        try:
+            with open(f'/proc/{pid}/task/{tid}/children', 'r', encoding='utf8') as children_file:
+                children = children_file.read().split()
+        except OSError:
+            continue
+        for child in children:
+            pids.append(child)
+            pids += child_pids(child)
+    return pids
+
+
+def read_process_tree_rss_mb():
+    rss = read_rss_kb()
+    if rss is None:
+        return None
+    return (rss + sum(read_rss_kb(pid) or 0 for pid in child_pids())) / 1024
+
+
+class RssSampler(Thread):
+    # highest rss of this process and its children while the sampler runs, sampled from /proc
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = Event()
+        self.peak_mb = read_process_tree_rss_mb()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self._sample()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self._sample()
+        return self.peak_mb
+
+    def _sample(self):
+        rss_mb = read_process_tree_rss_mb()
+        if rss_mb is not None:
+            self.peak_mb = max(self.peak_mb or 0, rss_mb)
+
+
+class Profiler():
+    # wall time, cpu time and peak rss per section, accumulated into a profile dict of the inference.
+    # cpu is the time of the calling thread, i.e. of this job only. the other figures are process-wide, since the
+    # jobs of all inferences run on threads of one process: children_cpu_process_wide is the time of child processes
+    # that finished during the section, peak_rss_mb_process_wide the highest rss of this process and its children
+    # sampled during the section
+    def __init__(self, profile):
+        self.profile = profile
+        self.current = None
+
+    def start(self, name):
+        self.stop()
+        sampler = RssSampler()
+        sampler.start()
+        self.current = (name, time.time(), time.thread_time(), self._children_cpu_time(), sampler)
+
+    def is_running(self, name):
+        return self.current is not None and self.current[0] == name
+
+    def stop(self):
+        if self.current is None:
+            return
+        name, start, cpu_start, children_cpu_start, sampler = self.current
+        self.current = None
+        self.add(name, time.time() - start, time.thread_time() - cpu_start,
+                 self._children_cpu_time() - children_cpu_start, sampler.stop())
+
+    def add(self, name, wall, cpu=None, children_cpu=None, peak_rss_mb=None):
+        section = self.profile.setdefault(name, {'wall': 0, 'cpu': None, 'children_cpu_process_wide': None,
+                                                 'peak_rss_mb_process_wide': None})
+        section['wall'] += wall
+        if cpu is not None:
+            section['cpu'] = (section['cpu'] or 0) + cpu
+        if children_cpu is not None:
+            section['children_cpu_process_wide'] = (section['children_cpu_process_wide'] or 0) + children_cpu
+        if peak_rss_mb is not None:
+            section['peak_rss_mb_process_wide'] = max(section['peak_rss_mb_process_wide'] or 0, peak_rss_mb)
+
+    def __del__(self):
+        # a section left running by a failed stage stops its sampler with the profiler
+        if self.current is not None:
+            self.current[4].stopped.set()
+
+    @classmethod
+    def _children_cpu_time(cls):
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return children.ru_utime + children.ru_stime
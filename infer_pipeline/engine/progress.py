@@ -0,0 +1,104 @@
+import time
+import queue
+import multiprocessing
+from datetime import timedelta
+
+# events are dicts with a 'type':
+# progress: inference_id, stage, message, processed, total, rate (units per second), eta (seconds)
+# state: inference_id, state (QUEUED, DONE or FAILED)
+# scheduler: stats of the stage scheduler, see StageScheduler.stats
+
+
+class ProgressReporter():
+    # sending side of a progress channel, used by one inference in the inference process
+    def __init__(self, inference_id, events, min_interval=0.1):
+        self.inference_id = inference_id
+        self.events = events
+        self.min_interval = min_interval
+        self.stage = None
+        self.message = None
+        self.message_start = None
+        self.message_start_processed = 0
+        self.last_sent = 0
+
+    def set_stage(self, stage):
+        self.stage = stage.value
+
+    def update(self, message, processed=None, total=None):
+        now = time.time()
+        if message != self.message:
+            self.message = message
+            self.message_start = now
+            self.message_start_processed = processed or 0
+        elif now - self.last_sent < self.min_interval and processed != total:
+            return
+
+        rate = None
+        eta = None
+        elapsed = now - self.message_start
+        if processed is not None and total and elapsed > 0 and processed > self.message_start_processed:
+            rate = (processed - self.message_start_processed) / elapsed
+            eta = (total - processed) / rate
+
+        self.events.put({
+            'type': 'progress',
+            'inference_id': self.inference_id,
+            'stage': self.stage,
+            'message': message,
+            'processed': processed,
+            'total': total,
+            'rate': rate,
+            'eta': eta
+        })
+        self.last_sent = now
+
+    def set_state(self, state):
+        self.events.put({'type': 'state', 'inference_id': self.inference_id, 'state': state})
+
+
+class ProgressChannel():
+    # receiving side, subscribers are called with every event in the process that polls or listens
+    def __init__(self):
+        self.events = multiprocessing.get_context('spawn').Queue()
+        self.subscribers = []
+
+    def reporter(self, inference_id):
+        return ProgressReporter(inference_id, self.events)
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def poll(self):
+        # dispatches all pending events without blocking
+        n_events = 0
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return n_events
+            self._dispatch(event)
+            n_events += 1
+
+    def listen(self, timeout=None):
+        # blocks until the next event, returns None if there was none within the timeout
+        try:
+            event = self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self._dispatch(event)
+        return event
+
+    def _dispatch(self, event):
+        for subscriber in self.subscribers:
+            subscriber(event)
+
+
+def format_progress(event):
+    progress_str = event['message']
+    if event['processed'] is not None and event['total']:
+        progress_str += f" {int(event['processed'] / event['total'] * 100)}%"
+    if event['rate'] is not None:
+        progress_str += f" {event['rate']:.1f}/s"
+    if event['eta'] is not None:
+        progress_str += f" ETA {timedelta(seconds=int(event['eta']))}"
+    return progress_str
@@ -0,0 +1,158 @@
+from statistics import mean
+from collections import defaultdict
+
+import numpy as np
+
+from data_types.feature import Feature
+from engine.pose_matcher import match_bottomup
+
+
+class ResultAssembler():
+    def __init__(self, annotations, pred_bboxes, results, dataset_type, data_mode, iou_threshold=0.3,
+                 result_image_ids=None):
+        self.dataset_type = dataset_type
+        self.data_mode = data_mode
+        self.iou_threshold = iou_threshold
+
+        # all lookups are built in a single pass, later entries win as in a linear scan
+        self.image_ids = {}
+        self.image_data_ids = {}
+        for dataset_image in annotations['images']:
+            data_id, _, filename = dataset_image['file_name'].split('/')[-1].partition('_')
+            self.image_ids[(data_id, filename)] = dataset_image['id']
+            self.image_data_ids[dataset_image['id']] = data_id
+
+        self.pred_bboxes = {}
+        for bbox in pred_bboxes:
+            self.pred_bboxes[bbox['image_id']] = bbox
+
+        # results can be any iterable, e.g. a stream of the results file. if the image ids of the results show that
+        # the results of each data are contiguous, they are consumed while assembling, so only the results of the
+        # current data and of data that came early in the stream are held in memory. otherwise all results are read
+        # before the first data is assembled
+        self.results = iter(results)
+        self.streamed = False
+        if result_image_ids is not None:
+            result_data_ids = self.get_result_data_ids(result_image_ids)
+            self.streamed = len(result_data_ids) == len(set(result_data_ids))
+            self.result_data_ids = set(result_data_ids)
+        self.pending_results = {}
+        self.assembled_data_ids = set()
+        self.run_results = {}
+
+    def get_image_id(self, data_id, filename):
+        return self.image_ids.get((str(data_id), filename))
+
+    def get_pred_bbox(self, image_id):
+        return self.pred_bboxes.get(image_id)
+
+    def get_results(self, image_id):
+        return self.run_results.get(image_id, [])
+
+    def get_result_data_ids(self, result_image_ids):
+        # data ids of the contiguous blocks of results, a data id occurs more than once if its results are not grouped
+        result_image_ids = np.asarray(result_image_ids)
+        if len(result_image_ids) == 0:
+            return []
+        starts = np.flatnonzero(np.concatenate([[True], result_image_ids[1:] != result_image_ids[:-1]]))
+        result_data_ids = []
+        for image_id in result_image_ids[starts].tolist():
+            data_id = self.image_data_ids.get(image_id)
+            if data_id is not None and (not result_data_ids or result_data_ids[-1] != data_id):
+                result_data_ids.append(data_id)
+        return result_data_ids
+
+    def read_results(self, data_id):
+        # grouped results are read until the first result of other data after the results of this data, otherwise
+        # all results are buffered on the first call
+        run_results = self.pending_results.pop(data_id, defaultdict(list))
+        if self.streamed and data_id not in self.result_data_ids:
+            return run_results
+        for result in self.results:
+            result_data_id = self.image_data_ids.get(result['image_id'])
+            if result_data_id is None:
+                continue
+            if result_data_id in self.assembled_data_ids:
+                raise ValueError(f'Result of image {result["image_id"]} follows the results of other data.')
+            if result_data_id == data_id:
+                run_results[result['image_id']].append(result)
+                continue
+            self.pending_results.setdefault(result_data_id, defaultdict(list))[result['image_id']].append(result)
+            if self.streamed and run_results:
+                break
+        return run_results
+
+    def assemble(self, data):
+        images = data.get_images()
+        image_ids = [self.get_image_id(data.id, image.split('/')[-1]) for image in images]
+        self.run_results = self.read_results(str(data.id))
+        self.assembled_data_ids.add(str(data.id))
+
+        bboxes = []
+        bboxes_bottomup = []
+        ious = []
+        detection_scores = []
+        pose_estimation_scores = []
+        features = []
+        dataset_keypoints = self.dataset_type.keypoints
+        n_keypoints = len(dataset_keypoints)
+        for keypoint in dataset_keypoints:
+            features.append(Feature(name=keypoint, fps=data.fps, capacity=len(images)))
+
+        pred_bboxes = [self.get_pred_bbox(image_id) for image_id in image_ids]
+
+        if self.data_mode == 'bottomup':
+            matches = match_bottomup([pred_bbox['bbox'] for pred_bbox in pred_bboxes],
+                                     [self.get_results(image_id) for image_id in image_ids],
+                                     self.iou_threshold)
+
+        for step, (image_id, pred_bbox) in enumerate(zip(image_ids, pred_bboxes)):
+            if self.data_mode == 'topdown':
+                result = self.get_results(image_id)[0]
+                keypoints = result['keypoints']
+                x_coord = keypoints[0::3]
+                y_coord = keypoints[1::3]
+                keypoint_scores = keypoints[2::3]
+
+                keypoint_scores_for_image_mean = keypoints[17::3]
+                score = mean(keypoint_scores_for_image_mean)
+                result['score'] = score
+
+                for i, (x, y, s) in enumerate(zip(x_coord, y_coord, keypoint_scores)):
+                    features[i * 2].add(step, x, s)
+                    features[i * 2 + 1].add(step, y, s)
+
+            if self.data_mode == 'bottomup':
+                result = matches[step]
+                if result is None:
+                    result = {
+                        'iou': -1,
+                        'bbox': -1,
+                        'x_coord': [-1 for i in range(int((n_keypoints - 4) / 2))],
+                        'y_coord': [-1 for i in range(int((n_keypoints - 4) / 2))],
+                        'keypoint_scores': [-1 for i in range(int((n_keypoints - 4) / 2))],
+                        'score': -1
+                    }
+                for i, (x, y, s) in enumerate(zip(result['x_coord'], result['y_coord'], result['keypoint_scores'])):
+                    features[i * 2].add(step, x, s)
+                    features[i * 2 + 1].add(step, y, s)
+
+            bboxes.append(pred_bbox['bbox'])
+            detection_scores.append(pred_bbox['score'])
+            pose_estimation_scores.append(result['score'])
+
+            if self.data_mode == 'bottomup':
+                bboxes_bottomup.append(result['bbox'])
+                ious.append(result['iou'])
+
+        self.run_results = {}
+        return {
+            'id': data.id,
+            'data': data,
+            'features': features,
+            'bboxes': bboxes,
+            'bboxes_bottomup': bboxes_bottomup,
+            'ious': ious,
+            'detection_scores': detection_scores,
+            'pose_estimation_scores': pose_estimation_scores
+        }
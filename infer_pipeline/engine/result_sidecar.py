@@ -0,0 +1,132 @@
+import os
+import json
+import shutil
+import tempfile
+
+import numpy as np
+
+from engine.json_stream import iter_json_array
+
+# bboxes and keypoint results as one .npy file per column in a directory next to their json files,
+# <id>.bbox.json -> <id>.bbox.columns/. json is only kept for the files read by mmpose and mmdetection.
+# columns are written row by row and read memory-mapped, so neither side holds all results in memory
+SIDECAR_EXTENSION = '.columns'
+READ_BLOCK_ROWS = 4096
+
+
+def sidecar_path(json_path):
+    return os.path.splitext(json_path)[0] + SIDECAR_EXTENSION
+
+
+def is_sidecar(path):
+    return path.endswith(SIDECAR_EXTENSION)
+
+
+class ColumnWriter():
+    # appends rows to a raw file and prepends the .npy header once the number of rows is known
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = None
+        self.n_rows = 0
+        self.raw_file = open(path + '.raw', 'wb')
+
+    def append(self, row):
+        row = np.asarray(row, dtype=self.dtype)
+        if self.row_shape is None:
+            self.row_shape = row.shape
+        self.raw_file.write(row.tobytes())
+        self.n_rows += 1
+
+    def close(self):
+        self.raw_file.close()
+        header = {
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (self.n_rows,) + (self.row_shape or ())
+        }
+        with open(self.path, 'wb') as column_file, open(self.raw_file.name, 'rb') as raw_file:
+            np.lib.format.write_array_header_1_0(column_file, header)
+            shutil.copyfileobj(raw_file, column_file)
+        os.remove(self.raw_file.name)
+
+
+def save_bboxes(path, bboxes):
+    _save(path, {'image_id': np.int64, 'bbox': np.float64, 'score': np.float64, 'category_id': np.int64},
+          ({'image_id': bbox['image_id'], 'bbox': bbox['bbox'], 'score': bbox['score'],
+            'category_id': bbox['category_id']} for bbox in bboxes))
+
+
+def load_bboxes(path):
+    # bbox dicts as in the json file
+    if not is_sidecar(path):
+        with open(path, 'r', encoding='utf8') as bbox_file:
+            return json.load(bbox_file)
+
+    columns = _load(path, ('image_id', 'bbox', 'score', 'category_id'))
+    return [{'image_id': image_id, 'bbox': bbox, 'score': score, 'category_id': category_id}
+            for image_id, bbox, score, category_id in zip(*(column.tolist() for column in columns))]
+
+
+def save_keypoints(path, results):
+    # results can be a stream, each result is written as soon as it is read
+    _save(path, {'image_id': np.int64, 'category_id': np.int64, 'score': np.float32, 'keypoints': np.float32},
+          ({'image_id': result['image_id'], 'category_id': result.get('category_id', 1), 'score': result['score'],
+            'keypoints': result['keypoints']} for result in results))
+
+
+def iter_keypoints(path):
+    # keypoint result dicts as in the json file, read in blocks of rows from the memory-mapped columns
+    if not is_sidecar(path):
+        yield from iter_json_array(path)
+        return
+
+    image_ids, category_ids, scores, keypoints = _load(path, ('image_id', 'category_id', 'score', 'keypoints'))
+    for start in range(0, len(image_ids), READ_BLOCK_ROWS):
+        block = slice(start, start + READ_BLOCK_ROWS)
+        for image_id, category_id, score, result_keypoints in zip(
+                image_ids[block].tolist(), category_ids[block].tolist(), scores[block].tolist(),
+                keypoints[block].tolist()):
+            yield {'image_id': image_id, 'category_id': category_id, 'keypoints': result_keypoints, 'score': score}
+
+
+def load_image_ids(path):
+    # image ids of the keypoint results in file order, read from their memory-mapped column. None for json files,
+    # which would have to be read completely
+    if not is_sidecar(path):
+        return None
+    return _load(path, ('image_id',))[0]
+
+
+def copy_sidecar(src, dst):
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(dst), prefix=os.path.basename(dst) + '.', suffix='.tmp')
+    for filename in os.listdir(src):
+        shutil.copyfile(os.path.join(src, filename), os.path.join(tmp_dir, filename))
+    _replace(tmp_dir, dst)
+
+
+def _save(path, dtypes, rows):
+    # the columns are written into a temporary directory that replaces the sidecar when complete
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        writers = {column: ColumnWriter(os.path.join(tmp_dir, column + '.npy'), dtype)
+                   for column, dtype in dtypes.items()}
+        for row in rows:
+            for column, writer in writers.items():
+                writer.append(row[column])
+        for writer in writers.values():
+            writer.close()
+        _replace(tmp_dir, path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _load(path, columns):
+    return [np.load(os.path.join(path, column + '.npy'), mmap_mode='r') for column in columns]
+
+
+def _replace(tmp_dir, path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(tmp_dir, path)
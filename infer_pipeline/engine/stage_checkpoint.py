@@ -0,0 +1,107 @@
+import os
+import json
+import pickle
+import hashlib
+
+from common import INFERENCES_DIR
+
+CHECKPOINT_FILENAME = 'stages.json'
+JOB_FILENAME = 'job.pkl'
+
+
+class StageCheckpoint():
+    # completion markers of the stages of an inference. a marker is valid as long as the inputs of its stage, the
+    # outputs of the previous stage and its own output files are unchanged, so a restarted inference continues
+    # from the first stage without a valid marker
+    def __init__(self, out_dir, stages):
+        self.path = os.path.join(out_dir, CHECKPOINT_FILENAME)
+        self.stages = [stage.value for stage in stages]
+        self.markers = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf8') as checkpoint_file:
+                    self.markers = json.load(checkpoint_file)
+            except (OSError, json.JSONDecodeError):
+                self.markers = {}
+
+    def get(self, stage, inputs):
+        marker = self.markers.get(stage.value)
+        if marker is None or marker['input_fingerprint'] != self._input_fingerprint(stage, inputs):
+            return None
+        if marker['output_fingerprint'] != self._output_fingerprint(marker['outputs']):
+            return None
+        return marker
+
+    def complete(self, stage, inputs, outputs, state, attributes):
+        self.markers[stage.value] = {
+            'input_fingerprint': self._input_fingerprint(stage, inputs),
+            'outputs': outputs,
+            'output_fingerprint': self._output_fingerprint(outputs),
+            'state': state,
+            'attributes': attributes
+        }
+        # markers of later stages were made from other outputs of this stage
+        for later_stage in self.stages[self.stages.index(stage.value) + 1:]:
+            self.markers.pop(later_stage, None)
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf8') as checkpoint_file:
+            json.dump(self.markers, checkpoint_file)
+        os.replace(tmp_path, self.path)
+
+    def _input_fingerprint(self, stage, inputs):
+        index = self.stages.index(stage.value)
+        previous = self.markers.get(self.stages[index - 1]) if index > 0 else None
+        fingerprint = {
+            'stage': stage.value,
+            'inputs': inputs,
+            'previous': previous['output_fingerprint'] if previous is not None else None
+        }
+        return hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def _output_fingerprint(cls, outputs):
+        stats = []
+        for output in outputs:
+            try:
+                stat = os.stat(output)
+            except FileNotFoundError:
+                return None
+            stats.append([output, stat.st_size, stat.st_mtime_ns])
+        return hashlib.sha1(json.dumps(stats).encode()).hexdigest()
+
+
+def save_job(inference, existing_dataset):
+    out_dir = os.path.join(INFERENCES_DIR, inference.id)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, JOB_FILENAME), 'wb') as job_file:
+        pickle.dump({'inference': inference, 'existing_dataset': existing_dataset}, job_file)
+
+
+def remove_job(out_dir):
+    job_path = os.path.join(out_dir, JOB_FILENAME)
+    if os.path.exists(job_path):
+        os.remove(job_path)
+
+
+def find_interrupted_jobs(inferences_dir=INFERENCES_DIR):
+    # inferences that were started but never stored their metadata, as (inference, existing dataset)
+    # a fresh checkout has no inferences directory yet
+    jobs = []
+    if not os.path.isdir(inferences_dir):
+        return jobs
+    for entry in sorted(os.scandir(inferences_dir), key=lambda entry: entry.name):
+        job_path = os.path.join(entry.path, JOB_FILENAME)
+        if not entry.is_dir() or not os.path.exists(job_path):
+            continue
+        if os.path.exists(os.path.join(entry.path, 'metadata.json')):
+            continue
+        try:
+            with open(job_path, 'rb') as job_file:
+                job = pickle.load(job_file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            continue
+        jobs.append((job['inference'], job['existing_dataset']))
+    return jobs
@@ -0,0 +1,147 @@
+import time
+import asyncio
+import traceback
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+
+from common import STAGE_CONCURRENCY
+from engine.progress import ProgressReporter
+from engine.stage_checkpoint import save_job
+
+
+class InferenceStage(Enum):
+    DATA_STAGING = 'data_staging'
+    DETECTION = 'detection'
+    POSE_ESTIMATION = 'pose_estimation'
+    RESULT_ASSEMBLY = 'result_assembly'
+    METRICS = 'metrics'
+
+
+class StageScheduler():
+    # runs the stages of several jobs with a concurrency limit per stage, so that different jobs overlap across stages
+    # while the stages of a single job run in order
+    def __init__(self, concurrency=None):
+        self.concurrency = {stage: 1 for stage in InferenceStage}
+        for stage, limit in (concurrency or STAGE_CONCURRENCY).items():
+            self.concurrency[InferenceStage(stage)] = limit
+        # the metrics stage sets the global highpass zeroing threshold of StandardMetrics and is never run in parallel
+        self.concurrency[InferenceStage.METRICS] = 1
+
+        self.queued = {stage: 0 for stage in InferenceStage}
+        self.running = {stage: 0 for stage in InferenceStage}
+        self.busy_time = {stage: 0 for stage in InferenceStage}
+        self.start_time = None
+        self.semaphores = None
+        self.executor = None
+        self.stage_events = None
+        self.completed_stages = set()
+
+    def run(self, jobs, on_update=None, dependencies=None):
+        # jobs: {job id: [(stage, callable), ...]}, dependencies: {job id: [(job id, stage), ...]} that have to be
+        # completed before the job starts, returns {job id: None or the traceback of the failed stage}
+        return asyncio.run(self._run(jobs, on_update, dependencies or {}))
+
+    async def _run(self, jobs, on_update, dependencies):
+        self.start_time = time.time()
+        self.semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in self.concurrency.items()}
+        self.stage_events = {(job_id, stage): asyncio.Event() for job_id in jobs for stage in InferenceStage}
+        with ThreadPoolExecutor(max_workers=sum(self.concurrency.values())) as self.executor:
+            errors = await asyncio.gather(*[self._run_job(job_id, stages, dependencies.get(job_id, []), on_update)
+                                            for job_id, stages in jobs.items()])
+        return dict(zip(jobs, errors))
+
+    async def _run_job(self, job_id, stages, dependencies, on_update):
+        try:
+            for dependency in dependencies:
+                await self.stage_events[dependency].wait()
+                if dependency not in self.completed_stages:
+                    raise RuntimeError(f'Stage {dependency[1].value} of {dependency[0]} failed.')
+            for stage, function in stages:
+                await self._run_stage(stage, function, on_update)
+                self.completed_stages.add((job_id, stage))
+                self.stage_events[(job_id, stage)].set()
+        except Exception:
+            traceback.print_exc()
+            return traceback.format_exc()
+        finally:
+            # jobs waiting for a stage this job did not complete are released and fail
+            for stage in InferenceStage:
+                self.stage_events[(job_id, stage)].set()
+        return None
+
+    async def _run_stage(self, stage, function, on_update):
+        self.queued[stage] += 1
+        self._update(on_update)
+        async with self.semaphores[stage]:
+            self.queued[stage] -= 1
+            self.running[stage] += 1
+            self._update(on_update)
+            start = time.time()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.executor, function)
+            finally:
+                self.busy_time[stage] += time.time() - start
+                self.running[stage] -= 1
+                self._update(on_update)
+
+    def _update(self, on_update):
+        if on_update is not None:
+            on_update(self.stats())
+
+    def stats(self):
+        # queue depth, running jobs and the share of the stage's capacity that was in use since the scheduler started
+        elapsed = time.time() - self.start_time if self.start_time is not None else 0
+        stats = {}
+        for stage in InferenceStage:
+            capacity = elapsed * self.concurrency[stage]
+            stats[stage.value] = {
+                'queued': self.queued[stage],
+                'running': self.running[stage],
+                'concurrency': self.concurrency[stage],
+                'utilization': self.busy_time[stage] / capacity if capacity else 0
+            }
+        return stats
+
+
+def plan_jobs(inferences, inference_progresses, existing_datasets, dataset_type):
+    # inferences on the same data with the same detector stage the data and detect only once, the first of them
+    # runs these stages and the others continue from its results with their own pose estimation
+    jobs = {}
+    dependencies = {}
+    shared = {}
+    for inference, inference_progress, existing_dataset in zip(inferences, inference_progresses, existing_datasets):
+        stages = inference.stages(inference_progress, existing_dataset, dataset_type)
+        key = (tuple(int(data.id) for data in inference.data),
+               existing_dataset,
+               inference.mmdetection_model.config,
+               inference.mmdetection_model.checkpoint)
+        if key not in shared:
+            shared[key] = inference
+        else:
+            leader = shared[key]
+            shared_stages = inference.shared_stages(inference_progress, leader, existing_dataset, dataset_type)
+            stages = shared_stages + [(stage, function) for stage, function in stages
+                                      if stage not in (InferenceStage.DATA_STAGING, InferenceStage.DETECTION)]
+            dependencies[inference.id] = [(leader.id, InferenceStage.DETECTION)]
+        jobs[inference.id] = stages
+    return jobs, dependencies
+
+
+def run_inferences(inferences, existing_datasets, dataset_type, progress_events, concurrency=None):
+    # entry point of the inference process, progress and scheduler stats are sent as events to the gui.
+    # each inference is stored as a job first, so that it can be resumed if the process dies
+    def on_update(stats):
+        progress_events.put({'type': 'scheduler', 'stats': stats})
+
+    inference_progresses = []
+    for inference, existing_dataset in zip(inferences, existing_datasets):
+        save_job(inference, existing_dataset)
+        inference_progress = ProgressReporter(inference.id, progress_events)
+        inference_progress.set_state('QUEUED')
+        inference_progresses.append(inference_progress)
+
+    jobs, dependencies = plan_jobs(inferences, inference_progresses, existing_datasets, dataset_type)
+    errors = StageScheduler(concurrency).run(jobs, on_update, dependencies)
+    for inference_progress, error in zip(inference_progresses, errors.values()):
+        if error is not None:
+            inference_progress.set_state('FAILED')
@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+
+
+class StreamingPipeline():
+    # detection and top-down pose estimation in the same process, frames are streamed through both models in batches
+    # and the best bbox of a frame is handed to the pose model directly instead of going through result files
+    def __init__(self, detection_config, detection_checkpoint, pose_config, pose_checkpoint,
+                 category_ids=(1,), batch_size=16, device=None):
+        import torch
+        from mmdet.apis import init_detector
+        from mmpose.apis import init_model
+        from mmengine.dataset import Compose
+
+        if device is None:
+            device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+
+        self.detector = init_detector(detection_config, detection_checkpoint, device=device)
+        self.pose_model = init_model(pose_config, pose_checkpoint, device=device)
+        self.pose_pipeline = Compose(self.pose_model.cfg.test_dataloader.dataset.pipeline)
+        self.category_ids = category_ids
+        self.batch_size = batch_size
+        self.detection_time = 0
+        self.pose_estimation_time = 0
+
+    def run(self, images, cached_bboxes=None):
+        # images: coco image dicts, cached_bboxes: {image id: bbox} of frames that need no detection
+        # yields (image id, bbox, pose estimation) per frame, bbox and pose estimation are None if nothing was detected
+        cached_bboxes = cached_bboxes or {}
+        for i in range(0, len(images), self.batch_size):
+            batch = images[i:i + self.batch_size]
+            bboxes = {image['id']: cached_bboxes[image['id']] for image in batch if image['id'] in cached_bboxes}
+            start = time.time()
+            bboxes.update(self.detect([image for image in batch if image['id'] not in cached_bboxes]))
+            self.detection_time += time.time() - start
+
+            start = time.time()
+            estimated = [image for image in batch if bboxes.get(image['id']) is not None]
+            pose_estimations = self.estimate_poses(estimated, [bboxes[image['id']] for image in estimated])
+            self.pose_estimation_time += time.time() - start
+
+            for image in batch:
+                yield image['id'], bboxes.get(image['id']), pose_estimations.get(image['id'])
+
+    def detect(self, images):
+        from mmdet.apis import inference_detector
+
+        if not images:
+            return {}
+
+        bboxes = {}
+        data_samples = inference_detector(self.detector, [image['file_name'] for image in images])
+        for image, data_sample in zip(images, data_samples):
+            pred_instances = data_sample.pred_instances
+            if len(pred_instances) == 0:
+                bboxes[image['id']] = None
+                continue
+            # the first of equally scored detections is kept, as in BBoxReducer
+            best = int(np.argmax(pred_instances.scores.cpu().numpy()))
+            x1, y1, x2, y2 = pred_instances.bboxes[best].cpu().numpy().tolist()
+            bboxes[image['id']] = {
+                'image_id': image['id'],
+                'bbox': [x1, y1, x2 - x1, y2 - y1],
+                'score': float(pred_instances.scores[best]),
+                'category_id': self.category_ids[int(pred_instances.labels[best])]
+            }
+        return bboxes
+
+    def estimate_poses(self, images, bboxes):
+        import torch
+        from mmengine.dataset import pseudo_collate
+
+        if not images:
+            return {}
+
+        data_list = []
+        for image, bbox in zip(images, bboxes):
+            x, y, w, h = bbox['bbox']
+            data_info = {
+                'img_path': image['file_name'],
+                'bbox': np.array([[x, y, x + w, y + h]], dtype=np.float32),
+                'bbox_score': np.array([bbox['score']], dtype=np.float32)
+            }
+            data_info.update(self.pose_model.dataset_meta)
+            data_list.append(self.pose_pipeline(data_info))
+
+        with torch.no_grad():
+            data_samples = self.pose_model.test_step(pseudo_collate(data_list))
+
+        pose_estimations = {}
+        for image, data_sample in zip(images, data_samples):
+            keypoints = data_sample.pred_instances.keypoints[0]
+            keypoint_scores = data_sample.pred_instances.keypoint_scores[0]
+            pose_estimations[image['id']] = {
+                'image_id': image['id'],
+                'category_id': self.category_ids[0],
+                'keypoints': np.column_stack((keypoints, keypoint_scores)).reshape(-1).tolist(),
+                'score': float(np.mean(keypoint_scores))
+            }
+        return pose_estimations
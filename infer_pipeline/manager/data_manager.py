@@ -12,6 +12,20 @@ from data_types.data import Data
 
 from common import MMPOSE_DATA_DIR, WSL_PREFIX
 
+DATA_PRESETS = [
+    'Standard',
+    'Deblurred',
+    'Interpolated',
+    'Debl.-Interp.',
+    'Interp.-Debl.',
+    'Still'
+]
+SPOTLIGHT_PRESETS = [
+    'All Spotlight',
+    'With Spotlight',
+    'Without Spotlight'
+]
+
 
 class DataManager():
     def __init__(self, root, status_manager):
@@ -39,10 +53,8 @@ class DataManager():
             self.monitor_fetch_thread(fetch_thread)
 
     def _fetch_data(self):
-        data = sorted(glob.glob(os.path.join(MMPOSE_RUNS_DIR, '*')))
         self.data_all.clear()
-        for d in data:
-            self.data_all.append(Data(d))
+        self.data_all.extend(fetch_all_data())
 
     def monitor_fetch_thread(self, fetch_thread):
         if fetch_thread.is_alive():
@@ -55,21 +67,8 @@ class DataManager():
             self.status_manager.remove_status(Status.FETCHING_DATA)
 
     def _gui_set_presets(self):
-        self.gui_data.combobox_data_base['values'] = [
-            'No Preset',
-            'Standard',
-            'Deblurred',
-            'Interpolated',
-            'Debl.-Interp.',
-            'Interp.-Debl.',
-            'Still'
-        ]
-
-        self.gui_data.combobox_data_spotlight['values'] = [
-            'All Spotlight',
-            'With Spotlight',
-            'Without Spotlight'
-        ]
+        self.gui_data.combobox_data_base['values'] = ['No Preset'] + DATA_PRESETS
+        self.gui_data.combobox_data_spotlight['values'] = SPOTLIGHT_PRESETS
 
         self.gui_data.combobox_data_base.current(0)
         self.gui_data.combobox_data_spotlight.current(0)
@@ -89,71 +88,15 @@ class DataManager():
 
     def filter(self, event=None):
         self.selected_data.clear()
-        self.data_show.clear()
         self._gui_get_filter()
-
-        show_standard = self.filter_data_base in ('Standard', 'No Preset')
-        show_deblurred = self.filter_data_base in ('Deblurred', 'No Preset')
-        show_interpolated = self.filter_data_base in ('Interpolated', 'No Preset')
-        show_deblurred_interpolated = self.filter_data_base in ('Debl.-Interp.', 'No Preset')
-        show_interpolated_deblurred = self.filter_data_base in ('Interp.-Debl.', 'No Preset')
-        show_still = self.filter_data_base in ('Still', 'No Preset')
-        hide_spotlight = self.filter_data_spotlight == 'Without Spotlight'
-        hide_no_spotlight = self.filter_data_spotlight == 'With Spotlight'
-
-        for data in self.data_all:
-            if show_standard and not (data.deblurred or data.interpolated or data.deblurred_interpolated or data.interpolated_deblurred or data.still):
-                self.data_show.append(data)
-                continue
-
-            if show_deblurred and data.deblurred:
-                self.data_show.append(data)
-                continue
-
-            if show_interpolated and data.interpolated:
-                self.data_show.append(data)
-                continue
-
-            if show_deblurred_interpolated and data.deblurred_interpolated:
-                self.data_show.append(data)
-                continue
-
-            if show_interpolated_deblurred and data.interpolated_deblurred:
-                self.data_show.append(data)
-                continue
-
-            if show_still and data.still:
-                self.data_show.append(data)
-                continue
-
-        data_to_remove = []
-        for data in self.data_show:
-            if hide_spotlight and data.spotlight:
-                data_to_remove.append(data)
-                continue
-
-            if hide_no_spotlight and not data.spotlight:
-                data_to_remove.append(data)
-                continue
-
-        for data in data_to_remove:
-            self.data_show.remove(data)
-
+        self.data_show = filter_data(self.data_all, self.filter_data_base, self.filter_data_spotlight)
         self._gui_set_data()
 
     def select_all_data(self, event=None):
         self._gui_select_all_data()
 
     def get_existing_dataset(self):
-        selected_data_ids = [data.id for data in self.selected_data]
-        persistent_datasets_file_path = os.path.join(MMPOSE_DATA_DIR, 'persistent_datasets.json')
-        with open(persistent_datasets_file_path, 'r', encoding='utf8') as persistent_datasets_file:
-            persistent_datasets = json.load(persistent_datasets_file)
-            for persistent_dataset in persistent_datasets:
-                run_ids = persistent_dataset['runs']
-                if sorted(run_ids) == sorted(selected_data_ids):
-                    return persistent_dataset['path']
-        return None
+        return find_existing_dataset([data.id for data in self.selected_data])
 
     def data_selected(self, event=None):
         self.selected_data.clear()
@@ -176,3 +119,71 @@ class DataManager():
             'explorer.exe',
             f'\\{WSL_PREFIX}{path}'
         ], check=False)
+
+
+def fetch_all_data():
+    return [Data(d) for d in sorted(glob.glob(os.path.join(MMPOSE_RUNS_DIR, '*')))]
+
+
+def filter_data(data_all, base='No Preset', spotlight='All Spotlight'):
+    # data matching a preset of the data combobox
+    data_show = []
+    show_standard = base in ('Standard', 'No Preset')
+    show_deblurred = base in ('Deblurred', 'No Preset')
+    show_interpolated = base in ('Interpolated', 'No Preset')
+    show_deblurred_interpolated = base in ('Debl.-Interp.', 'No Preset')
+    show_interpolated_deblurred = base in ('Interp.-Debl.', 'No Preset')
+    show_still = base in ('Still', 'No Preset')
+    hide_spotlight = spotlight == 'Without Spotlight'
+    hide_no_spotlight = spotlight == 'With Spotlight'
+
+    for data in data_all:
+        if show_standard and not (data.deblurred or data.interpolated or data.deblurred_interpolated or data.interpolated_deblurred or data.still):
+            data_show.append(data)
+            continue
+
+        if show_deblurred and data.deblurred:
+            data_show.append(data)
+            continue
+
+        if show_interpolated and data.interpolated:
+            data_show.append(data)
+            continue
+
+        if show_deblurred_interpolated and data.deblurred_interpolated:
+            data_show.append(data)
+            continue
+
+        if show_interpolated_deblurred and data.interpolated_deblurred:
+            data_show.append(data)
+            continue
+
+        if show_still and data.still:
+            data_show.append(data)
+            continue
+
+    data_to_remove = []
+    for data in data_show:
+        if hide_spotlight and data.spotlight:
+            data_to_remove.append(data)
+            continue
+
+        if hide_no_spotlight and not data.spotlight:
+            data_to_remove.append(data)
+            continue
+
+    for data in data_to_remove:
+        data_show.remove(data)
+
+    return data_show
+
+
+def find_existing_dataset(data_ids):
+    persistent_datasets_file_path = os.path.join(MMPOSE_DATA_DIR, 'persistent_datasets.json')
+    with open(persistent_datasets_file_path, 'r', encoding='utf8') as persistent_datasets_file:
+        persistent_datasets = json.load(persistent_datasets_file)
+        for persistent_dataset in persistent_datasets:
+            run_ids = persistent_dataset['runs']
+            if sorted(run_ids) == sorted(data_ids):
+                return persistent_dataset['path']
+    return None
@@ -1,8 +1,6 @@
 import os
-import glob
-import json
 import shutil
-import ctypes
+import bisect
 import subprocess
 import tkinter as tk
 from tkinter import messagebox
@@ -17,6 +15,10 @@ from gui.gui_inference import GUIInference
 from manager.status_manager import Status
 from manager.dataset_manager import Datasets
 from data_types.inference import Inference
+from data_types.inference_catalog import InferenceCatalog
+from engine.progress import ProgressChannel, format_progress
+from engine.stage_scheduler import run_inferences
+from engine.stage_checkpoint import find_interrupted_jobs
 
 
 class InferenceManager():
@@ -56,18 +58,22 @@ class InferenceManager():
         self.metric_manager = metric_manager
         self.plot_manager = plot_manager
         self.feature_manager = feature_manager
-        self.active_processes = []
-        self.pending_processes = []
-        self.parallel_processes = 1
+        self.inference_process = None
+        self.inference_states = {}
+        self.scheduler_stats = {}
+        self.progress_channel = ProgressChannel()
+        self.progress_channel.subscribe(self.on_progress_event)
         self.inferences = []
         self.selected_inferences = []
         self.queue_inferences = []
         self.queue_selected_inferences = []
+        self.resumed_datasets = {}
         self.selected_run = None
         self.dataset_type = self.dataset_manager.datasets[Datasets.COCO.value]
-        self.multiprocessing_manager = torch.multiprocessing.Manager()
+        self.inference_catalog = InferenceCatalog()
         self.fetch_inferences()
         torch.multiprocessing.set_start_method('spawn', force=True)
+        self.gui_inference.root.after(0, self.ask_for_ok_resume_inferences)
 
     def fetch_inferences(self):
         if not self.status_manager.has_status(Status.FETCHING_INFERENCES):
@@ -77,15 +83,35 @@ class InferenceManager():
             self.monitor_fetch_inferences(fetch_thread)
 
     def _fetch_inferences(self):
-        inferences = sorted(glob.glob(os.path.join(INFERENCES_DIR, '*')))
-        self.inferences.clear()
-        for inference in inferences:
-            metadata_path = os.path.join(inference, 'metadata.json')
-            if os.path.exists(metadata_path):
-                metadata = open(metadata_path, 'r', encoding='utf8')
-                self.inferences.append(Inference(json.load(metadata)))
+        changed, removed = self.inference_catalog.refresh()
+        known = {inference.id for inference in self.inferences}
+        outdated = set(changed) | set(removed)
+        self.inferences[:] = [inference for inference in self.inferences if inference.id not in outdated]
+        for inference_id in self.inference_catalog.ids():
+            if inference_id in outdated or inference_id not in known:
+                self.inferences.append(Inference(self.inference_catalog.get_metadata(inference_id)))
         self.inferences.sort(key=lambda x: x.name)
 
+    def insert_inference(self, inference_id):
+        if self.status_manager.has_status(Status.FETCHING_INFERENCES):
+            self.gui_inference.root.after(50, lambda: self.insert_inference(inference_id))
+            return
+
+        metadata = self.inference_catalog.update(inference_id)
+        if metadata is None:
+            return
+
+        for i, inference in enumerate(self.inferences):
+            if inference.id == inference_id:
+                del self.inferences[i]
+                self.gui_inference.listbox_inferences.delete(i)
+                break
+
+        inference = Inference(metadata)
+        index = bisect.bisect_right([inference.name for inference in self.inferences], inference.name)
+        self.inferences.insert(index, inference)
+        self.gui_inference.listbox_inferences.insert(index, inference)
+
     def monitor_fetch_inferences(self, thread):
         if thread.is_alive():
             self.gui_inference.root.after(50, lambda: self.monitor_fetch_inferences(thread))
@@ -234,6 +260,7 @@ class InferenceManager():
     def queue_inference_delete(self):
         for inference in self.queue_selected_inferences:
             self.queue_inferences.remove(inference)
+            self.resumed_datasets.pop(inference.id, None)
 
         self._gui_set_queue_inferences()
         self._gui_disable_button_queue_delete()
@@ -260,50 +287,70 @@ class InferenceManager():
             self.status_manager.add_status(Status.INFERING)
 
             existing_dataset = self.data_manager.get_existing_dataset()
-
-            for inference in self.queue_inferences:
-                inference_progress = self.multiprocessing_manager.Value(ctypes.c_wchar_p, '')
-                inference_process = torch.multiprocessing.Process(
-                    target=inference.infer, args=(inference_progress, existing_dataset, self.dataset_type))
-                pending_process = {
-                    'process': inference_process,
-                    'progress': inference_progress,
-                    'inference_id': inference.id
-                }
-                self.pending_processes.append(pending_process)
-
-            for i in range(0, self.parallel_processes):
-                if len(self.pending_processes) >= i + 1:
-                    self.active_processes.append(self.pending_processes[i])
-
-            del self.pending_processes[:len(self.active_processes)]
-
-            for process in self.active_processes:
-                self.start_process(process)
-
-    def start_process(self, process):
-        process['process'].start()
-        self.monitor_inference_process(process)
-
-    def monitor_inference_process(self, process):
-        inference_process = process['process']
-        if inference_process.is_alive():
-            self.gui_inference.root.after(50, lambda: self.monitor_inference_process(process))
-            self._gui_update_inference_progress(process['inference_id'], process['progress'].value)
+            existing_datasets = [self.resumed_datasets.get(inference.id, existing_dataset)
+                                 for inference in self.queue_inferences]
+            self.resumed_datasets = {}
+
+            # all queued inferences run in one process whose stage scheduler overlaps their stages
+            self.inference_states = {inference.id: None for inference in self.queue_inferences}
+            self.scheduler_stats = {}
+
+            self.inference_process = torch.multiprocessing.Process(
+                target=run_inferences,
+                args=(self.queue_inferences,
+                      existing_datasets,
+                      self.dataset_type,
+                      self.progress_channel.events))
+            self.inference_process.start()
+            self.monitor_inference_process()
+
+    def on_progress_event(self, event):
+        match event['type']:
+            case 'progress':
+                self._gui_update_inference_progress(event['inference_id'], format_progress(event))
+            case 'state':
+                self.inference_states[event['inference_id']] = event['state']
+                self._gui_update_inference_progress(event['inference_id'], event['state'])
+                if event['state'] in ('DONE', 'FAILED'):
+                    self.insert_inference(event['inference_id'])
+            case 'scheduler':
+                self.scheduler_stats = event['stats']
+
+    def monitor_inference_process(self):
+        alive = self.inference_process.is_alive()
+        self.progress_channel.poll()
+
+        if alive:
+            self.gui_inference.root.after(50, self.monitor_inference_process)
         else:
-            self.fetch_inferences()
-            self.active_processes.remove(process)
-            if self.pending_processes:
-                self.active_processes.append(self.pending_processes.pop(0))
-                self.start_process(self.active_processes[-1])
-            if not self.active_processes:
-                self.queue_inferences.clear()
-                self._gui_enable_button_infer()
-                self._gui_enable_button_queue_add()
-                self._gui_set_queue_inferences()
-                self.status_manager.remove_status(Status.INFERING)
+            # inferences of a process that died are listed if they got as far as storing their metadata
+            for inference_id, state in self.inference_states.items():
+                if state not in ('DONE', 'FAILED'):
+                    self.insert_inference(inference_id)
+            self.inference_process = None
+            self.queue_inferences.clear()
+            self._gui_enable_button_infer()
+            self._gui_enable_button_queue_add()
+            self._gui_set_queue_inferences()
+            self.status_manager.remove_status(Status.INFERING)
+
+    def ask_for_ok_resume_inferences(self):
+        # inferences whose process died are continued from their last completed stage
+        jobs = find_interrupted_jobs()
+        if not jobs:
+            return
+
+        names = ', '.join(inference.name for inference, _ in jobs)
+        answer = messagebox.askyesno('Resume inferences', f'Resume {len(jobs)} interrupted inferences ({names})?')
+        if answer:
+            for inference, existing_dataset in jobs:
+                self.queue_inferences.append(inference)
+                self.resumed_datasets[inference.id] = existing_dataset
+            self._gui_set_queue_inferences()
 
     def inference_id_taken(self, id_):
+        if os.path.exists(os.path.join(INFERENCES_DIR, id_)):
+            return True
         for inference in self.inferences:
             if inference.id == id_:
                 return True
@@ -343,8 +390,7 @@ class InferenceManager():
         data_id = int(selection_str[0:3])
         run_id = data_id
 
-        run = next(run for run in selected_inference.runs if run.id == run_id)
-        self.selected_run = run
+        self.selected_run = selected_inference.get_run(run_id)
         self.feature_manager.set_data(self.selected_run, selected_inference.name)
         self.metric_manager.set_data(self.selected_run)
 
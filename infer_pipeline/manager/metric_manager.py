@@ -8,6 +8,7 @@ import matplotlib.pyplot as plt
 
 from manager.status_manager import Status
 from gui.gui_metric import GUIMetric
+from data_types.feature import group_by_length
 from manager.dataset_manager import KeypointsNoMetric
 from metrics.all_metrics import AllMetrics
 from metrics.missing_pose_estimations import MissingPoseEstimations
@@ -19,6 +20,21 @@ from metrics.fft import FFT
 from metrics.instantaneous_frequency import InstantaneousFrequency
 
 
+def calculate_batched(metric, features, values=None):
+    # features of the same length are calculated in one batch, the metrics are in the order of the features.
+    # values are the stacked values of the metrics calculated before, one row per feature
+    metrics = [None] * len(features)
+    for indices in group_by_length(features).values():
+        batch = [features[i] for i in indices]
+        if values is None:
+            batch_metrics = metric.calculate_batch(batch)
+        else:
+            batch_metrics = metric.calculate_batch(batch, values=values[indices])
+        for i, feature_metric in zip(indices, batch_metrics):
+            metrics[i] = feature_metric
+    return metrics
+
+
 class CalculableMetrics(Enum):
     DELTAS = AllMetrics.DELTAS.value
     PEAKS = AllMetrics.PEAKS.value
@@ -38,9 +54,9 @@ class InferenceMetrics():
     def calculate(self):
         self.features = [f for f in self.features if not KeypointsNoMetric.has_value(f.name[:-2])]
         highpass_total = []
-        for feature in self.features:
-            highpass = Highpass(parameters={'Order': '4', 'Cutoff Freq.': '10',
-                                            'Sample Freq.': '25', 'Zeroing Thr.': ''}).calculate(feature)
+        highpasses = calculate_batched(Highpass(parameters={'Order': '4', 'Cutoff Freq.': '10',
+                                                            'Sample Freq.': '25', 'Zeroing Thr.': ''}), self.features)
+        for highpass in highpasses:
             # concatenation is valid, since standard deviation is a point-based metric
             highpass_total += highpass.values_abs
         StandardMetrics.highpass_zeroing_threshold = np.std(highpass_total) / 2
@@ -49,29 +65,32 @@ class InferenceMetrics():
 class StandardMetrics():
     highpass_zeroing_threshold = 5.0
 
-    def __init__(self):
+    def __init__(self, highpass_zeroing_threshold=None):
+        if highpass_zeroing_threshold is None:
+            highpass_zeroing_threshold = StandardMetrics.highpass_zeroing_threshold
         self.metrics = [
             MissingPoseEstimations(),
             Deltas(),
             Highpass(parameters={'Order': '4', 'Cutoff Freq.': '10',
-                     'Sample Freq.': '25', 'Zeroing Thr.': str(StandardMetrics.highpass_zeroing_threshold)}),
+                     'Sample Freq.': '25', 'Zeroing Thr.': str(highpass_zeroing_threshold)}),
             Lowpass(parameters={'Order': '4', 'Cutoff Freq.': '2', 'Sample Freq.': '25'}),
             FFT()
         ]
 
 
 class RunMetrics():
-    def __init__(self, features):
+    def __init__(self, features, highpass_zeroing_threshold=None):
         self.features = features
         self.features = [f for f in self.features if not KeypointsNoMetric.has_value(f.name[:-2])]
+        self.highpass_zeroing_threshold = highpass_zeroing_threshold
         self.metrics = {}
 
-    def calculate(self):
-        standard_metrics = StandardMetrics()
+    def calculate(self, values=None):
+        # values: metric name -> stacked values of the metric calculated before, e.g. stored with a columnar run
+        values = values or {}
+        standard_metrics = StandardMetrics(self.highpass_zeroing_threshold)
         for metric in standard_metrics.metrics:
-            self.metrics[metric.name] = []
-            for feature in self.features:
-                self.metrics[metric.name].append(metric.calculate(feature))
+            self.metrics[metric.name] = calculate_batched(metric, self.features, values.get(metric.name))
 
         return self.metrics
 
@@ -157,13 +176,11 @@ class MetricManager():
         ffts_frequencies = []
         ffts_values = []
         total_fft_frequencies = []
-        for feature in features:
-            fft = FFT().calculate(feature)
+        for fft, delta in zip(calculate_batched(FFT(), features), calculate_batched(Deltas(), features)):
             total_fft_frequencies += fft.steps.copy()
             ffts_frequencies.append(fft.steps.copy())
             ffts_values.append(fft.values.copy())
 
-            delta = Deltas().calculate(feature)
             deltas += delta.values
 
         f_vector = np.arange(-12.5, 12.6, 0.1)
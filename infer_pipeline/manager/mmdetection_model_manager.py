@@ -8,6 +8,8 @@ from data_types.mmdetection_model import MMDetectionModel
 from common import TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR
 from common import INFER_PIPELINE_MMDETECTION_CONFIGS_DIR
 
+DEFAULT_MMDETECTION_MODEL = 'VarifocalNet'
+
 
 class MMDetectionModelManager():
     def __init__(self, root, status_manager):
@@ -21,43 +23,8 @@ class MMDetectionModelManager():
         if not self.status_manager.has_status(Status.FETCHING_MMDETECTION_MODELS):
             self.status_manager.add_status(Status.FETCHING_MMDETECTION_MODELS)
 
-            self.models.append(MMDetectionModel(
-                name='Faster R-CNN',
-                key_metric_value=0.921,
-                key_metric_name='box AP',
-                checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'faster_rcnn',
-                                        'faster-rcnn', 'train', 'best_coco_bbox_mAP_epoch_14.pth'),
-                config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'faster-rcnn.py')))
-            self.models.append(MMDetectionModel(
-                name='RTMDet',
-                key_metric_value=0.952,
-                key_metric_name='box AP',
-                checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'rtmdet',
-                                        'rtmdet', 'train', 'best_coco_bbox_mAP_epoch_37.pth'),
-                config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'rtmdet.py')))
-            self.models.append(MMDetectionModel(
-                name='YOLOX',
-                key_metric_value=0.947,
-                key_metric_name='box AP',
-                checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'yolox', 'yolox',
-                                        'train', 'best_coco_bbox_mAP_epoch_62.pth'),
-                config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'yolox.py')))
-            self.models.append(MMDetectionModel(
-                name='VarifocalNet',
-                key_metric_value=0.966,
-                key_metric_name='box AP',
-                checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'vfnet',
-                                        'vfnet', 'train', 'best_coco_bbox_mAP_epoch_20.pth'),
-                config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'vfnet.py')))
-            self.models.append(MMDetectionModel(
-                name='TOOD',
-                key_metric_value=0.966,
-                key_metric_name='box AP',
-                checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'tood',
-                                        'tood', 'train', 'best_coco_bbox_mAP_epoch_22.pth'),
-                config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'tood.py')))
-
-            self.default_model = self.models[3]
+            self.models.extend(get_mmdetection_models())
+            self.default_model = next(model for model in self.models if model.name == DEFAULT_MMDETECTION_MODEL)
 
             self._gui_set_models()
             self.status_manager.remove_status(Status.FETCHING_MMDETECTION_MODELS)
@@ -81,3 +48,44 @@ class MMDetectionModelManager():
         self.selected_model = next(model for model in self.models if model == selected_model)
 
         self._gui_set_details()
+
+
+def get_mmdetection_models():
+    models = []
+    models.append(MMDetectionModel(
+        name='Faster R-CNN',
+        key_metric_value=0.921,
+        key_metric_name='box AP',
+        checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'faster_rcnn',
+                                'faster-rcnn', 'train', 'best_coco_bbox_mAP_epoch_14.pth'),
+        config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'faster-rcnn.py')))
+    models.append(MMDetectionModel(
+        name='RTMDet',
+        key_metric_value=0.952,
+        key_metric_name='box AP',
+        checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'rtmdet',
+                                'rtmdet', 'train', 'best_coco_bbox_mAP_epoch_37.pth'),
+        config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'rtmdet.py')))
+    models.append(MMDetectionModel(
+        name='YOLOX',
+        key_metric_value=0.947,
+        key_metric_name='box AP',
+        checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'yolox', 'yolox',
+                                'train', 'best_coco_bbox_mAP_epoch_62.pth'),
+        config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'yolox.py')))
+    models.append(MMDetectionModel(
+        name='VarifocalNet',
+        key_metric_value=0.966,
+        key_metric_name='box AP',
+        checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'vfnet',
+                                'vfnet', 'train', 'best_coco_bbox_mAP_epoch_20.pth'),
+        config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'vfnet.py')))
+    models.append(MMDetectionModel(
+        name='TOOD',
+        key_metric_value=0.966,
+        key_metric_name='box AP',
+        checkpoint=os.path.join(TRAIN_PIPELINE_MMDETECTION_TRAININGS_DIR, 'tood',
+                                'tood', 'train', 'best_coco_bbox_mAP_epoch_22.pth'),
+        config=os.path.join(INFER_PIPELINE_MMDETECTION_CONFIGS_DIR, 'tood.py')))
+
+    return models
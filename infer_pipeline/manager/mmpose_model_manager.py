@@ -23,29 +23,7 @@ class MMPoseModelManager():
         self.status_manager = status_manager
         self.model_zoo = ModelZoo(redownload_model_zoo=False)
         self.zoo_models = []
-        self.custom_models_init = [
-            MMPoseModel(
-                section='Posewarper + Hrnet + Posetrack18',
-                arch='pose_hrnet_w48',
-                dataset='posetrack18',
-                input_size='384x288',
-                key_metric_value=85.0,
-                key_metric_name='Total',
-                checkpoint=os.path.join(MMPOSE029_CHECKPOINTS_DIR,
-                                        'hrnet_w48_posetrack18_384x288_posewarper_stage2-4abf88db_20211130.pth'),
-                config=os.path.join(
-                    MMPOSE029_CONFIGS_DIR,
-                    'body',
-                    '2d_kpt_sview_rgb_vid',
-                    'posewarper',
-                    'posetrack18',
-                    'hrnet_w48_posetrack18_384x288_posewarper_stage2.py'
-                ),
-                transfer_learned=False,
-                multi_frame_mmpose029=True
-            ),
-            # add self-trained model (best model according to COCO or to our metrics)
-        ]
+        self.custom_models_init = get_custom_mmpose_models()
         self.custom_models = self.custom_models_init.copy()
         self.models_show = []
         self.selected_model = None
@@ -80,76 +58,7 @@ class MMPoseModelManager():
             self.status_manager.remove_status(Status.FETCHING_MMPOSE_MODELS)
 
     def fetch_custom_models(self):
-        unavailable_checkpoints = ['td-hm_hrnet-w32_8xb64-210e_coco-aic-256x192-merge-b05435b9_20221025.pth']
-
-        sections = set()
-        for model in self.zoo_models:
-            sections.add(model.section)
-
-        models_per_section = {}
-        for section in sections:
-            models_per_section[section] = []
-
-        for model in self.zoo_models:
-            models_per_section[model.section].append(model)
-
-        best_models = []
-        for _, models in models_per_section.items():
-            models.sort(key=lambda x: x.key_metric_value, reverse=True)
-            best_models.append(models[0])
-
-        best_models.sort(key=lambda x: x.key_metric_value, reverse=True)
-        bottom_up_models = []
-        top_down_models = []
-        for model in best_models:
-            config_name = os.path.basename(model.config)
-            config = imp.load_source(config_name, os.path.join(MMPOSE_DIR, model.config))
-            if hasattr(config, 'data_mode'):
-                data_mode = config.data_mode
-                if data_mode == 'topdown':
-                    top_down_models.append(model)
-                if data_mode == 'bottomup':
-                    bottom_up_models.append(model)
-
-        top_down_models = [model for model in top_down_models if model.checkpoint not in unavailable_checkpoints]
-        top_down_models = top_down_models[:10]
-
-        bottom_up_models = [model for model in bottom_up_models if model.checkpoint not in unavailable_checkpoints]
-        bottom_up_models = bottom_up_models[:10]
-
-        for model in top_down_models:
-            model.config = self.create_custom_config(model, data_mode='topdown')
-            model.checkpoint = os.path.join(MMPOSE_CHECKPOINTS_DIR, model.checkpoint)
-            self.custom_models.append(model)
-
-        for model in bottom_up_models:
-            model.config = self.create_custom_config(model, data_mode='bottomup')
-            model.checkpoint = os.path.join(MMPOSE_CHECKPOINTS_DIR, model.checkpoint)
-            self.custom_models.append(model)
-
-    def create_custom_config(self, model, data_mode):
-        config_name = os.path.basename(model.config)
-        config = imp.load_source(config_name, os.path.join(MMPOSE_DIR, model.config))
-        if hasattr(config, 'test_dataloader'):
-            batch_size = config.test_dataloader['batch_size']
-            if batch_size != 1:
-                batch_size = 64
-        else:
-            batch_size = 64
-
-        custom_config = os.path.join(INFER_PIPELINE_MMDPOSE_CONFIGS_DIR,
-                                     os.path.basename(model.config).replace('coco', 'sc'))
-
-        with open(custom_config, 'w', encoding='utf8') as config_file:
-            config_file.write(f"_base_ = ['{os.path.join(MMPOSE_DIR, model.config)}']\n")
-            config_file.write(
-                f"test_dataloader = dict(batch_size={batch_size}, dataset=dict(data_root='', ann_file='', bbox_file=None, data_prefix=dict(img='')))\n")
-            config_file.write("test_evaluator = dict(format_only=True)\n")
-            config_file.write("default_hooks = dict(logger=dict(interval=1))\n")
-            config_file.write(f"data_mode = '{data_mode}'")
-
-        config_file.close()
-        return custom_config
+        self.custom_models.extend(get_zoo_mmpose_models(self.zoo_models))
 
     def _gui_clear_listbox_models(self):
         self.gui_mmpose_model.listbox_models.delete(0, tk.END)
@@ -191,3 +100,107 @@ class MMPoseModelManager():
         self.selected_model = next(model for model in self.models_show if model == selected_model)
 
         self._gui_set_details()
+
+
+def get_custom_mmpose_models():
+    return [
+        MMPoseModel(
+            section='Posewarper + Hrnet + Posetrack18',
+            arch='pose_hrnet_w48',
+            dataset='posetrack18',
+            input_size='384x288',
+            key_metric_value=85.0,
+            key_metric_name='Total',
+            checkpoint=os.path.join(MMPOSE029_CHECKPOINTS_DIR,
+                                    'hrnet_w48_posetrack18_384x288_posewarper_stage2-4abf88db_20211130.pth'),
+            config=os.path.join(
+                MMPOSE029_CONFIGS_DIR,
+                'body',
+                '2d_kpt_sview_rgb_vid',
+                'posewarper',
+                'posetrack18',
+                'hrnet_w48_posetrack18_384x288_posewarper_stage2.py'
+            ),
+            transfer_learned=False,
+            multi_frame_mmpose029=True
+        ),
+        # add self-trained model (best model according to COCO or to our metrics)
+    ]
+
+
+def get_zoo_mmpose_models(zoo_models):
+    # the best model of each section of the model zoo, at most ten top-down and ten bottom-up models
+    unavailable_checkpoints = ['td-hm_hrnet-w32_8xb64-210e_coco-aic-256x192-merge-b05435b9_20221025.pth']
+
+    sections = set()
+    for model in zoo_models:
+        sections.add(model.section)
+
+    models_per_section = {}
+    for section in sections:
+        models_per_section[section] = []
+
+    for model in zoo_models:
+        models_per_section[model.section].append(model)
+
+    best_models = []
+    for _, models in models_per_section.items():
+        models.sort(key=lambda x: x.key_metric_value, reverse=True)
+        best_models.append(models[0])
+
+    best_models.sort(key=lambda x: x.key_metric_value, reverse=True)
+    bottom_up_models = []
+    top_down_models = []
+    for model in best_models:
+        config_name = os.path.basename(model.config)
+        config = imp.load_source(config_name, os.path.join(MMPOSE_DIR, model.config))
+        if hasattr(config, 'data_mode'):
+            data_mode = config.data_mode
+            if data_mode == 'topdown':
+                top_down_models.append(model)
+            if data_mode == 'bottomup':
+                bottom_up_models.append(model)
+
+    top_down_models = [model for model in top_down_models if model.checkpoint not in unavailable_checkpoints]
+    top_down_models = top_down_models[:10]
+
+    bottom_up_models = [model for model in bottom_up_models if model.checkpoint not in unavailable_checkpoints]
+    bottom_up_models = bottom_up_models[:10]
+
+    custom_models = []
+    for model in top_down_models:
+        model.config = create_custom_config(model, data_mode='topdown')
+        model.checkpoint = os.path.join(MMPOSE_CHECKPOINTS_DIR, model.checkpoint)
+        custom_models.append(model)
+
+    for model in bottom_up_models:
+        model.config = create_custom_config(model, data_mode='bottomup')
+        model.checkpoint = os.path.join(MMPOSE_CHECKPOINTS_DIR, model.checkpoint)
+        custom_models.append(model)
+
+    return custom_models
+
+
+def create_custom_config(model, data_mode):
+    config_name = os.path.basename(model.config)
+    config = imp.load_source(config_name, os.path.join(MMPOSE_DIR, model.config))
+    if hasattr(config, 'test_dataloader'):
+        batch_size = config.test_dataloader['batch_size']
+        if batch_size != 1:
+            batch_size = 64
+    else:
+        batch_size = 64
+
+    custom_config = os.path.join(INFER_PIPELINE_MMDPOSE_CONFIGS_DIR,
+                                 os.path.basename(model.config).replace('coco', 'sc'))
+
+    with open(custom_config, 'w', encoding='utf8') as config_file:
+        config_file.write(f"_base_ = ['{os.path.join(MMPOSE_DIR, model.config)}']\n")
+        config_file.write(
+            f"test_dataloader = dict(batch_size={batch_size}, dataset=dict(data_root='', ann_file='', bbox_file=None, data_prefix=dict(img='')))\n")
+        config_file.write("test_evaluator = dict(format_only=True)\n")
+        config_file.write("default_hooks = dict(logger=dict(interval=1))\n")
+        config_file.write(f"data_mode = '{data_mode}'")
+
+    config_file.close()
+    return custom_config
@@ -1,6 +1,7 @@
 import numpy as np
 
 from metrics.all_metrics import AllMetrics
+from data_types.feature import stack_values
 from data_types.plottable import Plottable, PlottableTypes
 
 
@@ -35,33 +36,43 @@ class Deltas():
     def calculate(self, feature, calculate_on=None, parameters=None):
         if calculate_on is None:
             calculate_on = feature
+        return self.calculate_batch([feature], [calculate_on], parameters)[0]
+
+    def calculate_batch(self, features, calculate_ons=None, parameters=None, values=None):
+        # features of the same length, calculated together along the last axis. values are the stacked values of
+        # metrics calculated before, e.g. stored with a columnar run, they are used instead of calculating them again
+        calculate_ons = calculate_ons or features
 
         if self.parameters:
             parameters = self.parameters
 
-        steps = calculate_on.steps.copy()
-        if hasattr(calculate_on, 'values_interp') and calculate_on.values_interp:
-            values = np.diff(calculate_on.values_interp.copy()).tolist()
+        if values is None:
+            deltas = np.diff(stack_values(calculate_ons), axis=-1)
         else:
-            values = np.diff(calculate_on.values.copy()).tolist()
-        sum_ = np.sum(np.abs(values))
-        mean = np.mean(values)
-        stdd = np.std(values)
-        values.insert(0, 0)
-        list_name = self.name + f' ({round(sum_, 3)}/{round(mean, 3)}/{round(stdd, 3)})'
-        display_values = [sum_, mean, stdd]
+            deltas = np.array(values, dtype=np.float64)[:, 1:]
+        sums = np.sum(np.abs(deltas), axis=-1)
+        means = np.mean(deltas, axis=-1)
+        stdds = np.std(deltas, axis=-1)
+
+        metrics = []
+        for feature, calculate_on, feature_deltas, sum_, mean, stdd in zip(
+                features, calculate_ons, deltas, sums, means, stdds):
+            values = [0] + feature_deltas.tolist()
+            list_name = self.name + f' ({round(sum_, 3)}/{round(mean, 3)}/{round(stdd, 3)})'
+            display_values = [sum_, mean, stdd]
 
-        return Deltas(
-            name=self.name,
-            steps=steps,
-            values=values,
-            mean=mean,
-            stdd=stdd,
-            feature=feature,
-            calculate_on=calculate_on,
-            list_name=list_name,
-            display_values=display_values,
-        )
+            metrics.append(Deltas(
+                name=self.name,
+                steps=calculate_on.steps.copy(),
+                values=values,
+                mean=mean,
+                stdd=stdd,
+                feature=feature,
+                calculate_on=calculate_on,
+                list_name=list_name,
+                display_values=display_values,
+            ))
+        return metrics
 
     def plottables(self, name=None, legend=None):
         if self.steps:
@@ -2,6 +2,7 @@ import numpy as np
 from scipy.fft import fft, fftfreq, fftshift
 
 from metrics.all_metrics import AllMetrics
+from data_types.feature import stack_values
 from data_types.plottable import Plottable, PlottableTypes
 
 
@@ -31,33 +32,36 @@ class FFT():
     def calculate(self, feature, calculate_on=None, parameters=None):
         if calculate_on is None:
             calculate_on = feature
+        return self.calculate_batch([feature], [calculate_on], parameters)[0]
+
+    def calculate_batch(self, features, calculate_ons=None, parameters=None, values=None):
+        # features of the same length, calculated together along the last axis. values are the stacked values of
+        # metrics calculated before, e.g. stored with a columnar run, they are used instead of calculating them again
+        calculate_ons = calculate_ons or features
 
         if self.parameters:
             parameters = self.parameters
 
-        n = len(calculate_on.steps.copy())
-        d = 1 / feature.fps
-        steps = fftfreq(n, d)
-        if hasattr(calculate_on, 'values_interp') and calculate_on.values_interp:
-            values = fft(calculate_on.values_interp.copy())
-        else:
-            values = fft(calculate_on.values.copy())
+        n = len(calculate_ons[0].steps)
+        if values is None:
+            values = fft(stack_values(calculate_ons), axis=-1)
 
-        values = 2.0/n * np.abs(values)
+            values = 2.0/n * np.abs(values)
 
-        steps = fftshift(steps).tolist()
-        values = fftshift(values).tolist()
+            values = fftshift(values, axes=-1)
+        else:
+            values = np.array(values, dtype=np.float64)
 
         list_name = self.name
 
-        return FFT(
+        return [FFT(
             name=self.name,
-            steps=steps,
-            values=values,
+            steps=fftshift(fftfreq(n, 1 / feature.fps)).tolist(),
+            values=feature_values.tolist(),
             feature=feature,
             calculate_on=calculate_on,
             list_name=list_name,
-        )
+        ) for feature, calculate_on, feature_values in zip(features, calculate_ons, values)]
 
     def plottables(self, name=None, legend=None):
         if self.steps:
@@ -3,6 +3,7 @@ import numpy as np
 from scipy.signal import butter, filtfilt, savgol_filter
 
 from metrics.all_metrics import AllMetrics
+from data_types.feature import stack_values
 from data_types.plottable import Plottable, PlottableTypes
 
 
@@ -49,6 +50,12 @@ class Highpass():
     def calculate(self, feature, calculate_on=None, parameters=None):
         if calculate_on is None:
             calculate_on = feature
+        return self.calculate_batch([feature], [calculate_on], parameters)[0]
+
+    def calculate_batch(self, features, calculate_ons=None, parameters=None, values=None):
+        # features of the same length, calculated together along the last axis. values are the stacked values of
+        # metrics calculated before, e.g. stored with a columnar run, they are used instead of calculating them again
+        calculate_ons = calculate_ons or features
 
         if self.parameters:
             parameters = self.parameters
@@ -75,15 +82,19 @@ class Highpass():
             func_params.append(None)
             zeroing_threshold = 5.0
 
-        b, a = butter(*func_params)
-        steps = calculate_on.steps.copy()
-        if hasattr(calculate_on, 'values_interp') and calculate_on.values_interp:
-            values = filtfilt(b, a, calculate_on.values_interp.copy())
+        if values is None:
+            b, a = butter(*func_params)
+            values = filtfilt(b, a, stack_values(calculate_ons), axis=-1)
         else:
-            values = filtfilt(b, a, calculate_on.values.copy())
+            values = np.array(values, dtype=np.float64)
+        means = np.mean(np.abs(values), axis=-1)
+        stds = np.std(np.abs(values), axis=-1)
+        return [self._create(feature, calculate_on, calculate_on.steps.copy(), feature_values,
+                             [mean, std], parameters, func_params)
+                for feature, calculate_on, feature_values, mean, std in zip(features, calculate_ons, values, means, stds)]
 
+    def _create(self, feature, calculate_on, steps, values, display_values, parameters, func_params):
         values_abs = list(abs(values))
-        display_values = [np.mean(values_abs), np.std(values_abs)]
 
         """
         values_zeroed = []
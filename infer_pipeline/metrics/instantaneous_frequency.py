@@ -2,6 +2,7 @@ import numpy as np
 from scipy.signal import hilbert
 
 from metrics.all_metrics import AllMetrics
+from data_types.feature import values_of
 from data_types.plottable import Plottable, PlottableTypes
 
 
@@ -37,10 +38,7 @@ class InstantaneousFrequency():
             parameters = self.parameters
 
         steps = calculate_on.steps.copy()[1:]
-        if hasattr(calculate_on, 'values_interp') and calculate_on.values_interp:
-            analytic_signal = hilbert(calculate_on.values_interp.copy())
-        else:
-            analytic_signal = hilbert(calculate_on.values.copy())
+        analytic_signal = hilbert(values_of(calculate_on))
 
         instantaneous_phase = np.unwrap(np.angle(analytic_signal))
         instantaneous_frequency = (np.diff(instantaneous_phase) / (2.0*np.pi) * feature.fps)
@@ -1,6 +1,8 @@
+import numpy as np
 from scipy.signal import butter, filtfilt
 
 from metrics.all_metrics import AllMetrics
+from data_types.feature import stack_values
 from data_types.plottable import Plottable, PlottableTypes
 
 
@@ -37,6 +39,12 @@ class Lowpass():
     def calculate(self, feature, calculate_on=None, parameters=None):
         if calculate_on is None:
             calculate_on = feature
+        return self.calculate_batch([feature], [calculate_on], parameters)[0]
+
+    def calculate_batch(self, features, calculate_ons=None, parameters=None, values=None):
+        # features of the same length, calculated together along the last axis. values are the stacked values of
+        # metrics calculated before, e.g. stored with a columnar run, they are used instead of calculating them again
+        calculate_ons = calculate_ons or features
 
         if self.parameters:
             parameters = self.parameters
@@ -60,25 +68,24 @@ class Lowpass():
             func_params.append('ba')
             func_params.append(None)
 
-        b, a = butter(*func_params)
-        steps = calculate_on.steps.copy()
-        if hasattr(calculate_on, 'values_interp') and calculate_on.values_interp:
-            values = filtfilt(b, a, calculate_on.values_interp.copy())
+        if values is None:
+            b, a = butter(*func_params)
+            values = filtfilt(b, a, stack_values(calculate_ons), axis=-1)
         else:
-            values = filtfilt(b, a, calculate_on.values.copy())
+            values = np.array(values, dtype=np.float64)
 
         list_name = self.name
 
-        return Lowpass(
+        return [Lowpass(
             name=self.name,
-            steps=steps,
-            values=values,
+            steps=calculate_on.steps.copy(),
+            values=feature_values,
             feature=feature,
             calculate_on=calculate_on,
             list_name=list_name,
             parameters=parameters,
             func_params=func_params
-        )
+        ) for feature, calculate_on, feature_values in zip(features, calculate_ons, values)]
 
     def process_parameter(self, parameter, dtype):
         parameter.replace(' ', '')
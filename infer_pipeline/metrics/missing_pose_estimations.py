@@ -1,3 +1,5 @@
+import numpy as np
+
 from metrics.all_metrics import AllMetrics
 from data_types.plottable import Plottable, PlottableTypes
 
@@ -30,28 +32,32 @@ class MissingPoseEstimations():
 
     def calculate(self, feature, calculate_on=None, parameters=None):
         assert calculate_on is None and parameters is None
+        return self.calculate_batch([feature])[0]
 
-        feature_values = feature.values.copy()
-        feature_values_interp = feature.values_interp.copy()
-        steps = [i for i, v in enumerate(feature_values) if v == -1]
-        count = len(steps)
-        if steps:
-            values = [i for j, i in enumerate(feature_values_interp) if j in steps]
-        else:
-            values = []
-        list_name = self.name + f' ({count})'
-        display_values = [count]
+    def calculate_batch(self, features, calculate_ons=None, parameters=None):
+        assert calculate_ons is None and parameters is None
+
+        missing = np.array([feature.array('values') for feature in features]) == -1
+        metrics = []
+        for feature, feature_missing in zip(features, missing):
+            steps = np.flatnonzero(feature_missing)
+            count = len(steps)
+            values_interp = feature.array('values_interp')
+            values = values_interp[steps].tolist() if len(values_interp) and count else []
+            list_name = self.name + f' ({count})'
+            display_values = [count]
 
-        return MissingPoseEstimations(
-            name=self.name,
-            steps=steps,
-            values=values,
-            count=count,
-            feature=feature,
-            calculate_on=feature,
-            list_name=list_name,
-            display_values=display_values,
-        )
+            metrics.append(MissingPoseEstimations(
+                name=self.name,
+                steps=steps.tolist(),
+                values=values,
+                count=count,
+                feature=feature,
+                calculate_on=feature,
+                list_name=list_name,
+                display_values=display_values,
+            ))
+        return metrics
 
     def plottables(self, name=None, legend=None):
         if self.steps:
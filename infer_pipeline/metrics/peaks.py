@@ -1,6 +1,8 @@
+import numpy as np
 from scipy.signal import find_peaks
 
 from metrics.all_metrics import AllMetrics
+from data_types.feature import values_of
 from data_types.plottable import Plottable, PlottableTypes
 
 
@@ -70,16 +72,12 @@ class Peaks():
         else:
             func_params = [None for _ in range(0, len(Peaks.parameter_names))]
 
-        if hasattr(calculate_on, 'values_interp') and calculate_on.values_interp:
-            values_positive = calculate_on.values_interp.copy()
-        else:
-            values_positive = calculate_on.copy()
-
-        values_negative = [-v for v in values_positive]
+        values_positive = values_of(calculate_on)
+        values_negative = -values_positive
         steps_positive, positive_stats = find_peaks(values_positive, *func_params)
         steps_negative, negative_stats = find_peaks(values_negative, *func_params)
         steps = sorted(set(steps_positive.tolist() + steps_negative.tolist()))
-        values = [i for j, i in enumerate(values_positive) if j in steps]
+        values = values_positive[np.array(steps, dtype=int)].tolist()
         count = len(steps)
         list_name = self.name + f' ({count})'
         display_values = [count]
@@ -0,0 +1,221 @@
+import os
+import sys
+import csv
+import json
+import hashlib
+import argparse
+from statistics import mean
+
+from utils import id_generator
+from common import INFERENCES_DIR
+from model_zoo import ModelZoo
+from data_types.inference import Inference
+from data_types.inference_catalog import InferenceCatalog
+from manager.data_manager import DATA_PRESETS, fetch_all_data, filter_data, find_existing_dataset
+from manager.mmpose_model_manager import get_custom_mmpose_models, get_zoo_mmpose_models
+from manager.mmdetection_model_manager import get_mmdetection_models, DEFAULT_MMDETECTION_MODEL
+from batch import JobSpecError, parse_concurrency, run_batch
+
+
+def job_fingerprint(pose_config, pose_checkpoint, detection_config, detection_checkpoint, data_ids):
+    fingerprint = [pose_config, pose_checkpoint, detection_config, detection_checkpoint, sorted(int(id_) for id_ in data_ids)]
+    return hashlib.sha1(json.dumps(fingerprint).encode()).hexdigest()
+
+
+def metadata_fingerprint(metadata):
+    return job_fingerprint(metadata['mmpose_model_config'], metadata['mmpose_model_checkpoint'],
+                           metadata['mmdetection_model_config'], metadata['mmdetection_model_checkpoint'],
+                           metadata['data'])
+
+
+class SweepJob():
+    def __init__(self, model, preset, data, detection_model):
+        self.model = model
+        self.preset = preset
+        self.data = data
+        self.detection_model = detection_model
+        self.n_images = sum(d.n_images for d in data)
+        self.fingerprint = job_fingerprint(model.config, model.checkpoint, detection_model.config,
+                                           detection_model.checkpoint, [d.id for d in data])
+        self.pose_estimation_cost = None
+        self.detection_cost = None
+        self.inference_id = None
+        self.state = None
+
+
+class DurationHistory():
+    # mean seconds per image of the stored inferences, per pose estimation and per detection config. detections
+    # that were fully taken from the cache or a persistent dataset are left out
+    def __init__(self, metadatas):
+        pose_estimation = {}
+        detection = {}
+        for metadata in metadatas:
+            if metadata.get('pose_estimation_duration'):
+                pose_estimation.setdefault(metadata['mmpose_model_config'], []).append(
+                    metadata['pose_estimation_duration'][2])
+            if metadata.get('detection_duration') and metadata['detection_duration'][2] > 0:
+                detection.setdefault(metadata['mmdetection_model_config'], []).append(
+                    metadata['detection_duration'][2])
+        self.pose_estimation = {config: mean(durations) for config, durations in pose_estimation.items()}
+        self.detection = {config: mean(durations) for config, durations in detection.items()}
+
+    def pose_estimation_per_image(self, config):
+        # models without history are assumed to be as fast as the average model
+        return self.pose_estimation.get(config, mean(self.pose_estimation.values()) if self.pose_estimation else 1.0)
+
+    def detection_per_image(self, config):
+        return self.detection.get(config, mean(self.detection.values()) if self.detection else 1.0)
+
+
+def expand_jobs(models, presets, spotlight, detection_model, data_all):
+    jobs = []
+    for preset in presets:
+        data = filter_data(data_all, preset, spotlight)
+        if not data:
+            continue
+        for model in models:
+            jobs.append(SweepJob(model, preset, data, detection_model))
+    return jobs
+
+
+def order_jobs(jobs, history):
+    # jobs on the same data share their detection, so they are kept together and the data with the longest total
+    # duration comes first. within the data the longest pose estimation comes first and runs the shared detection
+    groups = {}
+    for job in jobs:
+        job.pose_estimation_cost = job.n_images * history.pose_estimation_per_image(job.model.config)
+        job.detection_cost = job.n_images * history.detection_per_image(job.detection_model.config)
+        groups.setdefault(job.preset, []).append(job)
+
+    for group in groups.values():
+        group.sort(key=lambda job: job.pose_estimation_cost, reverse=True)
+        for job in group[1:]:
+            job.detection_cost = 0
+    ordered_groups = sorted(groups.values(), reverse=True,
+                            key=lambda group: sum(job.detection_cost + job.pose_estimation_cost for job in group))
+    return [job for group in ordered_groups for job in group]
+
+
+def create_inference(job, sweep_id, taken_names):
+    inference_id = id_generator()
+    while os.path.exists(os.path.join(INFERENCES_DIR, inference_id)):
+        inference_id = id_generator()
+
+    name = f'{job.model.arch} {job.model.input_size} - {job.preset}'
+    if name in taken_names:
+        name += f' ({inference_id})'
+    taken_names.add(name)
+
+    job.inference_id = inference_id
+    return Inference(metadata={
+        'id': inference_id,
+        'name': name,
+        'mmpose_model': job.model,
+        'mmdetection_model': job.detection_model,
+        'data': job.data,
+        'description': f'Sweep {sweep_id}: {job.model.section} on {job.preset} data.'
+    })
+
+
+def summary_rows(jobs, catalog):
+    rows = []
+    for job in jobs:
+        metadata = catalog.get_metadata(job.inference_id) if job.inference_id is not None else None
+        metadata = metadata or {}
+        detection_duration = metadata.get('detection_duration')
+        pose_estimation_duration = metadata.get('pose_estimation_duration')
+        rows.append({
+            'model': f'{job.model.section} | {job.model.arch}',
+            'preset': job.preset,
+            'state': job.state or 'INTERRUPTED',
+            'score_detection': metadata.get('score_detection'),
+            'score_pose_estimation': metadata.get('score_pose_estimation'),
+            'detection_s_per_image': detection_duration[2] if detection_duration else None,
+            'pose_estimation_s_per_image': pose_estimation_duration[2] if pose_estimation_duration else None,
+            'inference_id': job.inference_id
+        })
+    rows.sort(key=lambda row: (row['preset'], -(row['score_pose_estimation'] or 0)))
+    return rows
+
+
+def print_table(rows):
+    columns = ['model', 'preset', 'state', 'score_detection', 'score_pose_estimation',
+               'detection_s_per_image', 'pose_estimation_s_per_image', 'inference_id']
+    cells = [[str(round(row[column], 4) if isinstance(row[column], float) else row[column]) for column in columns]
+             for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in cells:
+        print('  '.join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs every pose model on every data preset.')
+    parser.add_argument('--models', type=str, nargs='+', default=None, required=False,
+                        help='only models whose section or arch contains one of these strings')
+    parser.add_argument('--presets', type=str, nargs='+', default=DATA_PRESETS, choices=DATA_PRESETS, required=False)
+    parser.add_argument('--spotlight', type=str, default='All Spotlight', required=False)
+    parser.add_argument('--detector', type=str, default=DEFAULT_MMDETECTION_MODEL, required=False)
+    parser.add_argument('--redownload-model-zoo', action='store_true')
+    parser.add_argument('--concurrency', type=str, nargs='+', default=None, required=False,
+                        help='stage concurrency overrides, e.g. detection=2 pose_estimation=2')
+    parser.add_argument('--log', type=str, default=None, required=False, help='json lines file of all events')
+    parser.add_argument('--csv', type=str, default=None, required=False, help='csv file of the summary')
+    parser.add_argument('--dry-run', action='store_true', help='only print the planned jobs')
+    args = parser.parse_args()
+
+    model_zoo = ModelZoo(redownload_model_zoo=args.redownload_model_zoo)
+    zoo_models = model_zoo.get_models(dataset='coco', redownload_model_zoo=args.redownload_model_zoo)
+    models = get_custom_mmpose_models() + get_zoo_mmpose_models(zoo_models)
+    if args.models is not None:
+        models = [model for model in models
+                  if any(pattern in model.section or pattern in model.arch for pattern in args.models)]
+
+    detection_model = next((model for model in get_mmdetection_models() if model.name == args.detector), None)
+    if detection_model is None:
+        parser.error(f'Unknown detector {args.detector}.')
+    try:
+        concurrency = parse_concurrency(args.concurrency)
+    except JobSpecError as e:
+        parser.error(str(e))
+
+    catalog = InferenceCatalog()
+    catalog.refresh()
+    metadatas = [catalog.get_metadata(id_) for id_ in catalog.ids()]
+    existing = {metadata_fingerprint(metadata): metadata['id'] for metadata in metadatas
+                if 'mmpose_model_config' in metadata and metadata.get('end_datetime') is not None}
+    taken_names = {metadata['name'] for metadata in metadatas}
+
+    jobs = expand_jobs(models, args.presets, args.spotlight, detection_model, fetch_all_data())
+    for job in jobs:
+        if job.fingerprint in existing:
+            job.inference_id = existing[job.fingerprint]
+            job.state = 'SKIPPED'
+    pending_jobs = order_jobs([job for job in jobs if job.state is None], DurationHistory(metadatas))
+
+    print(f'{len(pending_jobs)} jobs to run, {len(jobs) - len(pending_jobs)} already inferred')
+    for job in pending_jobs:
+        print(f'{job.model.section} | {job.model.arch} | {job.preset} | {job.n_images} images | '
+              f'est. {(job.pose_estimation_cost + job.detection_cost) / 60:.1f} min')
+    if args.dry_run:
+        sys.exit(0)
+
+    states = {}
+    if pending_jobs:
+        sweep_id = id_generator()
+        inferences = [create_inference(job, sweep_id, taken_names) for job in pending_jobs]
+        existing_datasets = [find_existing_dataset([d.id for d in job.data]) for job in pending_jobs]
+        states = run_batch(inferences, existing_datasets, concurrency, args.log)
+        for job in pending_jobs:
+            job.state = states[job.inference_id]
+
+    catalog.refresh()
+    rows = summary_rows(jobs, catalog)
+    print()
+    print_table(rows)
+    if args.csv is not None:
+        with open(args.csv, 'w', encoding='utf8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+    sys.exit(0 if all(state == 'DONE' for state in states.values()) else 1)
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# the pipeline imports its modules relative to infer_pipeline and reads its directories from the environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+for variable in ('THESIS_DIR', 'MMPOSE_DIR', 'MMPOSE029_DIR', 'MMPOSE029_VENV_DIR', 'MMDETECTION_DIR'):
+    os.environ.setdefault(variable, tempfile.mkdtemp())
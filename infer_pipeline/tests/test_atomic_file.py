@@ -0,0 +1,22 @@
+from multiprocessing import Process
+
+from engine.atomic_file import path_lock, read_json, replace_json
+
+
+def add_entries(path, prefix, n_entries):
+    for i in range(n_entries):
+        with path_lock(path):
+            entries = read_json(path, {})
+            entries[f'{prefix}-{i}'] = i
+            replace_json(path, entries)
+
+
+def test_merges_of_concurrent_processes_are_kept(tmp_path):
+    path = str(tmp_path / 'index.json')
+    processes = [Process(target=add_entries, args=(path, prefix, 30)) for prefix in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert len(read_json(path, {})) == 4 * 30
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from data_types.run import Run
+from data_types.data import Data
+from data_types.feature import Feature
+from data_types.columnar_run import ColumnarRun, save_run, METRIC_COLUMNS
+from manager.metric_manager import RunMetrics
+
+KEYPOINTS = ['nose', 'left_wrist', 'right_wrist', 'left_ankle']
+N_STEPS = 120
+
+
+def create_run(path):
+    rng = np.random.default_rng(0)
+    features = []
+    for keypoint in KEYPOINTS:
+        for axis in ('x', 'y'):
+            values = rng.uniform(0, 500, N_STEPS)
+            values[rng.integers(0, N_STEPS, 5)] = -1
+            feature = Feature(f'{keypoint}_{axis}', 25, steps=list(range(N_STEPS)), values=values.tolist(),
+                              scores=rng.uniform(0, 1, N_STEPS).tolist())
+            feature.values_interp = np.where(values == -1, 250, values).tolist()
+            features.append(feature)
+    bboxes = rng.uniform(0, 500, (N_STEPS, 4)).tolist()
+    scores = rng.uniform(0, 1, N_STEPS).tolist()
+    run = Run(1, path, Data('/data/001 - 0120 - SPOTLIGHT - 025'), features, bboxes, [], [], scores, scores, None)
+    run.metrics = RunMetrics(features, 4.0).calculate().copy()
+    return run
+
+
+def test_metrics_are_stored(tmp_path):
+    path = str(tmp_path / 'run_001')
+    run = create_run(path)
+    save_run(run, path, 4.0)
+    for column in METRIC_COLUMNS.values():
+        assert (tmp_path / 'run_001' / (column + '.npy')).exists()
+
+    loaded = ColumnarRun(path)
+    assert set(loaded.metric_columns) == set(METRIC_COLUMNS)
+    assert loaded.metrics.keys() == run.metrics.keys()
+    for metric_name, metrics in run.metrics.items():
+        for metric, loaded_metric in zip(metrics, loaded.metrics[metric_name]):
+            assert loaded_metric.feature.name == metric.feature.name
+            assert loaded_metric.steps == pytest.approx(metric.steps)
+            assert np.allclose(loaded_metric.values, metric.values, rtol=1e-5, atol=1e-3)
+            assert np.allclose(loaded_metric.display_values, metric.display_values, rtol=1e-5, atol=1e-3)
+
+
+def test_run_without_metrics_calculates_them(tmp_path):
+    path = str(tmp_path / 'run_001')
+    run = create_run(path)
+    run.metrics = None
+    save_run(run, path, 4.0)
+
+    loaded = ColumnarRun(path)
+    assert loaded.metric_columns == {}
+    assert len(loaded.metrics[next(iter(METRIC_COLUMNS))]) == len(KEYPOINTS[1:]) * 2
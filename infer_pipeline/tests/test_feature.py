@@ -0,0 +1,44 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from data_types.feature import Feature
+from data_types.columnar_run import FeatureView
+
+
+def create_view():
+    keypoints = np.arange(4 * 2 * 3, dtype=np.float32).reshape(4, 2, 3)
+    return FeatureView('nose_x', 25, {'keypoints': keypoints, 'keypoints_interp': keypoints + 0.5}, keypoint=0, axis=0)
+
+
+def test_list_columns_are_read_only():
+    feature = Feature('nose_x', steps=[0, 1], values=[1.0, -1.0], scores=[0.5, 0.5])
+    with pytest.raises(TypeError):
+        feature.values.append(2.0)
+    with pytest.raises(TypeError):
+        feature.values[1] = 2.0
+
+    values = feature.values.copy()
+    values[1] = 2.0
+    feature.values = values
+    assert feature.array('values').tolist() == [1.0, 2.0]
+
+
+def test_add_to_view():
+    view = create_view()
+    view.add(4, 7.0, 0.25)
+    assert view.steps == [0, 1, 2, 3, 4]
+    assert view.array('values').tolist() == [0.0, 6.0, 12.0, 18.0, 7.0]
+    assert view.scores[-1] == 0.25
+    # the columns of the run are unchanged
+    assert view._columns['keypoints'][:, 0, 0].tolist() == [0.0, 6.0, 12.0, 18.0]
+
+
+def test_pickled_view_is_feature():
+    view = create_view()
+    view.values_interp = [1.0, 2.0, 3.0, 4.0]
+    feature = pickle.loads(pickle.dumps(view))
+    assert type(feature) is Feature
+    assert feature.values == view.values
+    assert feature.values_interp == [1.0, 2.0, 3.0, 4.0]
@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from engine.json_stream import iter_json_array
+
+ELEMENTS = [123.5, -7, 1e-05, 12, 'a, "b" ]', True, None, False, {'keypoints': [1.5, 2, 0.9], 'id': 3}, [[]], 0]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 64])
+def test_elements_split_across_chunks(tmp_path, chunk_size):
+    path = tmp_path / 'array.json'
+    path.write_text(' [' + ', '.join(json.dumps(element) for element in ELEMENTS) + ']\n')
+    assert list(iter_json_array(str(path), chunk_size=chunk_size)) == ELEMENTS
+
+
+def test_number_split_at_decimal_point(tmp_path):
+    path = tmp_path / 'array.json'
+    path.write_text('[123.5]')
+    assert list(iter_json_array(str(path), chunk_size=3)) == [123.5]
+
+
+def test_unclosed_array(tmp_path):
+    path = tmp_path / 'array.json'
+    path.write_text('[1, 2')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path), chunk_size=2))
@@ -0,0 +1,92 @@
+import random
+from statistics import mean
+
+import pytest
+
+from engine.pose_matcher import match_bottomup
+
+torch = pytest.importorskip('torch')
+box_iou = pytest.importorskip('torchvision.ops').box_iou
+
+N_KEYPOINTS = 17
+# the same keypoint scores in two orders, their exact means are equal but a pairwise float mean is not
+TIED_SCORES = ([0.26, 0.84, 0.3, 0.42, 0.58, 0.91, 0.78, 0.4, 0.5, 0.76, 0.51, 0.48],
+               [0.48, 0.3, 0.42, 0.84, 0.5, 0.91, 0.76, 0.51, 0.26, 0.4, 0.78, 0.58])
+
+
+def match_bottomup_per_pose(pred_bbox, poses):
+    # the per-pose matching the result assembler used before match_bottomup
+    x = int(pred_bbox[0])
+    y = int(pred_bbox[1])
+    w = int(pred_bbox[2])
+    h = int(pred_bbox[3])
+    pred_bbox_tensor = torch.FloatTensor([x, y, x + w, y + h]).unsqueeze(0)
+
+    preds = []
+    for pose in poses:
+        keypoints = pose['keypoints']
+        x_coord = keypoints[0::3]
+        y_coord = keypoints[1::3]
+        keypoint_scores = keypoints[2::3]
+        score = mean(keypoints[17::3])
+
+        bbox = [int(min(x_coord)), int(min(y_coord)), int(max(x_coord)), int(max(y_coord))]
+        iou = box_iou(pred_bbox_tensor, torch.FloatTensor(bbox).unsqueeze(0))
+        if iou > 0.3:
+            preds.append({
+                'iou': iou.item(),
+                'bbox': bbox,
+                'x_coord': x_coord,
+                'y_coord': y_coord,
+                'keypoint_scores': keypoint_scores,
+                'score': score
+            })
+
+    preds = sorted(preds, key=lambda d: d['score'], reverse=True)
+    return preds[0] if preds else None
+
+
+def make_pose(rng, bbox, scores):
+    x, y, w, h = bbox
+    keypoints = []
+    for score in [rng.random() for _ in range(N_KEYPOINTS - len(scores))] + scores:
+        keypoints += [x + rng.random() * w, y + rng.random() * h, score]
+    return {'keypoints': keypoints}
+
+
+def test_tied_scores_keep_the_earlier_pose():
+    rng = random.Random(0)
+    pred_bbox = [100, 100, 50, 100]
+    poses = [make_pose(rng, [110, 110, 40, 90], list(TIED_SCORES[0])),
+             make_pose(rng, [90, 120, 60, 100], list(TIED_SCORES[1]))]
+
+    match = match_bottomup([pred_bbox], [poses])[0]
+    expected = match_bottomup_per_pose(pred_bbox, poses)
+    assert match['score'] == expected['score']
+    assert match['iou'] == expected['iou']
+    assert match['bbox'] == expected['bbox']
+
+
+def test_matches_per_pose_loop():
+    rng = random.Random(1)
+    pred_bboxes = []
+    frame_poses = []
+    for _ in range(200):
+        pred_bbox = [rng.uniform(0, 500), rng.uniform(0, 500), rng.uniform(20, 200), rng.uniform(20, 200)]
+        poses = []
+        for _ in range(rng.randint(0, 5)):
+            bbox = [pred_bbox[0] + rng.uniform(-60, 60), pred_bbox[1] + rng.uniform(-60, 60),
+                    rng.uniform(20, 200), rng.uniform(20, 200)]
+            scores = list(rng.choice(TIED_SCORES)) if rng.random() < 0.5 else \
+                [round(rng.random(), 1) for _ in range(N_KEYPOINTS - 5)]
+            poses.append(make_pose(rng, bbox, scores))
+        pred_bboxes.append(pred_bbox)
+        frame_poses.append(poses)
+
+    matches = match_bottomup(pred_bboxes, frame_poses)
+    for pred_bbox, poses, match in zip(pred_bboxes, frame_poses, matches):
+        expected = match_bottomup_per_pose(pred_bbox, poses)
+        if expected is None:
+            assert match is None
+            continue
+        assert match == expected
@@ -0,0 +1,222 @@
+import copy
+import random
+import types
+from statistics import mean
+
+import numpy as np
+import pytest
+
+from data_types.data import Data
+from engine.result_assembler import ResultAssembler
+from test_pose_matcher import TIED_SCORES
+
+N_KEYPOINTS = 17
+DATASET_TYPE = types.SimpleNamespace(
+    keypoints=[f'keypoint_{i}_{axis}' for i in range(N_KEYPOINTS) for axis in ('x', 'y')] +
+              ['head_x', 'head_y', 'neck_x', 'neck_y'])
+
+
+def create_fixture(tmp_path, data_mode, n_data=3, n_images=6, seed=0):
+    # data folders with images, their coco annotations, one detection per image and the pose results in image order
+    rng = random.Random(seed)
+    datas = []
+    annotations = {'images': []}
+    pred_bboxes = []
+    results = []
+    image_id = 0
+    for data_id in range(1, n_data + 1):
+        data_dir = tmp_path / f'{str(data_id).zfill(3)} - {str(n_images).zfill(4)} - SPOTLIGHT - 025'
+        data_dir.mkdir()
+        for i in range(n_images):
+            filename = f'{str(i).zfill(6)}.png'
+            (data_dir / filename).touch()
+            annotations['images'].append({'id': image_id, 'file_name': f'images/{data_id}_{filename}'})
+
+            x, y, w, h = rng.uniform(0, 300), rng.uniform(0, 300), rng.uniform(50, 150), rng.uniform(50, 150)
+            pred_bboxes.append({'image_id': image_id, 'bbox': [x, y, w, h], 'score': rng.random(), 'category_id': 1})
+            for _ in range(1 if data_mode == 'topdown' else rng.randint(0, 3)):
+                keypoints = []
+                for _ in range(N_KEYPOINTS):
+                    keypoints += [x + rng.uniform(-20, w + 20), y + rng.uniform(-20, h + 20), round(rng.random(), 2)]
+                results.append({'image_id': image_id, 'category_id': 1, 'keypoints': keypoints,
+                                'score': rng.random()})
+            image_id += 1
+        datas.append(Data(str(data_dir)))
+    return datas, annotations, pred_bboxes, results
+
+
+def assemble(datas, annotations, pred_bboxes, results, data_mode, result_image_ids=None):
+    assembler = ResultAssembler(annotations, pred_bboxes, iter(results), DATASET_TYPE, data_mode,
+                                result_image_ids=result_image_ids)
+    return [assembler.assemble(data) for data in datas]
+
+
+def assert_runs_equal(runs, expected_runs):
+    assert len(runs) == len(expected_runs)
+    for run, expected_run in zip(runs, expected_runs):
+        assert run['id'] == expected_run['id']
+        for key in ('bboxes', 'bboxes_bottomup', 'ious', 'detection_scores', 'pose_estimation_scores'):
+            assert run[key] == expected_run[key], key
+        assert [feature.name for feature in run['features']] == [feature.name for feature in expected_run['features']]
+        for feature, expected_feature in zip(run['features'], expected_run['features']):
+            for column in ('steps', 'values', 'scores'):
+                assert getattr(feature, column) == getattr(expected_feature, column), (feature.name, column)
+
+
+@pytest.mark.parametrize('data_mode', ['topdown', 'bottomup'])
+def test_grouped_results_are_streamed(tmp_path, data_mode):
+    datas, annotations, pred_bboxes, results = create_fixture(tmp_path, data_mode)
+    expected_runs = assemble(datas, annotations, pred_bboxes, results, data_mode)
+
+    result_image_ids = [result['image_id'] for result in results]
+    assembler = ResultAssembler(annotations, pred_bboxes, iter(results), DATASET_TYPE, data_mode,
+                                result_image_ids=result_image_ids)
+    assert assembler.streamed
+    runs = []
+    for data in datas:
+        runs.append(assembler.assemble(data))
+        # only the results up to the first result of the next data are read
+        assert len(assembler.pending_results) <= 1
+    assert_runs_equal(runs, expected_runs)
+
+
+@pytest.mark.parametrize('data_mode', ['topdown', 'bottomup'])
+def test_ungrouped_results_are_buffered(tmp_path, data_mode):
+    datas, annotations, pred_bboxes, results = create_fixture(tmp_path, data_mode)
+    expected_runs = assemble(datas, annotations, pred_bboxes, results, data_mode)
+
+    # the results of each image stay in order, the images of all data are interleaved
+    results_by_image = {}
+    for result in results:
+        results_by_image.setdefault(result['image_id'], []).append(result)
+    image_ids = list(results_by_image)
+    random.Random(1).shuffle(image_ids)
+    shuffled_results = [result for image_id in image_ids for result in results_by_image[image_id]]
+    result_image_ids = [result['image_id'] for result in shuffled_results]
+
+    assembler = ResultAssembler(annotations, pred_bboxes, iter(shuffled_results), DATASET_TYPE, data_mode,
+                                result_image_ids=result_image_ids)
+    assert not assembler.streamed
+    assert_runs_equal([assembler.assemble(data) for data in datas], expected_runs)
+    # without image ids the results are buffered as well
+    assert_runs_equal(assemble(datas, annotations, pred_bboxes, shuffled_results, data_mode), expected_runs)
+
+
+def assemble_baseline(datas, annotations, pred_bboxes, results, data_mode):
+    # the assembly loop of Inference before the result assembler, up to the features of each run
+    torch = pytest.importorskip('torch')
+    box_iou = pytest.importorskip('torchvision.ops').box_iou
+
+    runs = []
+    for data in datas:
+        images = data.get_images()
+        bboxes = []
+        bboxes_bottomup = []
+        ious = []
+        detection_scores = []
+        pose_estimation_scores = []
+        features = [[] for _ in DATASET_TYPE.keypoints]
+        n_keypoints = len(DATASET_TYPE.keypoints)
+        for step, image in enumerate(images):
+            image_filename = str(data.id) + '_' + image.split('/')[-1]
+            for dataset_image in annotations['images']:
+                if dataset_image['file_name'].split('/')[-1] == image_filename:
+                    image_id = dataset_image['id']
+
+            pred_bbox = None
+            for bbox in pred_bboxes:
+                if bbox['image_id'] == image_id:
+                    pred_bbox = bbox
+
+            if data_mode == 'topdown':
+                result = next(result for result in results if result['image_id'] == image_id)
+                keypoints = result['keypoints']
+                result['score'] = mean(keypoints[17::3])
+                for i, (x, y, s) in enumerate(zip(keypoints[0::3], keypoints[1::3], keypoints[2::3])):
+                    features[i * 2].append((step, x, s))
+                    features[i * 2 + 1].append((step, y, s))
+
+            if data_mode == 'bottomup':
+                x = int(pred_bbox['bbox'][0])
+                y = int(pred_bbox['bbox'][1])
+                w = int(pred_bbox['bbox'][2])
+                h = int(pred_bbox['bbox'][3])
+                pred_bbox_tensor = torch.FloatTensor([x, y, x + w, y + h]).unsqueeze(0)
+
+                preds = []
+                for pose in [result for result in results if result['image_id'] == image_id]:
+                    keypoints = pose['keypoints']
+                    x_coord = keypoints[0::3]
+                    y_coord = keypoints[1::3]
+                    bbox = [int(min(x_coord)), int(min(y_coord)), int(max(x_coord)), int(max(y_coord))]
+                    iou = box_iou(pred_bbox_tensor, torch.FloatTensor(bbox).unsqueeze(0))
+                    if iou > 0.3:
+                        preds.append({
+                            'iou': iou.item(),
+                            'bbox': bbox,
+                            'x_coord': x_coord,
+                            'y_coord': y_coord,
+                            'keypoint_scores': keypoints[2::3],
+                            'score': mean(keypoints[17::3])
+                        })
+                preds = sorted(preds, key=lambda d: d['score'], reverse=True)
+                if not preds:
+                    preds.append({
+                        'iou': -1,
+                        'bbox': -1,
+                        'x_coord': [-1 for i in range(int((n_keypoints - 4) / 2))],
+                        'y_coord': [-1 for i in range(int((n_keypoints - 4) / 2))],
+                        'keypoint_scores': [-1 for i in range(int((n_keypoints - 4) / 2))],
+                        'score': -1
+                    })
+
+                result = preds[0]
+                for i, (x, y, s) in enumerate(zip(result['x_coord'], result['y_coord'], result['keypoint_scores'])):
+                    features[i * 2].append((step, x, s))
+                    features[i * 2 + 1].append((step, y, s))
+
+            bboxes.append(pred_bbox['bbox'])
+            detection_scores.append(pred_bbox['score'])
+            pose_estimation_scores.append(result['score'])
+
+            if data_mode == 'bottomup':
+                bboxes_bottomup.append(result['bbox'])
+                ious.append(result['iou'])
+
+        runs.append({
+            'id': data.id,
+            'features': features,
+            'bboxes': bboxes,
+            'bboxes_bottomup': bboxes_bottomup,
+            'ious': ious,
+            'detection_scores': detection_scores,
+            'pose_estimation_scores': pose_estimation_scores
+        })
+    return runs
+
+
+@pytest.mark.parametrize('data_mode', ['topdown', 'bottomup'])
+def test_runs_match_baseline_assembly(tmp_path, data_mode):
+    datas, annotations, pred_bboxes, results = create_fixture(tmp_path, data_mode, n_images=30)
+    if data_mode == 'bottomup':
+        # poses of an image whose mean scores are only equal when they are calculated exactly
+        for result in results[::2]:
+            result['keypoints'][17::3] = list(random.Random(result['image_id']).choice(TIED_SCORES))
+
+    expected_runs = assemble_baseline(datas, annotations, pred_bboxes, copy.deepcopy(results), data_mode)
+    runs = assemble(datas, annotations, pred_bboxes, copy.deepcopy(results), data_mode,
+                    [result['image_id'] for result in results])
+
+    assert len(runs) == len(expected_runs)
+    for run, expected_run in zip(runs, expected_runs):
+        assert run['id'] == expected_run['id']
+        for key in ('bboxes', 'bboxes_bottomup', 'ious', 'detection_scores', 'pose_estimation_scores'):
+            assert run[key] == expected_run[key], key
+        assert [feature.name for feature in run['features']] == DATASET_TYPE.keypoints
+        for feature, expected_feature in zip(run['features'], expected_run['features']):
+            # feature columns are float32 buffers, the baseline features were lists of the same values
+            expected_steps, expected_values, expected_scores = zip(*expected_feature) if expected_feature else \
+                ((), (), ())
+            assert feature.steps == list(expected_steps), feature.name
+            assert np.array_equal(feature.array('values'), np.array(expected_values, dtype=np.float32)), feature.name
+            assert np.array_equal(feature.array('scores'), np.array(expected_scores, dtype=np.float32)), feature.name
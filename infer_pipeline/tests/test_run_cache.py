@@ -0,0 +1,59 @@
+from data_types import run_cache
+from data_types.run_cache import RunCache
+from data_types.columnar_run import save_run
+from test_columnar_run import create_run
+
+
+def save_runs(tmp_path, n_runs):
+    paths = []
+    for i in range(n_runs):
+        path = str(tmp_path / f'run_{str(i).zfill(3)}')
+        run = create_run(path)
+        run.metrics = None
+        save_run(run, path, 4.0)
+        paths.append(path)
+    return paths
+
+
+def test_hits_are_not_measured(tmp_path, monkeypatch):
+    path, = save_runs(tmp_path, 1)
+    cache = RunCache(10 ** 9)
+    run = cache.get(path)
+
+    def measure(obj, seen):
+        raise AssertionError('a cache hit measured the run')
+
+    monkeypatch.setattr(run_cache, '_object_size', measure)
+    assert cache.get(path) is run
+
+
+def test_materialized_lists_and_metrics_are_added(tmp_path):
+    path, = save_runs(tmp_path, 1)
+    cache = RunCache(10 ** 9)
+    run = cache.get(path)
+    loaded_size = cache.n_bytes
+
+    run.features[0].values
+    list_size = cache.n_bytes
+    assert list_size > loaded_size
+
+    run.metrics
+    assert cache.n_bytes > list_size
+    assert cache.n_bytes == cache.runs[path][1]
+
+
+def test_materialized_metrics_evict_other_runs(tmp_path):
+    paths = save_runs(tmp_path, 2)
+    cache = RunCache(10 ** 9)
+    for path in paths:
+        cache.get(path)
+    cache.max_bytes = cache.n_bytes
+
+    evicted_run = cache.runs[paths[0]][0]
+    cache.get(paths[1]).metrics
+    assert list(cache.runs) == [paths[1]]
+    assert cache.n_bytes == cache.runs[paths[1]][1]
+
+    # an evicted run no longer counts towards the budget
+    evicted_run.features[0].values
+    assert cache.n_bytes == cache.runs[paths[1]][1]
@@ -0,0 +1,75 @@
+import os
+import types
+
+import numpy as np
+
+from data_types import inference as inference_module
+from data_types.inference import Inference
+from data_types.columnar_run import ColumnarRun, save_run
+from engine.progress import ProgressChannel
+from engine.stage_scheduler import InferenceStage
+from engine.stage_checkpoint import StageCheckpoint, find_interrupted_jobs
+from test_columnar_run import create_run
+
+
+def test_complete_detection_without_sidecar(tmp_path):
+    # with RESULT_FORMAT=json the detection stage has no sidecar
+    detection_file_path = tmp_path / 'detections.json'
+    detection_file_path.write_text('[]')
+    inference = Inference.__new__(Inference)
+    inference.state = {'detection_file_path': str(detection_file_path), 'detection_sidecar_path': None}
+    for attribute in ('path', 'start_datetime_timestamp', 'detection_duration', 'pose_estimation_duration',
+                      'score_detection', 'score_pose_estimation', 'profile'):
+        setattr(inference, attribute, None)
+
+    checkpoint = StageCheckpoint(str(tmp_path), list(InferenceStage))
+    inference.complete_stage(checkpoint, InferenceStage.DETECTION, {})
+
+    marker = checkpoint.get(InferenceStage.DETECTION, {})
+    assert marker is not None
+    assert marker['outputs'] == [str(detection_file_path)]
+
+
+def test_find_interrupted_jobs_without_inferences_dir(tmp_path):
+    assert find_interrupted_jobs(str(tmp_path / 'inferences')) == []
+
+
+def create_assembled_inference(inferences_dir, id_):
+    # an inference after result assembly, with its runs saved without metrics
+    inference = Inference.__new__(Inference)
+    inference.id = id_
+    inference.name = id_
+    inference.path = os.path.join(inferences_dir, id_)
+    os.makedirs(inference.path)
+    model = types.SimpleNamespace(config='config.py', checkpoint='checkpoint.pth')
+    for attribute in ('mmpose_model', 'mmdetection_model'):
+        setattr(inference, attribute, model)
+    for attribute in ('start_datetime_timestamp', 'detection_duration', 'pose_estimation_duration', 'score_detection',
+                      'score_pose_estimation', 'description', 'run_paths'):
+        setattr(inference, attribute, None)
+    inference.data = []
+    inference.profile = {}
+
+    run = create_run(os.path.join(inference.path, 'run_001'))
+    run.metrics = None
+    save_run(run, run.path)
+    inference.state = {'n_images': 120, 'runs': [run], 'run_paths': [run.path]}
+    return inference
+
+
+def test_metrics_of_resumed_assembly(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference_module, 'INFERENCES_DIR', str(tmp_path))
+    inference = create_assembled_inference(str(tmp_path), 'assembled')
+    inference.calculate_metrics(ProgressChannel().reporter(inference.id))
+
+    resumed = create_assembled_inference(str(tmp_path), 'resumed')
+    # a resumed inference only has the saved runs of the assembly checkpoint
+    del resumed.state['runs']
+    resumed.calculate_metrics(ProgressChannel().reporter(resumed.id))
+
+    run = ColumnarRun(inference.run_paths[1])
+    resumed_run = ColumnarRun(resumed.run_paths[1])
+    assert run.metric_columns.keys() == resumed_run.metric_columns.keys() != set()
+    for metric_name, values in run.metric_columns.items():
+        assert np.array_equal(values, resumed_run.metric_columns[metric_name])
+    assert not os.path.exists(os.path.join(inference.path, 'assembled_runs.pkl'))
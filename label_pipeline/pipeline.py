@@ -394,12 +394,14 @@ class Pipeline():
 
         images = []
         bboxes = self.selected_data['run'].bboxes
+        keypoint_indices = self.selected_data['run'].keypoint_indices
 
         for index in indices:
             if index is None:
                 images.append(None)
             else:
                 image = self.images[index]
+                coordinates = self.selected_data['run'].keypoint_coordinates(index)
 
                 for key, limb in self.dataset_manager.datasets[Datasets.COCO.value].skeleton.items():
                     keypoint_1_name = limb['keypoint_1'][0]['name']
@@ -408,14 +410,8 @@ class Pipeline():
                     if False in (KeyPointsImagePlot.has_value(keypoint_1_name), KeyPointsImagePlot.has_value(keypoint_2_name)):
                         continue
 
-                    x1 = int(next(f for f in self.selected_data['run'].features if f.name ==
-                                  keypoint_1_name + '_x').values[index])
-                    y1 = int(next(f for f in self.selected_data['run'].features if f.name ==
-                                  keypoint_1_name + '_y').values[index])
-                    x2 = int(next(f for f in self.selected_data['run'].features if f.name ==
-                                  keypoint_2_name + '_x').values[index])
-                    y2 = int(next(f for f in self.selected_data['run'].features if f.name ==
-                                  keypoint_2_name + '_y').values[index])
+                    x1, y1 = (int(c) for c in coordinates[keypoint_indices[keypoint_1_name]])
+                    x2, y2 = (int(c) for c in coordinates[keypoint_indices[keypoint_2_name]])
                     color = [c for c in limb['color']]
                     image = cv.line(image, pt1=(x1, y1), pt2=(x2, y2), color=color, thickness=2)
 
@@ -423,12 +419,7 @@ class Pipeline():
                 for keypoint_name, keypoint in self.dataset_manager.datasets[Datasets.COCO.value].keypoints.items():
                     keypoint_name = keypoint_name[:-2]
                     if KeyPointsImagePlot.has_value(keypoint_name) and not keypoint_name in drawn_keypoints:
-                        feature_x = next(
-                            f for f in self.selected_data['run'].features if f.name == keypoint_name + '_x')
-                        feature_y = next(
-                            f for f in self.selected_data['run'].features if f.name == keypoint_name + '_y')
-                        x = int(feature_x.values[index])
-                        y = int(feature_y.values[index])
+                        x, y = (int(c) for c in coordinates[keypoint_indices[keypoint_name]])
 
                         if keypoint_name in self.selected_data['feature_x'].name:
                             color = [255, 0, 220]